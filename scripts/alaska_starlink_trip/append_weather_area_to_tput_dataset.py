@@ -69,12 +69,10 @@ def append_weather_area_to_app_tput_traces(tput_dir: str):
         tput_df['time'] = pd.to_datetime(tput_df['time'], format="ISO8601")
 
         weather_df = pd.read_csv(weather_csv_path)
-        weather_df[CommonField.LOCAL_DT] = pd.to_datetime(weather_df[CommonField.LOCAL_DT], format="ISO8601")
-        weatherIntervalQueryUtil = TypeIntervalQueryUtil(weather_df[[CommonField.LOCAL_DT, 'value']].values.tolist())
+        weatherIntervalQueryUtil = TypeIntervalQueryUtil.from_df(weather_df, time_field=CommonField.LOCAL_DT)
 
         area_df = pd.read_csv(area_csv_path)
-        area_df[CommonField.LOCAL_DT] = pd.to_datetime(area_df[CommonField.LOCAL_DT], format="ISO8601")
-        areaIntervalQueryUtil = TypeIntervalQueryUtil(area_df[[CommonField.LOCAL_DT, 'value']].values.tolist())
+        areaIntervalQueryUtil = TypeIntervalQueryUtil.from_df(area_df, time_field=CommonField.LOCAL_DT)
 
         for idx, row in tput_df.iterrows():
             tput_df.at[idx, 'weather'] = weatherIntervalQueryUtil.query(row['time'])
@@ -97,12 +95,10 @@ def main():
     logger.info(f'Loading area data from {area_csv_path}')
     
     weather_df = pd.read_csv(weather_csv_path)
-    weather_df[CommonField.LOCAL_DT] = pd.to_datetime(weather_df[CommonField.LOCAL_DT], format="ISO8601")
-    weather_query_util = TypeIntervalQueryUtil(weather_df[[CommonField.LOCAL_DT, 'value']].values.tolist())
+    weather_query_util = TypeIntervalQueryUtil.from_df(weather_df, time_field=CommonField.LOCAL_DT)
 
     area_df = pd.read_csv(area_csv_path)
-    area_df[CommonField.LOCAL_DT] = pd.to_datetime(area_df[CommonField.LOCAL_DT], format="ISO8601")
-    area_query_util = TypeIntervalQueryUtil(area_df[[CommonField.LOCAL_DT, 'value']].values.tolist())
+    area_query_util = TypeIntervalQueryUtil.from_df(area_df, time_field=CommonField.LOCAL_DT)
 
 
     append_weather_area_to_app_tput_traces(tput_dir=tput_dir)
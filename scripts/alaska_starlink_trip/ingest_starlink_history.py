@@ -0,0 +1,21 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from scripts.alaska_starlink_trip.configs import ROOT_DIR
+from scripts.starlink_history_utils import ingest_starlink_history_of_trip
+
+raw_dirs = [
+    os.path.join(ROOT_DIR, 'raw/dish_metrics'),
+    os.path.join(ROOT_DIR, 'raw/dish_history'),
+]
+store_dir = os.path.join(ROOT_DIR, 'starlink/history')
+
+
+def main():
+    ingest_starlink_history_of_trip(raw_dirs=raw_dirs, store_dir=store_dir)
+
+
+if __name__ == '__main__':
+    main()
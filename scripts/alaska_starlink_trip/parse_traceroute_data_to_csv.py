@@ -4,12 +4,10 @@ import sys
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
-from scripts.time_utils import StartEndLogTimeProcessor, format_datetime_as_iso_8601
-from scripts.traceroute_utils import find_traceroute_files_by_dir_list, parse_traceroute_log, save_ip_info_to_map, \
-    batch_query_ip_info
+from scripts.traceroute_utils import find_traceroute_files_by_dir_list, save_ip_info_to_map, \
+    batch_query_ip_info, parse_traceroute_files_to_df
 
 
-from typing import List, Dict
 from scripts.alaska_starlink_trip.labels import DatasetLabel
 from scripts.alaska_starlink_trip.separate_dataset import read_dataset
 from scripts.constants import DATASET_DIR
@@ -25,17 +23,6 @@ timezone_str = 'US/Alaska'
 logger = create_logger('traceroute_parsing', filename=os.path.join(tmp_data_path, 'parse_traceroute_data_to_csv.log'))
 
 
-def save_hop_info_to_csv(parsed_results: List[Dict], output_filename: str):
-    """
-    Save the resolve duration information to a csv file
-    :param parsed_result:
-    :return:
-    """
-    df = pd.DataFrame(parsed_results)
-    df.to_csv(output_filename, index=False)
-    return df
-
-
 def process_raw_data(operator: str):
     if not os.path.exists(merged_csv_dir):
         os.mkdir(merged_csv_dir)
@@ -44,32 +31,11 @@ def process_raw_data(operator: str):
     traceroute_files = find_traceroute_files_by_dir_list(file_list)
     total_file_count = len(traceroute_files)
     logger.info(f'Found traceroute files: {total_file_count}')
-    main_data_frame = pd.DataFrame()
-    failed_files = []
-
-    for file in traceroute_files:
-        logger.info(f'Start to process {file} ...')
-        try:
-            with open(file, 'r') as f:
-                lines = f.readlines()
-                content = ''.join(lines)
-                start_end_time = StartEndLogTimeProcessor.get_start_end_time_from_log(content,
-                                                                                      timezone_str=timezone_str)[0]
-                hops = parse_traceroute_log(content)
-                data_points = []
-                for hop in hops:
-                    for probe in hop:
-                        data_points.append(probe)
-
-            output_filename = file.replace('.out', '.csv')
-            df = save_hop_info_to_csv(data_points, output_filename=output_filename)
-            df['start_time'] = format_datetime_as_iso_8601(start_end_time[0])
-            df['end_time'] = format_datetime_as_iso_8601(start_end_time[1])
-            main_data_frame = pd.concat([main_data_frame, df], ignore_index=True)
-            logger.info(f'Saved traceroute data to {output_filename}')
-        except Exception as e:
-            logger.error(f'Failed to process {file}: {e}')
-            failed_files.append(file)
+    main_data_frame, failed_files = parse_traceroute_files_to_df(
+        traceroute_files,
+        timezone_str=timezone_str,
+        logger=logger,
+    )
 
     # Save the merged data frame to a CSV file
     merged_csv_filename = os.path.join(merged_csv_dir, f'{operator}_traceroute.csv')
@@ -88,7 +54,8 @@ def process_raw_data(operator: str):
 def save_ip_info_map(main_data_frame: pd.DataFrame):
     ip_list = main_data_frame['ip'].unique().tolist()
     ip_info_map_filepath = os.path.join(merged_csv_dir, 'ip_info_map.json')
-    ip_info_list = batch_query_ip_info(ip_list)
+    ip_info_cache_path = os.path.join(merged_csv_dir, 'ip_info_cache.sqlite')
+    ip_info_list = batch_query_ip_info(ip_list, cache_path=ip_info_cache_path)
     # ip_info_list = json.loads(open(os.path.join(merged_csv_dir, 'ip_info.json')).read())
     save_ip_info_to_map(ip_info_list, output_filepath=ip_info_map_filepath)
     logger.info(f'Saved ip info map to {ip_info_map_filepath}')
@@ -2,13 +2,11 @@ import glob
 import os
 import sys
 
-import pandas as pd
-
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 from scripts.constants import CommonField
 from scripts.logging_utils import create_logger
-from scripts.weather_area_type_query_utils import parse_weather_area_type_log
+from scripts.weather_area_type_query_utils import parse_weather_area_type_logs
 from scripts.alaska_starlink_trip.configs import ROOT_DIR
 
 base_dir = os.path.join(ROOT_DIR, 'raw/weather_area')
@@ -26,21 +24,15 @@ def main():
     logs = glob.glob(os.path.join(base_dir, '**/weather_area_record.out'))
     logger.info(f'Found {len(logs)} logs')
 
-    weather_data = []
-    area_data = []
-    for log in logs:
-        result = parse_weather_area_type_log(log)
-        weather_data.extend(result['weather'])
-        area_data.extend(result['area'])
+    result = parse_weather_area_type_logs(logs)
 
-    header = [CommonField.LOCAL_DT, CommonField.UTC_TS, 'value']
     weather_csv_path = os.path.join(others_dataset_dir, 'weather.csv')
-    weather_df = pd.DataFrame(weather_data, columns=header).sort_values(by=CommonField.UTC_TS)
+    weather_df = result['weather'].sort_values(by=CommonField.UTC_TS)
     weather_df.to_csv(weather_csv_path, index=False)
     logger.info(f'Saved weather data to CSV files: {weather_csv_path}')
 
     area_csv_path = os.path.join(others_dataset_dir, 'area.csv')
-    area_df = pd.DataFrame(area_data, columns=header).sort_values(by=CommonField.UTC_TS)
+    area_df = result['area'].sort_values(by=CommonField.UTC_TS)
     area_df.to_csv(area_csv_path, index=False)
     logger.info(f'Saved area data to CSV files: {area_csv_path}')
 
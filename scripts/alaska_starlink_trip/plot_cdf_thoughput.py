@@ -1,5 +1,7 @@
+import argparse
 import os
 import sys
+from typing import List
 
 import numpy as np
 import pandas as pd
@@ -15,6 +17,7 @@ from scripts.cdf_tput_plotting_utils import get_data_frame_from_all_csv, plot_cd
     plot_cdf_tput_tcp_vs_udp_for_starlink_and_cellular, plot_cdf_xcal_vs_app_tput_combined
 
 from scripts.constants import OUTPUT_DIR, XcalField
+from scripts.utilities.plot_scheduler import PlotScheduler
 
 base_dir = os.path.join(ROOT_DIR, 'throughput')
 tput_cubic_dir = os.path.join(ROOT_DIR, 'throughput_cubic')
@@ -364,7 +367,32 @@ def read_and_plot_xcal_tput_data(base_dir: str, output_dir: str):
         )
         print(f'Saved combined XCAL vs application throughput plot to {fig_path}')
 
-def main():
+# figures rendered when no figure is selected
+DEFAULT_FIGURES = ['xcal_tput']
+
+
+def build_plot_scheduler() -> PlotScheduler:
+    scheduler = PlotScheduler(logger=logger)
+    for protocol in ['tcp', 'udp']:
+        for direction in ['downlink', 'uplink']:
+            scheduler.add(f'tput_{protocol}_{direction}',
+                          read_and_plot_throughput_data, protocol, direction, output_dir)
+            scheduler.add(f'tput_by_area_{protocol}_{direction}',
+                          read_and_plot_throughput_data_by_area_2, protocol, direction, output_dir)
+            scheduler.add(f'tput_by_weather_{protocol}_{direction}',
+                          read_and_plot_throughput_data_by_weather, protocol, direction, output_dir)
+    for direction in ['downlink', 'uplink']:
+        scheduler.add(f'starlink_vs_cellular_{direction}', plot_cdf_tput_starlink_vs_cellular, direction)
+        scheduler.add(f'cubic_vs_bbr_tcp_{direction}',
+                      read_and_plot_cdf_tcp_tput_with_cubic_vs_bbr, 'tcp', direction, output_dir)
+    scheduler.add('xcal_tput', read_and_plot_xcal_tput_data, base_dir=xcal_dir, output_dir=output_dir)
+    return scheduler
+
+
+def main(figures: List[str] | None = None):
+    """
+    :param figures: names of the figures to render in parallel, DEFAULT_FIGURES by default
+    """
     if not os.path.exists(base_dir):
         raise FileNotFoundError(f"Dataset folder does not exist: {base_dir} ")
 
@@ -372,45 +400,13 @@ def main():
     if not os.path.exists(output_dir):
         os.makedirs(output_dir, exist_ok=True)
 
-    # read_and_plot_throughput_data('tcp', 'downlink', output_dir)
-    # print("--------------")
-    # read_and_plot_throughput_data('tcp', 'uplink', output_dir)
-    # print("--------------")
-    # read_and_plot_throughput_data('udp', 'downlink', output_dir)
-    # print("--------------")
-    # read_and_plot_throughput_data('udp', 'uplink', output_dir)
-    # print("--------------")
-
-    # # By area
-    # read_and_plot_throughput_data_by_area_2('tcp', 'downlink', output_dir)
-    # print("--------------")
-    # read_and_plot_throughput_data_by_area_2('tcp', 'uplink', output_dir)
-    # print("--------------")
-    # read_and_plot_throughput_data_by_area_2('udp', 'downlink', output_dir)
-    # print("--------------")
-    # read_and_plot_throughput_data_by_area_2('udp', 'uplink', output_dir)
-    # print("--------------")
-
-    # # By weather
-    # read_and_plot_throughput_data_by_weather('tcp', 'downlink', output_dir)
-    # read_and_plot_throughput_data_by_weather('tcp', 'uplink', output_dir)
-    # read_and_plot_throughput_data_by_weather('udp', 'downlink', output_dir)
-    # read_and_plot_throughput_data_by_weather('udp', 'uplink', output_dir)
-
-    # # read_and_plot_starlink_throughput_data(output_dir)
-    # print("--------------")
-
-    # # Starlink vs Cellular
-    # plot_cdf_tput_starlink_vs_cellular('downlink')
-    # plot_cdf_tput_starlink_vs_cellular('uplink')
-
-    # # Cubic vs BBR
-    # read_and_plot_cdf_tcp_tput_with_cubic_vs_bbr('tcp', 'downlink', output_dir)
-    # read_and_plot_cdf_tcp_tput_with_cubic_vs_bbr('tcp', 'uplink', output_dir)
-
-    # XCAL
-    read_and_plot_xcal_tput_data(base_dir=xcal_dir, output_dir=output_dir)
+    build_plot_scheduler().run(figures or DEFAULT_FIGURES)
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Plot the throughput CDFs of the trip')
+    parser.add_argument('figures', nargs='*', help=f'figures to render, {DEFAULT_FIGURES} by default')
+    parser.add_argument('--all', action='store_true', help='render every figure')
+    args = parser.parse_args()
+
+    main(build_plot_scheduler().get_names() if args.all else args.figures)
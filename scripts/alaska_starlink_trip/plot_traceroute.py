@@ -10,6 +10,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 from scripts.utilities.geo_ip_utils import IGeoIPQuery, JsonGeoIPQuery, MaxMindGeoIPQuery
 from scripts.logging_utils import create_logger
+from scripts.utilities.TracerouteCube import TracerouteCube
+from scripts.utilities.ip_utils import get_private_ip_mask
 from scripts.constants import DATASET_DIR, OUTPUT_DIR
 
 base_dir = os.path.join(DATASET_DIR, "alaska_starlink_trip/traceroute")
@@ -26,55 +28,17 @@ logger = create_logger(
 
 def print_ips_by_hops():
     df = pd.read_csv(os.path.join(base_dir, 'starlink_traceroute.csv'))
+    cube = TracerouteCube(df)
     # find groups that have less than 3 hops
-    df_groups = df.groupby('start_time')
-    for start_time, group_df in df_groups:
-        if group_df['hop_number'].max() < 3:
-            logger.info(f'[CAUTION] group {start_time} has less than 3 hops')
+    for start_time in cube.get_runs_with_max_hop_below(3):
+        logger.info(f'[CAUTION] group {start_time} has less than 3 hops')
 
     for hop in range(1, 8):
-        hop_df = df[df['hop_number'] == hop]
         # exclude exceptional cases
-        hop_df = hop_df[hop_df['exception'].isna()]
+        hop_ip_df = cube.get_hop_ip_summary(hop, exclude_exceptions=True)
+        results = [f'{ip} ({ip_freq}) - {mean_rtt:.2f} ms' for ip, ip_freq, mean_rtt in hop_ip_df.itertuples(index=False)]
+        logger.info(f'hop {hop} count ({hop_ip_df["probe_count"].sum()}), unique: {results}')
 
-        unique_ip = hop_df["ip"].unique()
-        results = []
-        for ip in unique_ip:
-            if pd.isna(ip):
-                ip_df = hop_df[hop_df['ip'].isna()].copy()
-            else:
-                ip_df = hop_df[hop_df['ip'] == ip].copy()
-            # get freq of this ip
-            ip_freq = ip_df.shape[0]
-            mean_rtt = pd.to_numeric(ip_df['rtt_ms'], errors='coerce').dropna()
-            results.append(f'{ip} ({ip_freq}) - {mean_rtt.mean():.2f} ms')
-        logger.info(f'hop {hop} count ({len(hop_df["ip"])}), unique: {results}')
-
-def is_private_ip(ip):
-    """Check if an IP address is private"""
-    private_patterns = [
-        '192.168.',
-        '10.',
-        '172.16.',
-        '172.17.',
-        '172.18.',
-        '172.19.',
-        '172.20.',
-        '172.21.',
-        '172.22.',
-        '172.23.',
-        '172.24.',
-        '172.25.',
-        '172.26.',
-        '172.27.',
-        '172.28.',
-        '172.29.',
-        '172.30.',
-        '172.31.',
-        '100.64.',  # Carrier-grade NAT
-        '169.254.'  # Link-local
-    ]
-    return any(ip.startswith(pattern) for pattern in private_patterns)
 
 def get_color_gradient(hop_number, max_hops):
     """Generate color with increasing intensity based on hop number"""
@@ -140,6 +104,12 @@ def plot_hop_points_on_map(geo_ip_query: IGeoIPQuery):
     # Create a dictionary to store unique IP locations and their hop numbers
     ip_locations = {}  # {ip: {'lat': lat, 'lon': lon, 'hops': set(), 'data': location_info}}
     
+    # Classify and look up every distinct IP once
+    unique_ips = df['ip'].dropna().unique()
+    private_ip_set = set(unique_ips[get_private_ip_mask(unique_ips)])
+    public_ips = [ip for ip in unique_ips if ip not in private_ip_set]
+    ip_location_map = geo_ip_query.get_locations(public_ips)
+
     # First pass: collect all unique IPs and their hop numbers
     for _, row in df.iterrows():
         if pd.isna(row['ip']):
@@ -148,12 +118,12 @@ def plot_hop_points_on_map(geo_ip_query: IGeoIPQuery):
         total_ips.add(row['ip'])
         ip = row['ip']
         
-        if is_private_ip(ip):
+        if ip in private_ip_set:
             private_ips.add(ip)
             continue
             
         # Get and store location info for this IP
-        location = geo_ip_query.get_location(ip)
+        location = ip_location_map[ip]
         if location is None:
             public_unmapped_ips.add(ip)
             continue
@@ -1,5 +1,4 @@
 from datetime import datetime
-import json
 import os
 import sys
 from typing import List, Tuple
@@ -8,6 +7,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 from scripts.alaska_starlink_trip.labels import DatasetLabel
 from scripts.utilities.AppTputPeriodExtractor import AppTputPeriodExtractor
+from scripts.utilities.dataset_manifest import DatasetManifest
 from scripts.utilities.starlink_metric_utils import StarlinkMetricProcessor
 from scripts.logging_utils import create_logger
 from scripts.time_utils import now
@@ -15,20 +15,14 @@ from scripts.alaska_starlink_trip.configs import ROOT_DIR, TIMEZONE
 
 class AlaskaAppTputPeriodExtractor(AppTputPeriodExtractor):
     def __init__(self):
-        super().__init__(operator='starlink')
+        super().__init__(operator='starlink', period_index_path=os.path.join(ROOT_DIR, 'tmp', 'period_index.pkl'))
 
-    def read_dataset(self, category: str, label: str):
-        # read merged datasets
-        tmp_data_path = os.path.join(ROOT_DIR, 'tmp')
-        datasets = json.load(open(os.path.join(tmp_data_path, f'{category}_merged_datasets.json')))
-        return datasets[label]
+    def read_dataset(self, category: str, label: str | List[str]) -> List[str]:
+        return DatasetManifest.load(os.path.join(ROOT_DIR, 'tmp', f'{category}_merged_datasets.json')).get_run_dirs(label)
     
     def get_all_data_dirs(self):
-        dir_list = self.read_dataset(self.operator, label=DatasetLabel.NORMAL.value)
-        bbr_testing_data_dir_list = self.read_dataset(self.operator, label=DatasetLabel.BBR_TESTING_DATA.value)
         # add bbr testing data into the final dataset
-        dir_list.extend(bbr_testing_data_dir_list)
-        return dir_list
+        return self.read_dataset(self.operator, label=[DatasetLabel.NORMAL.value, DatasetLabel.BBR_TESTING_DATA.value])
 
 def main():
     tmp_dir = os.path.join(ROOT_DIR, 'tmp')
@@ -26,10 +26,8 @@ logger = create_logger('sync_traces_among_operators', filename=os.path.join(outp
 def generate_operator_trace_list(base_dir: str):
     for operator in ['starlink', 'att', 'verizon']:
         operator_dataset = {}
-        dataset_list = read_dataset(operator, DatasetLabel.NORMAL.value)
         # Consider BBR testing data as normal data as it was done in cities of Alaska
-        bbr_dataset_list = read_dataset(operator, DatasetLabel.BBR_TESTING_DATA.value)
-        dataset_list.extend(bbr_dataset_list)
+        dataset_list = read_dataset(operator, [DatasetLabel.NORMAL.value, DatasetLabel.BBR_TESTING_DATA.value])
 
         for trace_type in ['tcp_downlink', 'tcp_uplink', 'ping']:
             operator_dataset[trace_type] = []
@@ -23,9 +23,11 @@ def get_tput_data_for_alaska_and_hawaii(protocol: str, direction: str):
     al_dataset_helper = DatasetHelper(os.path.join(location_conf['alaska']['root_dir'], 'throughput'))
     hawaii_dataset_helper = DatasetHelper(os.path.join(location_conf['hawaii']['root_dir'], 'throughput'))
 
-    alaska_tput_data = al_dataset_helper.get_tput_data(operator='starlink', protocol=protocol, direction=direction)
+    alaska_tput_data = al_dataset_helper.get_tput_data(
+        operator='starlink', protocol=protocol, direction=direction, usecols=[CommonField.TPUT_MBPS])
 
-    hawaii_tput_data = hawaii_dataset_helper.get_tput_data(operator='starlink', protocol=protocol, direction=direction)
+    hawaii_tput_data = hawaii_dataset_helper.get_tput_data(
+        operator='starlink', protocol=protocol, direction=direction, usecols=[CommonField.TPUT_MBPS])
 
     alaska_tput_data['location'] = 'alaska'
     hawaii_tput_data['location'] = 'hawaii'
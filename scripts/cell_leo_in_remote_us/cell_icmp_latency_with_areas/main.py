@@ -9,40 +9,16 @@ from matplotlib import pyplot as plt
 import numpy as np
 import pandas as pd
 
-from scripts.cell_leo_in_remote_us.common import cellular_location_conf, cellular_operator_conf, tech_conf
+from scripts.cell_leo_in_remote_us.common import cellular_location_conf, cellular_operator_conf, store_layout, tech_conf
 from scripts.constants import CommonField, XcalField
 from scripts.logging_utils import create_logger
+from scripts.utilities.analytics_store import AnalyticsStore, TraceType
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 logger = create_logger('icmp_latency_with_areas', filename=os.path.join(current_dir, 'outputs', 'icmp_latency_with_areas.log'))
 
 
 
-def read_latency_data(root_dir: str, operator: str, protocol: str = 'icmp'):
-    if protocol == 'icmp':
-        input_csv_path = os.path.join(root_dir, 'ping/sizhe_new_data', f'{operator}_ping.csv')
-    else:
-        raise ValueError(f'Unsupported protocol: {protocol}')
-
-    df = pd.read_csv(input_csv_path)
-    return df
-
-def aggregate_latency_data_by_operator(
-        root_dir: str,
-        operators: List[str], 
-        protocol: str = 'icmp',
-    ):
-    data = pd.DataFrame()
-    for operator in operators:
-        df = read_latency_data(
-            root_dir=root_dir, 
-            operator=operator, 
-            protocol=protocol
-        )
-        df['operator'] = operator
-        data = pd.concat([data, df])
-    return data
-
 def aggregate_latency_data_by_location(
         locations: List[str], 
         location_conf: Dict[str, Dict],
@@ -57,16 +33,10 @@ def aggregate_latency_data_by_location(
     Returns:
         pd.DataFrame: Combined DataFrame with latency data
     """
-    data = pd.DataFrame()
-    for location in locations:
-        df = aggregate_latency_data_by_operator(
-            root_dir=location_conf[location]['root_dir'],
-            operators=location_conf[location]['operators'], 
-            protocol=protocol
-        )
-        df['location'] = location
-        data = pd.concat([data, df])
-    return data
+    if protocol != 'icmp':
+        raise ValueError(f'Unsupported protocol: {protocol}')
+    store = AnalyticsStore(location_conf, layout=store_layout)
+    return store.query(TraceType.PING, locations=locations)
 
 def plot_tech_breakdown_cdfs_in_a_row(
         df: pd.DataFrame,
@@ -1,13 +1,14 @@
 import os
 import pandas as pd
 import sys
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 from scripts.utilities.distance_utils import DistanceUtils
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
-from scripts.constants import XcalField, operator_color_map
+from scripts.constants import CommonField, XcalField, operator_color_map
+from scripts.utilities.analytics_store import AnalyticsStore, TraceType
 from scripts.alaska_starlink_trip.configs import ROOT_DIR as AL_DATASET_DIR
 from scripts.hawaii_starlink_trip.configs import ROOT_DIR as HI_DATASET_DIR
 
@@ -225,75 +226,41 @@ colors = ['#808080', '#326f21', '#86c84d', '#ffd700', '#ff9900', '#ff4500', '#ba
 tech_order = ['Unknown', 'NO SERVICE', 'LTE', 'LTE-A', '5G-low', '5G-mid', '5G-mmWave (28GHz)', '5G-mmWave (39GHz)']
 
 
-def read_xcal_tput_data(root_dir: str, operator: str, protocol: str = None, direction: str = None):
-    input_csv_path = os.path.join(root_dir, 'xcal/sizhe_new_data', f'{operator}_xcal_smart_tput.csv')
-    df = pd.read_csv(input_csv_path)
-    if protocol:
-        df = df[df[XcalField.APP_TPUT_PROTOCOL] == protocol]
-    if direction:
-        df = df[df[XcalField.APP_TPUT_DIRECTION] == direction]
-    return df
-
-def aggregate_xcal_tput_data(
-        root_dir: str, 
-        operators: List[str], 
-        protocol: str = None, 
-        direction: str = None, 
-    ):
-    data = pd.DataFrame()
-    for operator in operators:
-        df = read_xcal_tput_data(
-            root_dir=root_dir, 
-            operator=operator, 
-            protocol=protocol, 
-            direction=direction, 
-        )
-        df['operator'] = operator
-        data = pd.concat([data, df])
-    return data
+# per-operator CSVs of each location relative to its root_dir
+store_layout = {
+    TraceType.PING: 'ping/sizhe_new_data/{operator}_ping.csv',
+    TraceType.XCAL_TPUT: 'xcal/sizhe_new_data/{operator}_xcal_smart_tput.csv',
+}
 
 def aggregate_xcal_tput_data_by_location(
         locations: List[str], 
         location_conf: Dict[str, Dict],
         protocol: str = None, 
         direction: str = None, 
+        filters: Dict[str, Any] = None,
     ):
-    data = pd.DataFrame()
-    for location in locations:
-        conf = location_conf[location]
-        df = aggregate_xcal_tput_data(
-            root_dir=conf['root_dir'], 
-            operators=conf['operators'], 
-            protocol=protocol, 
-            direction=direction, 
-        )
-        df['location'] = location
-        data = pd.concat([data, df])
-    return data
+    """
+    :param filters: column -> value or list of values to keep, such as {CommonField.AREA_TYPE: 'rural'}
+    """
+    store = AnalyticsStore(location_conf, layout=store_layout)
+    return store.query(
+        TraceType.XCAL_TPUT,
+        locations=locations,
+        protocol=protocol,
+        direction=direction,
+        filters=filters,
+    )
 
 
-def read_latency_data(root_dir: str, operator: str):
-    latency_data_path = os.path.join(root_dir, 'ping/sizhe_new_data', f'{operator}_ping.csv')
-    if not os.path.exists(latency_data_path):
-        raise FileNotFoundError(f'Latency data file not found: {latency_data_path}')
-    return pd.read_csv(latency_data_path)
-
-def aggregate_operator_latency_data(root_dir: str, operators: List[str]):
-    df = pd.DataFrame()
-    for operator in operators:
-        latency_data = read_latency_data(root_dir, operator)
-        latency_data['operator'] = operator_conf[operator]['label']
-        df = pd.concat([df, latency_data], ignore_index=True)
-    return df
-
-def aggregate_latency_data_by_location(locations: List[str], location_conf: Dict[str, Dict]):
-    combined_data = pd.DataFrame()
-    for location in locations:
-        conf = location_conf[location]
-        latency_data = aggregate_operator_latency_data(conf['root_dir'], conf['operators'])
-        latency_data['location'] = location
-        combined_data = pd.concat([combined_data, latency_data], ignore_index=True)
-    return combined_data
+def aggregate_latency_data_by_location(
+        locations: List[str], 
+        location_conf: Dict[str, Dict],
+        filters: Dict[str, Any] = None,
+    ):
+    store = AnalyticsStore(location_conf, layout=store_layout)
+    data = store.query(TraceType.PING, locations=locations, filters=filters)
+    data[CommonField.OPERATOR] = data[CommonField.OPERATOR].map(lambda operator: operator_conf[operator]['label'])
+    return data
 
 
 def calculate_tech_coverage_in_miles(grouped_df: pd.DataFrame) -> Tuple[dict, float]:
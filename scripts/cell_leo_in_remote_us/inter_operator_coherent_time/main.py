@@ -1,6 +1,6 @@
 import sys
 import os
-from typing import Dict
+from typing import Dict, List
 
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -11,6 +11,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 
 from scripts.constants import CommonField
 from scripts.logging_utils import create_logger
+from scripts.utilities.FusedTraceLoader import FusedTraceLoader
+from scripts.utilities.list_utils import find_consecutive_runs
 from scripts.cell_leo_in_remote_us.common import location_conf, operator_conf, cellular_location_conf, style_confs, threshold_confs
 
 current_dir = os.path.abspath(os.path.dirname(__file__))
@@ -30,14 +32,13 @@ class InterOperatorCoherentTime:
         self.data_field = data_field
         self.time_field = time_field
         self.run_time_field = run_time_field
+        self.trace_loader = FusedTraceLoader(base_dir)
 
     def read_mptcp_trace(self, operator_a: str, operator_b: str, trace_type: str):
-        mptcp_trace_path = self.get_mptcp_trace_path(operator_a, operator_b, trace_type)
-        df = pd.read_csv(mptcp_trace_path)
-        return df
+        return self.trace_loader.read_mptcp_trace(operator_a, operator_b, trace_type)
     
     def get_mptcp_trace_path(self, operator_a: str, operator_b: str, trace_type: str):
-        return os.path.join(self.base_dir, f'mptcp_trace.{trace_type}.{operator_a}_{operator_b}.csv')
+        return self.trace_loader.get_mptcp_trace_path(operator_a, operator_b, trace_type)
     
     def save_mptcp_trace(self, df: pd.DataFrame, operator_a: str, operator_b: str, trace_type: str):
         mptcp_trace_path = self.get_mptcp_trace_path(operator_a, operator_b, trace_type)
@@ -54,14 +55,131 @@ class InterOperatorCoherentTime:
             threshold: float,
         ):
         # Use Operator A as the reference
-        df_grouped_by_run_time = mptcp_df.groupby(f'A_{self.run_time_field}')
-        res = []
-        for _, df_group in df_grouped_by_run_time:
-            coherent_groups = self.get_coherent_time_above_threshold_of_two_operators(df_group, threshold)
-            coherent_durations = self.get_coherent_time_durations(coherent_groups)
-            res.extend(coherent_durations)
-            # print(f'run_time: {run_time}, coherent_durations: {coherent_durations}')
-        return res
+        diff, times_s, run_codes = self.prepare_coherent_time_arrays(mptcp_df)
+        return self.get_coherent_time_durations_of_runs(diff, times_s, run_codes, threshold)
+
+    def calculate_coherent_time_for_thresholds(
+            self,
+            mptcp_df: pd.DataFrame,
+            thresholds: List[float],
+        ) -> Dict[float, list]:
+        """
+        Sweep coherent time durations over many thresholds in one pass over the trace.
+        Thresholds are visited from the highest to the lowest, so the runs above the threshold only grow and merge:
+        each sample joins its runs once, and each threshold only reads off the current runs.
+        Returns a dict mapping each threshold to its list of durations in seconds, in the order of
+        get_coherent_time_durations_of_runs.
+        """
+        diff, times_s, run_codes = self.prepare_coherent_time_arrays(mptcp_df)
+        descending_thresholds = sorted(set(thresholds), reverse=True)
+        pos_runs = self.sweep_runs_above_thresholds(diff, times_s, run_codes, descending_thresholds)
+        neg_runs = self.sweep_runs_above_thresholds(-diff, times_s, run_codes, descending_thresholds)
+
+        duration_map = {}
+        for threshold in thresholds:
+            pos_starts, pos_durations = pos_runs[threshold]
+            neg_starts, neg_durations = neg_runs[threshold]
+            starts = np.concatenate((pos_starts, neg_starts))
+            durations = np.concatenate((pos_durations, neg_durations))
+            signs = np.concatenate((np.zeros(len(pos_starts), dtype=int), np.ones(len(neg_starts), dtype=int)))
+
+            order = np.lexsort((starts, signs, run_codes[starts]))
+            duration_map[threshold] = durations[order].tolist()
+        return duration_map
+
+    def sweep_runs_above_thresholds(
+            self,
+            values: np.ndarray,
+            times_s: np.ndarray,
+            run_codes: np.ndarray,
+            descending_thresholds: List[float],
+        ) -> Dict[float, tuple]:
+        """
+        Runs of consecutive values >= threshold within each run time, for thresholds sorted from high to low.
+        Samples are activated in descending order of value; at each threshold the newly activated samples are merged
+        into the runs of the previous threshold, so the cost is the number of runs plus new samples, not the trace length.
+        Returns a dict mapping each threshold to (run starts, run durations in seconds), sorted by start.
+        """
+        # NaN values sort last and never reach a threshold
+        order = np.argsort(-values, kind='stable')
+        sorted_values = -values[order]
+        starts = ends = np.array([], dtype=int)
+        min_times = max_times = np.array([], dtype=float)
+
+        runs_by_threshold = {}
+        activated = 0
+        for threshold in descending_thresholds:
+            # values are sorted descending, so the new samples are a prefix of the remaining ones
+            next_activated = np.searchsorted(sorted_values, -threshold, side='right')
+            if next_activated > activated:
+                new_positions = np.sort(order[activated:next_activated])
+                activated = next_activated
+
+                # disjoint runs and new single-sample runs, ordered by start
+                starts = np.concatenate((starts, new_positions))
+                ends = np.concatenate((ends, new_positions))
+                min_times = np.concatenate((min_times, times_s[new_positions]))
+                max_times = np.concatenate((max_times, times_s[new_positions]))
+                by_start = np.argsort(starts, kind='stable')
+                starts, ends = starts[by_start], ends[by_start]
+                min_times, max_times = min_times[by_start], max_times[by_start]
+
+                # a run continues the previous one when they touch within the same run time
+                joins_previous = (starts[1:] == ends[:-1] + 1) & (run_codes[starts[1:]] == run_codes[ends[:-1]])
+                first_runs = np.flatnonzero(np.concatenate(([True], ~joins_previous)))
+                last_runs = np.concatenate((first_runs[1:], [len(starts)])) - 1
+                min_times = np.minimum.reduceat(min_times, first_runs)
+                max_times = np.maximum.reduceat(max_times, first_runs)
+                starts, ends = starts[first_runs], ends[last_runs]
+            runs_by_threshold[threshold] = (starts, max_times - min_times)
+        return runs_by_threshold
+
+    def prepare_coherent_time_arrays(self, mptcp_df: pd.DataFrame):
+        """
+        Convert the trace into numpy arrays once, ordered by the run time of Operator A.
+        Returns (diff values, time in seconds, run time codes); rows without a run time are dropped like groupby does.
+        """
+        run_codes, _ = pd.factorize(mptcp_df[f'A_{self.run_time_field}'], sort=True)
+        order = np.argsort(run_codes, kind='stable')
+        order = order[run_codes[order] >= 0]
+
+        times = pd.to_datetime(mptcp_df[f'A_{self.time_field}'])
+        times_s = (times - times.min()).dt.total_seconds().to_numpy()
+        diff = mptcp_df[f'diff_{self.data_field}'].to_numpy(dtype=float)
+        return diff[order], times_s[order], run_codes[order]
+
+    def get_coherent_time_durations_of_runs(
+            self,
+            diff: np.ndarray,
+            times_s: np.ndarray,
+            run_codes: np.ndarray,
+            threshold: float,
+        ) -> list:
+        """
+        Find the coherent runs above the threshold within each run time and return their durations in seconds,
+        in the same order as the per-group implementation (positive runs first, then negative runs, per run time)
+        """
+        pos_starts, pos_ends = find_consecutive_runs(diff >= threshold, run_codes)
+        neg_starts, neg_ends = find_consecutive_runs(diff <= -threshold, run_codes)
+        starts = np.concatenate((pos_starts, neg_starts))
+        ends = np.concatenate((pos_ends, neg_ends))
+        signs = np.concatenate((np.zeros(len(pos_starts), dtype=int), np.ones(len(neg_starts), dtype=int)))
+
+        order = np.lexsort((starts, signs, run_codes[starts]))
+        return self.get_run_durations(times_s, starts[order], ends[order]).tolist()
+
+    def get_run_durations(self, times_s: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Max minus min of the time within each run [start, end], without materializing sub-frames
+        """
+        if len(starts) == 0:
+            return np.array([], dtype=float)
+        # the sentinel keeps every reduceat index in bounds
+        times_ext = np.append(times_s, times_s[-1])
+        indices = np.column_stack((starts, ends + 1)).ravel()
+        max_times = np.maximum.reduceat(times_ext, indices)[::2]
+        min_times = np.minimum.reduceat(times_ext, indices)[::2]
+        return max_times - min_times
 
 
     def get_coherent_time_above_threshold_of_two_operators(self, df: pd.DataFrame, threshold: float):
@@ -287,46 +405,42 @@ def main():
         mptcp_dir = os.path.join(loc_conf['root_dir'], 'mptcp')
         
         for trace_type in ['tcp_downlink', 'tcp_uplink']:
-            trace_conf = trace_type_conf[trace_type]
-            coherent_time_duration_map = {}
-            for threshold in trace_conf['values']:
-                coherent_time_duration_map[threshold] = []
-                operators = loc_conf['operators']
-                for i in range(len(operators) - 1):
-                    for j in range(i+1, len(operators)):
-                        operator_a = operators[i]
-                        operator_b = operators[j]
-
-                        coherent_time_tool = InterOperatorCoherentTime(
-                            base_dir=mptcp_dir,
-                            data_field=CommonField.TPUT_MBPS,
-                            time_field=CommonField.TIME,
-                            run_time_field='run_time',
-                        )
-                        mptcp_df = coherent_time_tool.read_mptcp_trace(operator_a, operator_b, trace_type)
-                        logger.info(f'read mptcp trace from {operator_a} and {operator_b} for {trace_type}, {len(mptcp_df)} rows')
-                        mptcp_df = coherent_time_tool.attach_diff_data_to_df(mptcp_df)
-
-                        # Plot CDF of difference data
-                        diff_data_cdf_filename = os.path.join(output_dir, f'diff_tput_cdf.{location}.{trace_type}.{operator_a}_{operator_b}.pdf')
-                        plot_diff_data_cdf(
-                            mptcp_df=mptcp_df,
-                            data_field=CommonField.TPUT_MBPS,
-                            title=f'{location} {trace_type} {operator_a}-{operator_b}',
-                            output_filename=diff_data_cdf_filename,
-                        )
-                        
-                        # Plot distribution of difference data
-                        diff_data_dist_filename = os.path.join(output_dir, f'diff_tput_dist.{location}.{trace_type}.{operator_a}_{operator_b}.pdf')
-                        plot_diff_data_distribution(
-                            mptcp_df=mptcp_df,
-                            data_field=CommonField.TPUT_MBPS,
-                            title=f'{location} {trace_type} {operator_a}-{operator_b}',
-                            output_filename=diff_data_dist_filename,
-                        )
-
-                        coherent_time_tool.save_mptcp_trace(mptcp_df, operator_a, operator_b, trace_type)
-                        logger.info(f'saved diff tput distribution to {diff_data_dist_filename}')
+            operators = loc_conf['operators']
+            for i in range(len(operators) - 1):
+                for j in range(i+1, len(operators)):
+                    operator_a = operators[i]
+                    operator_b = operators[j]
+
+                    coherent_time_tool = InterOperatorCoherentTime(
+                        base_dir=mptcp_dir,
+                        data_field=CommonField.TPUT_MBPS,
+                        time_field=CommonField.TIME,
+                        run_time_field='run_time',
+                    )
+                    mptcp_df = coherent_time_tool.read_mptcp_trace(operator_a, operator_b, trace_type)
+                    logger.info(f'read mptcp trace from {operator_a} and {operator_b} for {trace_type}, {len(mptcp_df)} rows')
+                    mptcp_df = coherent_time_tool.attach_diff_data_to_df(mptcp_df)
+
+                    # Plot CDF of difference data
+                    diff_data_cdf_filename = os.path.join(output_dir, f'diff_tput_cdf.{location}.{trace_type}.{operator_a}_{operator_b}.pdf')
+                    plot_diff_data_cdf(
+                        mptcp_df=mptcp_df,
+                        data_field=CommonField.TPUT_MBPS,
+                        title=f'{location} {trace_type} {operator_a}-{operator_b}',
+                        output_filename=diff_data_cdf_filename,
+                    )
+                    
+                    # Plot distribution of difference data
+                    diff_data_dist_filename = os.path.join(output_dir, f'diff_tput_dist.{location}.{trace_type}.{operator_a}_{operator_b}.pdf')
+                    plot_diff_data_distribution(
+                        mptcp_df=mptcp_df,
+                        data_field=CommonField.TPUT_MBPS,
+                        title=f'{location} {trace_type} {operator_a}-{operator_b}',
+                        output_filename=diff_data_dist_filename,
+                    )
+
+                    coherent_time_tool.save_mptcp_trace(mptcp_df, operator_a, operator_b, trace_type)
+                    logger.info(f'saved diff tput distribution to {diff_data_dist_filename}')
 
     
     # Plot coherent time distribution for Starlink - Cellular pairs
@@ -337,36 +451,35 @@ def main():
         
         for trace_type in ['tcp_downlink', 'tcp_uplink']:
             trace_conf = trace_type_conf[trace_type]
-            coherent_time_duration_map = {}
-
-            for threshold in trace_conf['values']:
-                coherent_time_duration_map[threshold] = []
-                coherent_time_map_keyed_by_operator_pair = {}
+            thresholds = trace_conf['values']
+            coherent_time_duration_map = {threshold: [] for threshold in thresholds}
+            coherent_time_map_keyed_by_threshold = {threshold: {} for threshold in thresholds}
 
-                for cellular_operator in cellular_operators:
-                    operator_a = 'starlink'
-                    operator_b = cellular_operator
+            for cellular_operator in cellular_operators:
+                operator_a = 'starlink'
+                operator_b = cellular_operator
 
-                    logger.info(f'calculating coherent durations above threshold: {threshold} Mbps for {operator_a} - {operator_b}')
+                logger.info(f'calculating coherent durations above thresholds: {thresholds} Mbps for {operator_a} - {operator_b}')
 
-                    coherent_time_tool = InterOperatorCoherentTime(
-                        base_dir=mptcp_dir,
-                        data_field=CommonField.TPUT_MBPS,
-                        time_field=CommonField.TIME,
-                        run_time_field='run_time',
-                    )
-                    mptcp_df = coherent_time_tool.read_mptcp_trace(operator_a, operator_b, trace_type)
-                    durations = coherent_time_tool.calculate_coherent_time_above_threshold_of_two_operators(
-                        mptcp_df=mptcp_df,
-                        threshold=threshold,
-                    )
+                coherent_time_tool = InterOperatorCoherentTime(
+                    base_dir=mptcp_dir,
+                    data_field=CommonField.TPUT_MBPS,
+                    time_field=CommonField.TIME,
+                    run_time_field='run_time',
+                )
+                mptcp_df = coherent_time_tool.read_mptcp_trace(operator_a, operator_b, trace_type)
+                duration_map = coherent_time_tool.calculate_coherent_time_for_thresholds(
+                    mptcp_df=mptcp_df,
+                    thresholds=thresholds,
+                )
+                for threshold, durations in duration_map.items():
                     coherent_time_duration_map[threshold].extend(durations)
-                    logger.info(f'completed calculating coherent time durations above threshold: {threshold} Mbps')
-
-                    coherent_time_map_keyed_by_operator_pair[f'{operator_a}_{operator_b}'] = durations
+                    coherent_time_map_keyed_by_threshold[threshold][f'{operator_a}_{operator_b}'] = durations
+                logger.info(f'completed calculating coherent time durations above thresholds: {thresholds} Mbps')
 
+            for threshold in thresholds:
                 plot_coherent_time_cdf_for_one_threshold_and_multiple_operators(
-                    coherent_time_duration_map=coherent_time_map_keyed_by_operator_pair,
+                    coherent_time_duration_map=coherent_time_map_keyed_by_threshold[threshold],
                     title=f'{trace_type} {operator_a}-{operator_b} threshold: {threshold} Mbps',
                     output_filename=os.path.join(output_dir, f'coherent_time.{location}.{trace_type}.{operator_a}_{operator_b}.threshold_{threshold}mbps.pdf'),
                 )
@@ -111,5 +111,94 @@ class TestInterOperatorCoherentTime(unittest.TestCase):
         self.assertEqual(durations[0], 2)  # First group spans 2 seconds (0 to 2)
         self.assertEqual(durations[1], 2)  # Second group spans 2 seconds (10 to 12)
 
+class TestInterOperatorCoherentTimeVectorized(unittest.TestCase):
+    def setUp(self):
+        self.coherent_time = InterOperatorCoherentTime(
+            base_dir="dummy_dir",
+            data_field="throughput",
+            time_field="timestamp",
+            run_time_field="run_time",
+        )
+
+    def test_calculate_coherent_time_by_run_time(self):
+        data = {
+            'A_throughput': [10, 10, 10, 2, 2, 8, 8, 2, 2],
+            'B_throughput': [2, 2, 2, 10, 10, 2, 2, 10, 10],
+            'A_timestamp': ['2023-01-01T00:00:00', '2023-01-01T00:00:01', '2023-01-01T00:00:03',
+                            '2023-01-01T00:00:04', '2023-01-01T00:00:05', '2023-01-01T00:10:00',
+                            '2023-01-01T00:10:02', '2023-01-01T00:10:03', '2023-01-01T00:10:07'],
+            'A_run_time': ['run_1', 'run_1', 'run_1', 'run_1', 'run_1', 'run_2', 'run_2', 'run_2', 'run_2'],
+        }
+        df = pd.DataFrame(data)
+        df['diff_throughput'] = df['A_throughput'] - df['B_throughput']
+
+        durations = self.coherent_time.calculate_coherent_time_above_threshold_of_two_operators(df, threshold=5)
+
+        # run_1: positive run 0-3s, negative run 4-5s; run_2: positive run 0-2s, negative run 3-7s
+        self.assertEqual(durations, [3, 1, 2, 4])
+
+    def test_runs_do_not_cross_run_time(self):
+        data = {
+            'A_throughput': [10, 10, 10, 10],
+            'B_throughput': [2, 2, 2, 2],
+            'A_timestamp': ['2023-01-01T00:00:00', '2023-01-01T00:00:01',
+                            '2023-01-01T00:00:05', '2023-01-01T00:00:06'],
+            'A_run_time': ['run_1', 'run_1', 'run_2', 'run_2'],
+        }
+        df = pd.DataFrame(data)
+        df['diff_throughput'] = df['A_throughput'] - df['B_throughput']
+
+        durations = self.coherent_time.calculate_coherent_time_above_threshold_of_two_operators(df, threshold=5)
+        self.assertEqual(durations, [1, 1])
+
+    def test_calculate_coherent_time_for_thresholds(self):
+        data = {
+            'A_throughput': [60, 60, 20, 20, 2, 2],
+            'B_throughput': [2, 2, 2, 2, 2, 2],
+            'A_timestamp': ['2023-01-01T00:00:00', '2023-01-01T00:00:02', '2023-01-01T00:00:03',
+                            '2023-01-01T00:00:06', '2023-01-01T00:00:07', '2023-01-01T00:00:08'],
+            'A_run_time': ['run_1'] * 6,
+        }
+        df = pd.DataFrame(data)
+        df['diff_throughput'] = df['A_throughput'] - df['B_throughput']
+
+        thresholds = [0, 10, 50]
+        duration_map = self.coherent_time.calculate_coherent_time_for_thresholds(df, thresholds)
+
+        self.assertEqual(list(duration_map.keys()), thresholds)
+        # diff == 0 counts for both signs at threshold 0
+        self.assertEqual(duration_map[0], [8, 1])
+        self.assertEqual(duration_map[10], [6])
+        self.assertEqual(duration_map[50], [2])
+        for threshold in thresholds:
+            self.assertEqual(
+                duration_map[threshold],
+                self.coherent_time.calculate_coherent_time_above_threshold_of_two_operators(df, threshold),
+            )
+
+    def test_threshold_sweep_matches_per_threshold_masks(self):
+        rng = np.random.default_rng(0)
+        n = 500
+        timestamps = pd.Timestamp('2023-01-01') + pd.to_timedelta(np.sort(rng.uniform(0, 3600, n)), unit='s')
+        df = pd.DataFrame({
+            # integer throughput gives many ties with the thresholds
+            'A_throughput': rng.integers(0, 60, n).astype(float),
+            'B_throughput': rng.integers(0, 60, n).astype(float),
+            'A_timestamp': timestamps.strftime('%Y-%m-%dT%H:%M:%S.%f'),
+            'A_run_time': rng.choice(['run_1', 'run_2', 'run_3', None], n),
+        })
+        df.loc[rng.choice(n, 20, replace=False), 'A_throughput'] = np.nan
+        df['diff_throughput'] = df['A_throughput'] - df['B_throughput']
+
+        thresholds = [10, 0, 50, 5, -5, 100]
+        duration_map = self.coherent_time.calculate_coherent_time_for_thresholds(df, thresholds)
+        self.assertEqual(list(duration_map.keys()), thresholds)
+        for threshold in thresholds:
+            self.assertEqual(
+                duration_map[threshold],
+                self.coherent_time.calculate_coherent_time_above_threshold_of_two_operators(df, threshold),
+            )
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -10,6 +10,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 
 from scripts.cell_leo_in_remote_us.common import location_conf, operator_conf, cellular_location_conf
 from scripts.constants import CommonField
+from scripts.utilities.FusedTraceLoader import FusedTraceLoader
+from scripts.utilities.multipath_utils import MultipathScheduler, attach_multipath_columns, collect_multipath_series
 
 def read_throughput_data_for_all_operators(
     base_dir: str,
@@ -29,14 +31,14 @@ def read_mptcp_tput_data_from_two_operators(
     protocol: str,
     direction: str,
 ):
-    return pd.read_csv(os.path.join(base_dir, f'fused_trace.{protocol}_{direction}.{operator_a}_{operator_b}.csv'))
+    return FusedTraceLoader(base_dir).read_fused_trace(operator_a, operator_b, f'{protocol}_{direction}')
 
 def read_mptcp_ping_data_from_two_operators(
     base_dir: str,
     operator_a: str,
     operator_b: str,
 ):
-    return pd.read_csv(os.path.join(base_dir, f'fused_trace.ping.{operator_a}_{operator_b}.csv'))
+    return FusedTraceLoader(base_dir).read_fused_trace(operator_a, operator_b, 'ping')
 
 
 def read_ping_data_for_all_operators(
@@ -129,14 +131,24 @@ def read_mptcp_ping_data_with_all_operators(
     return mptcp_dfs
 
 def generate_max_and_sum_tput_trace_of_two_operators(df: pd.DataFrame):
-    df['max_tput'] = df.apply(lambda row: max(row[f'A_{CommonField.TPUT_MBPS}'], row[f'B_{CommonField.TPUT_MBPS}']), axis=1)
-    df['sum_tput'] = df.apply(lambda row: sum([row[f'A_{CommonField.TPUT_MBPS}'], row[f'B_{CommonField.TPUT_MBPS}']]), axis=1)
-    return df
+    return attach_multipath_columns(
+        df,
+        data_field=CommonField.TPUT_MBPS,
+        column_scheduler_map={
+            'max_tput': MultipathScheduler.MAX,
+            'sum_tput': MultipathScheduler.SUM,
+        },
+    )
 
 
 def generate_min_ping_trace_of_two_operators(df: pd.DataFrame):
-    df['min_rtt'] = df.apply(lambda row: min(row[f'A_{CommonField.RTT_MS}'], row[f'B_{CommonField.RTT_MS}']), axis=1)
-    return df
+    return attach_multipath_columns(
+        df,
+        data_field=CommonField.RTT_MS,
+        column_scheduler_map={
+            'min_rtt': MultipathScheduler.MIN,
+        },
+    )
 
 mptcp_operator_conf = {
     'starlink': {
@@ -249,9 +261,9 @@ def plot_mptcp_boxplots_for_tput(
     labels2 = []
     colors2 = []
     hatchs2 = []
-    for operator, df in mptcp_dfs.items():
+    for operator, values in collect_multipath_series(mptcp_dfs, 'max_tput').items():
         op_conf = mptcp_operator_conf[operator]
-        data2.append(df['max_tput'])
+        data2.append(values)
         labels2.append(op_conf['label'])
         colors2.append(op_conf['color'])
         hatchs2.append(op_conf['hatch'])
@@ -280,9 +292,9 @@ def plot_mptcp_boxplots_for_tput(
     labels3 = []
     colors3 = []
     hatchs3 = []
-    for operator, df in mptcp_dfs.items():
+    for operator, values in collect_multipath_series(mptcp_dfs, 'sum_tput').items():
         op_conf = mptcp_operator_conf[operator]
-        data3.append(df['sum_tput'])
+        data3.append(values)
         labels3.append(op_conf['label'])
         colors3.append(op_conf['color'])
         hatchs3.append(op_conf['hatch'])
@@ -359,8 +371,8 @@ def plot_mptcp_boxplots_for_rtt(
     data2 = []
     labels2 = []
     colors2 = []
-    for operator, df in mptcp_dfs.items():
-        data2.append(df['min_rtt'])
+    for operator, values in collect_multipath_series(mptcp_dfs, 'min_rtt').items():
+        data2.append(values)
         labels2.append(mptcp_operator_conf[operator]['label'])
         colors2.append(mptcp_operator_conf[operator]['color'])
     
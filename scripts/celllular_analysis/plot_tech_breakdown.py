@@ -5,13 +5,15 @@ from matplotlib import pyplot as plt
 import numpy as np
 import pandas as pd
 import sys
-from typing import Callable, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Tuple
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 from scripts.utilities.distance_utils import DistanceUtils
 from scripts.celllular_analysis.TechBreakdown import Segment, TechBreakdown
 from scripts.utilities.list_utils import replace_with_elements
+from scripts.utilities.analytics_store import AnalyticsStore, TraceType
+from scripts.utilities.plot_scheduler import PlotScheduler
 from scripts.constants import CommonField, XcalField, XcallHandoverEvent
 from scripts.logging_utils import create_logger
 from scripts.alaska_starlink_trip.configs import ROOT_DIR as AL_DATASET_DIR
@@ -772,102 +774,51 @@ tech_conf = {
     }
 }
 
-def read_xcal_tput_data(root_dir: str, operator: str, protocol: str = None, direction: str = None):
-    # input_csv_path = os.path.join(root_dir, 'xcal', f'{operator}_xcal_smart_tput.csv')
-    input_csv_path = os.path.join(root_dir, 'xcal/alaska_sizhe_new_data', f'{operator}_xcal_smart_tput.csv')
-    df = pd.read_csv(input_csv_path)
-    if protocol:
-        df = df[df[XcalField.APP_TPUT_PROTOCOL] == protocol]
-    if direction:
-        df = df[df[XcalField.APP_TPUT_DIRECTION] == direction]
-    return df
-
-def aggregate_xcal_tput_data(
-        root_dir: str, 
-        operators: List[str], 
-        protocol: str = None, 
-        direction: str = None, 
-    ):
-    data = pd.DataFrame()
-    for operator in operators:
-        df = read_xcal_tput_data(
-            root_dir=root_dir, 
-            operator=operator, 
-            protocol=protocol, 
-            direction=direction, 
-        )
-        df['operator'] = operator
-        data = pd.concat([data, df])
-    return data
+# per-operator CSVs of each location relative to its root_dir
+store_layout = {
+    # TraceType.XCAL_TPUT: 'xcal/{operator}_xcal_smart_tput.csv',
+    TraceType.XCAL_TPUT: 'xcal/alaska_sizhe_new_data/{operator}_xcal_smart_tput.csv',
+    TraceType.PING: 'ping/{operator}_ping_with_tech.csv',
+}
 
 def aggregate_xcal_tput_data_by_location(
         locations: List[str], 
         protocol: str = None, 
         direction: str = None, 
-
+        filters: Dict[str, Any] = None,
     ):
-    data = pd.DataFrame()
-    for location in locations:
-        conf = location_conf[location]
-        df = aggregate_xcal_tput_data(
-            root_dir=conf['root_dir'], 
-            operators=conf['operators'], 
-            protocol=protocol, 
-            direction=direction, 
-        )
-        df['location'] = location
-        data = pd.concat([data, df])
-    return data
-
-
-def read_latency_data(root_dir: str, operator: str, protocol: str = 'icmp'):
-    if protocol == 'icmp':
-        input_csv_path = os.path.join(root_dir, 'ping', f'{operator}_ping_with_tech.csv')
-    else:
-        raise ValueError(f'Unsupported protocol: {protocol}')
-
-    df = pd.read_csv(input_csv_path)
-    return df
+    """
+    :param filters: column -> value or list of values to keep, such as {XcalField.ACTUAL_TECH: ['LTE', 'LTE-A']}
+    """
+    store = AnalyticsStore(location_conf, layout=store_layout)
+    return store.query(
+        TraceType.XCAL_TPUT,
+        locations=locations,
+        protocol=protocol,
+        direction=direction,
+        filters=filters,
+    )
 
-def aggregate_latency_data_by_operator(
-        root_dir: str,
-        operators: List[str], 
-        protocol: str = 'icmp',
-    ):
-    data = pd.DataFrame()
-    for operator in operators:
-        df = read_latency_data(
-            root_dir=root_dir, 
-            operator=operator, 
-            protocol=protocol
-        )
-        df['operator'] = operator
-        data = pd.concat([data, df])
-    return data
 
 def aggregate_latency_data_by_location(
         locations: List[str], 
         protocol: str = 'icmp',
+        filters: Dict[str, Any] = None,
     ):
     """Aggregate latency data from multiple locations.
     
     Args:
         locations (List[str]): List of locations to process
         protocol (str): Protocol used for latency measurements
+        filters (Dict[str, Any]): column -> value or list of values to keep
         
     Returns:
         pd.DataFrame: Combined DataFrame with latency data
     """
-    data = pd.DataFrame()
-    for location in locations:
-        df = aggregate_latency_data_by_operator(
-            root_dir=location_conf[location]['root_dir'],
-            operators=location_conf[location]['operators'], 
-            protocol=protocol
-        )
-        df['location'] = location
-        data = pd.concat([data, df])
-    return data
+    if protocol != 'icmp':
+        raise ValueError(f'Unsupported protocol: {protocol}')
+    store = AnalyticsStore(location_conf, layout=store_layout)
+    return store.query(TraceType.PING, locations=locations, filters=filters)
 
 def plot_metric_grid(
         data: Dict[str, pd.DataFrame],
@@ -1235,7 +1186,13 @@ def main():
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    plot_tput_tech_breakdown_by_area_by_operator(
+    # xcal frames are loaded once here and shared by the forked plot workers
+    AnalyticsStore(location_conf, layout=store_layout).preload(TraceType.XCAL_TPUT, locations=['alaska'])
+
+    scheduler = PlotScheduler(logger=logger)
+    scheduler.add(
+        'tcp_downlink_tech_breakdown',
+        plot_tput_tech_breakdown_by_area_by_operator,
         # locations=['alaska', 'hawaii'],
         locations=['alaska'],
         protocol='tcp',
@@ -1245,7 +1202,9 @@ def main():
         output_dir=output_dir,
     )
 
-    # plot_tput_tech_breakdown_by_area_by_operator(
+    # scheduler.add(
+    #     'tcp_uplink_tech_breakdown',
+    #     plot_tput_tech_breakdown_by_area_by_operator,
     #     locations=['alaska', 'hawaii'],
     #     protocol='tcp',
     #     direction='uplink',
@@ -1253,12 +1212,15 @@ def main():
     #     data_sample_threshold=480, # 2 rounds data (~4min)
     # )
 
-    # plot_latency_tech_breakdown_by_area_by_operator(
+    # scheduler.add(
+    #     'latency_tech_breakdown',
+    #     plot_latency_tech_breakdown_by_area_by_operator,
     #     locations=['alaska', 'hawaii'],
     #     protocol='icmp',
     #     # max_xlim=100,
     #     # data_sample_threshold=480, # 2 rounds data (~4min)
     # )
+    scheduler.run()
 
     # for location in ['alaska', 'hawaii']:
     #     logger.info(f'-- Processing dataset: {location}')
@@ -13,7 +13,8 @@ from scripts.hawaii_starlink_trip.labels import DatasetLabel
 from scripts.hawaii_starlink_trip.separate_dataset import read_dataset
 from scripts.hawaii_starlink_trip.configs import ROOT_DIR, TIMEZONE
 from scripts.constants import DATASET_DIR, CommonField, XcalField
-from scripts.utilities.xcal_processing_utils import collect_periods_of_ping_measurements, collect_periods_of_tput_measurements, filter_xcal_logs, read_daily_xcal_data
+from scripts.utilities.period_index import PeriodIndex
+from scripts.utilities.xcal_processing_utils import filter_xcal_logs, read_daily_xcal_data
 
 
 tmp_dir = os.path.join(ROOT_DIR, 'tmp')
@@ -46,12 +47,8 @@ def save_extracted_periods_as_csv(periods: list[tuple[datetime, datetime, str]],
     df = pd.DataFrame(periods, columns=['start_time', 'end_time', 'protocol_direction'])
     df.to_csv(output_file_path, index=False)
 
-def get_ping_periods(dir_list: list[str]) -> list[tuple[datetime, datetime, str]]:
-    all_ping_periods = []
-    for dir in dir_list:
-        periods_of_ping = collect_periods_of_ping_measurements(base_dir=dir)
-        all_ping_periods.extend(periods_of_ping)
-    return all_ping_periods
+def get_ping_periods(period_index: PeriodIndex, dir_list: list[str], operator: str | None = None) -> list[tuple[datetime, datetime, str]]:
+    return period_index.get_ping_periods(dir_list, operator=operator)
 
 def fuse_rtt_into_xcal_logs(df_xcal_all_logs: pd.DataFrame, df_rtt: pd.DataFrame) -> pd.DataFrame:
     """Fuse RTT data into XCAL logs based on timestamp order.
@@ -101,7 +98,8 @@ def append_tech_to_rtt_data(operator: str, location: str, output_dir: str):
         all_dates.add(date)
     
     logger.info("--Stage 1: extract ping periods")
-    all_ping_periods = get_ping_periods(dir_list=dir_list)
+    period_index = PeriodIndex(index_path=path.join(ROOT_DIR, 'tmp', 'period_index.pkl'))
+    all_ping_periods = get_ping_periods(period_index, dir_list=dir_list, operator=operator)
     logger.info(f"collected {len(all_ping_periods)} periods of ping measurements")
     
     logger.info("-- Stage 2: read all xcal logs related to one location")
@@ -150,7 +148,10 @@ def append_tech_to_rtt_data(operator: str, location: str, output_dir: str):
     try:
         filtered_df = filter_xcal_logs(
             fused_xcal_all_logs_df, 
-            periods=all_ping_periods, 
+            period_index=period_index,
+            run_dirs=dir_list,
+            operator=operator,
+            trace_types=['icmp_uplink'],
             xcal_timezone='US/Eastern'
         )
         output_csv_path = path.join(output_dir, f'{operator}_xcal_raw_logs_with_rtt.csv')
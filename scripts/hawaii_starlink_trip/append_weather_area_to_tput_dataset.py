@@ -95,12 +95,10 @@ def main():
     logger.info(f'Loading area data from {area_csv_path}')
     
     weather_df = pd.read_csv(weather_csv_path)
-    weather_df[CommonField.LOCAL_DT] = pd.to_datetime(weather_df[CommonField.LOCAL_DT], format="ISO8601")
-    weather_query_util = TypeIntervalQueryUtil(weather_df[[CommonField.LOCAL_DT, 'value']].values.tolist())
+    weather_query_util = TypeIntervalQueryUtil.from_df(weather_df, time_field=CommonField.LOCAL_DT)
 
     area_df = pd.read_csv(area_csv_path)
-    area_df[CommonField.LOCAL_DT] = pd.to_datetime(area_df[CommonField.LOCAL_DT], format="ISO8601")
-    area_query_util = TypeIntervalQueryUtil(area_df[[CommonField.LOCAL_DT, 'value']].values.tolist())
+    area_query_util = TypeIntervalQueryUtil.from_df(area_df, time_field=CommonField.LOCAL_DT)
 
     append_weather_area_to_app_tput_traces(
         tput_dir=tput_dir, 
@@ -1,53 +1,109 @@
+import argparse
 import os
 import sys
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 from separate_dataset import main as separate_dataset_main
-
 from parse_nuttcp_data_to_csv import main as parse_nuttcp_data_to_csv_main
 from parse_iperf_data_to_csv import main as parse_iperf_data_to_csv_main
 from parse_weather_area_data_to_csv import main as parse_weather_area_data_to_csv_main
-from append_weather_area_to_tput_dataset import main as append_weather_area_to_tput_dataset_main
 from parse_ping_result_to_csv import main as parse_ping_result_to_csv_main
 from parse_traceroute_data_to_csv import main as parse_traceroute_data_to_csv_main
 from parse_nslookup_data_to_csv import main as parse_nslookup_data_to_csv_main
 from parse_xcal_tput_to_csv import main as parse_xcal_tput_to_csv_main
-from calibrate_weather_area_data import main as calibrate_weather_area_data_main
 from append_tech_to_latency_dataset import main as append_tech_to_latency_dataset_main
+from append_weather_area_to_tput_dataset import main as append_weather_area_to_tput_dataset_main
 from append_weather_area_to_latency_dataset import main as append_weather_area_to_latency_dataset_main
+from calibrate_weather_area_data import main as calibrate_weather_area_data_main
 
 from plot_cdf_throughput import main as plot_cdf_throughput_main
 from plot_rtt_from_csv import main as plot_rtt_from_csv_main
 from plot_traceroute import main as plot_traceroute_main
 
+from scripts.hawaii_starlink_trip.configs import ROOT_DIR
+from scripts.constants import DATASET_DIR
+from scripts.logging_utils import create_logger
+from scripts.utilities.pipeline_runner import PipelineNode, PipelineRunner
+
+
+def data(*paths: str) -> str:
+    return os.path.join(ROOT_DIR, *paths)
+
+
+RAW_LOGS = data('raw/*/**/*.out')
+DATASETS = data('tmp/*_datasets.json')
+TPUT_DIRS = [data('throughput'), data('throughput_cubic'), data('throughput_bbr')]
+XCAL_SMART_TPUT = data('xcal/sizhe_new_data/*_xcal_smart_tput.csv')
+PING_CSV = data('ping/sizhe_new_data/*_ping.csv')
+
+
 def parsing():
-    parse_nuttcp_data_to_csv_main()
-    parse_iperf_data_to_csv_main()
-    # parse_ping_result_to_csv_main()
-    # parse_traceroute_data_to_csv_main()
-    # parse_nslookup_data_to_csv_main()
-    # parse_xcal_tput_to_csv_main()
-    # append_tech_to_latency_dataset_main()
-    
-    # parse_weather_area_data_to_csv_main()
-    # calibrate_weather_area_data_main()
-    append_weather_area_to_tput_dataset_main()
-    # append_weather_area_to_latency_dataset_main()
-    pass
+    return [
+        PipelineNode('parse_nuttcp', parse_nuttcp_data_to_csv_main,
+                     inputs=[RAW_LOGS, DATASETS], outputs=[data('throughput')]),
+        PipelineNode('parse_iperf', parse_iperf_data_to_csv_main,
+                     inputs=[RAW_LOGS, DATASETS], outputs=TPUT_DIRS),
+        PipelineNode('parse_ping', parse_ping_result_to_csv_main,
+                     inputs=[RAW_LOGS, DATASETS], outputs=[data('ping/sizhe_new_data')]),
+        PipelineNode('parse_traceroute', parse_traceroute_data_to_csv_main,
+                     inputs=[RAW_LOGS, DATASETS], outputs=[data('traceroute/*_traceroute.csv')]),
+        PipelineNode('parse_nslookup', parse_nslookup_data_to_csv_main,
+                     inputs=[RAW_LOGS, DATASETS], outputs=[data('nslookup/starlink_dns_resolve.csv')]),
+        PipelineNode('parse_xcal', parse_xcal_tput_to_csv_main,
+                     inputs=[RAW_LOGS, DATASETS, os.path.join(DATASET_DIR, 'xcal/hawaii_sizhe_new_data')],
+                     outputs=[XCAL_SMART_TPUT, data('xcal/sizhe_new_data/*_xcal_raw_logs_all_dates.csv')]),
+        PipelineNode('append_tech', append_tech_to_latency_dataset_main,
+                     inputs=[RAW_LOGS, DATASETS, PING_CSV,
+                             data('xcal/sizhe_new_data/*_xcal_raw_logs_all_dates.csv'),
+                             os.path.join(DATASET_DIR, 'xcal/hawaii_sizhe_new_data')],
+                     outputs=[PING_CSV, data('xcal/sizhe_new_data/*_xcal_raw_logs_with_rtt.csv')]),
+
+        PipelineNode('parse_weather_area', parse_weather_area_data_to_csv_main,
+                     inputs=[data('raw/weather_area')], outputs=[data('others/weather.csv'), data('others/area.csv')]),
+        PipelineNode('calibrate_weather_area', calibrate_weather_area_data_main,
+                     inputs=[data('others/area.csv'), data('xcal/att_xcal_smart_tput.csv'),
+                             data('xcal/tmobile_xcal_smart_tput.csv')],
+                     outputs=[data('others/area.csv')]),
+        PipelineNode('append_weather_area_to_tput', append_weather_area_to_tput_dataset_main,
+                     inputs=[data('throughput'), data('others')], outputs=[data('throughput')]),
+        PipelineNode('append_weather_area_to_latency', append_weather_area_to_latency_dataset_main,
+                     inputs=[PING_CSV, data('others')], outputs=[PING_CSV]),
+    ]
+
 
 def plotting():
-    plot_cdf_throughput_main()
-    plot_rtt_from_csv_main()
-    plot_traceroute_main()
+    # plots are the leaves of the pipeline and are only redrawn when the datasets they read change
+    return [
+        PipelineNode('plot_cdf_throughput', plot_cdf_throughput_main,
+                     inputs=TPUT_DIRS + [data('xcal'), data('starlink')]),
+        PipelineNode('plot_rtt', plot_rtt_from_csv_main, inputs=[data('ping')]),
+        PipelineNode('plot_traceroute', plot_traceroute_main, inputs=[data('traceroute/starlink_traceroute.csv')]),
+    ]
 
 
-def main():
-    # separate_dataset_main()
+def build_pipeline() -> PipelineRunner:
+    nodes = [
+        PipelineNode('separate_dataset', separate_dataset_main,
+                     inputs=[RAW_LOGS], outputs=[data('tmp/*_labels.json'), DATASETS]),
+    ]
+    nodes.extend(parsing())
+    nodes.extend(plotting())
+    return PipelineRunner(
+        nodes,
+        state_path=data('tmp/pipeline_state.json'),
+        max_workers=min(4, os.cpu_count() or 1),
+        logger=create_logger('pipeline', filename=data('tmp/pipeline.log')),
+    )
 
-    parsing()
 
-    # plotting()
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the stale datasets and plots of the trip')
+    parser.add_argument('targets', nargs='*', help='stages to bring up to date with their upstream stages, all by default')
+    parser.add_argument('--force', nargs='*', default=[], help='stages to rerun even if they are up to date')
+    args = parser.parse_args()
+
+    build_pipeline().run(targets=args.targets or None, force=args.force)
 
 
 if __name__ == '__main__':
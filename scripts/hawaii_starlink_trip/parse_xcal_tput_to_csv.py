@@ -13,7 +13,8 @@ from scripts.hawaii_starlink_trip.labels import DatasetLabel
 from scripts.hawaii_starlink_trip.separate_dataset import read_dataset
 from scripts.hawaii_starlink_trip.configs import ROOT_DIR, TIMEZONE
 from scripts.constants import DATASET_DIR, XcalField
-from scripts.utilities.xcal_processing_utils import collect_periods_of_tput_measurements, filter_xcal_logs, read_daily_xcal_data
+from scripts.utilities.period_index import TPUT_TRACE_TYPES, PeriodIndex
+from scripts.utilities.xcal_processing_utils import filter_xcal_logs, read_daily_xcal_data
 
 
 tmp_dir = os.path.join(ROOT_DIR, 'tmp')
@@ -46,18 +47,11 @@ def save_extracted_periods_as_csv(periods: list[tuple[datetime, datetime, str]],
     df = pd.DataFrame(periods, columns=['start_time', 'end_time', 'protocol_direction'])
     df.to_csv(output_file_path, index=False)
 
-def get_app_tput_periods(dir_list: list[str]) -> list[tuple[datetime, datetime, str]]:
-    all_tput_periods = []
-    for dir in dir_list:
-        try:
-          periods_of_tcp_dl = collect_periods_of_tput_measurements(base_dir=dir, protocol='tcp', direction='downlink')
-          periods_of_tcp_ul = collect_periods_of_tput_measurements(base_dir=dir, protocol='tcp', direction='uplink')
-          periods_of_udp_dl = collect_periods_of_tput_measurements(base_dir=dir, protocol='udp', direction='downlink')
-          periods_of_udp_ul = collect_periods_of_tput_measurements(base_dir=dir, protocol='udp', direction='uplink')
-          all_tput_periods.extend(periods_of_tcp_dl + periods_of_tcp_ul + periods_of_udp_dl + periods_of_udp_ul)
-        except Exception as e:
-            raise Exception(f"Failed to collect periods of tput measurements: {str(e)}")
-    return all_tput_periods
+def get_app_tput_periods(period_index: PeriodIndex, dir_list: list[str], operator: str | None = None) -> list[tuple[datetime, datetime, str]]:
+    try:
+        return period_index.get_tput_periods(dir_list, operator=operator)
+    except Exception as e:
+        raise Exception(f"Failed to collect periods of tput measurements: {str(e)}")
 
 def process_operator_xcal_tput(operator: str, location: str, output_dir: str):
     dir_list = read_dataset(operator, label=DatasetLabel.NORMAL.value)
@@ -69,7 +63,8 @@ def process_operator_xcal_tput(operator: str, location: str, output_dir: str):
     
     logger.info("--Stage 1: save app tput periods as csv")
     app_tput_periods_csv = path.join(output_dir, f'{operator}_app_tput_periods.csv')
-    all_tput_periods = get_app_tput_periods(dir_list=dir_list)
+    period_index = PeriodIndex(index_path=path.join(ROOT_DIR, 'tmp', 'period_index.pkl'))
+    all_tput_periods = get_app_tput_periods(period_index, dir_list=dir_list, operator=operator)
     # save_extracted_periods_as_csv(all_tput_periods, output_file_path=app_tput_periods_csv)
     logger.info(f"collected {len(all_tput_periods)} periods of tput measurements and saved to {app_tput_periods_csv}")
     
@@ -94,7 +89,10 @@ def process_operator_xcal_tput(operator: str, location: str, output_dir: str):
     try:
         filtered_df = filter_xcal_logs(
             df_xcal_all_logs, 
-            periods=all_tput_periods, 
+            period_index=period_index,
+            run_dirs=dir_list,
+            operator=operator,
+            trace_types=TPUT_TRACE_TYPES,
             xcal_timezone='US/Eastern',
             label=f'{operator}_{location}'
         )
@@ -10,6 +10,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 from scripts.hawaii_starlink_trip.configs import ROOT_DIR, DatasetLabel
 from scripts.constants import DATASET_DIR
+from scripts.utilities.dataset_manifest import DatasetManifest
 import unittest
 from datetime import datetime
 
@@ -122,9 +123,11 @@ def separate_dataset(category: str):
     print(f'Separated dataset for {category} to {tmp_data_path}')
 
 
-def read_dataset(category: str, label: str):
-    datasets = json.load(open(os.path.join(tmp_data_path, f'{category}_datasets.json')))
-    return datasets[label]
+def read_dataset(category: str, label: str | List[str]) -> List[str]:
+    """
+    Run dirs of a category with a label, or with any of several labels
+    """
+    return DatasetManifest.load(os.path.join(tmp_data_path, f'{category}_datasets.json')).get_run_dirs(label)
 
 
 def main():
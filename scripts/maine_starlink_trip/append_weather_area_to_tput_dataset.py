@@ -34,12 +34,10 @@ def main():
         tput_df['time'] = pd.to_datetime(tput_df['time'], format="ISO8601")
 
         weather_df = pd.read_csv(weather_csv_path)
-        weather_df['time'] = pd.to_datetime(weather_df['time'], format="ISO8601")
-        weatherIntervalQueryUtil = TypeIntervalQueryUtil(weather_df[['time', 'value']].values.tolist())
+        weatherIntervalQueryUtil = TypeIntervalQueryUtil.from_df(weather_df, time_field='time')
 
         area_df = pd.read_csv(area_csv_path)
-        area_df['time'] = pd.to_datetime(area_df['time'], format="ISO8601")
-        areaIntervalQueryUtil = TypeIntervalQueryUtil(area_df[['time', 'value']].values.tolist())
+        areaIntervalQueryUtil = TypeIntervalQueryUtil.from_df(area_df, time_field='time')
 
         for idx, row in tput_df.iterrows():
             tput_df.at[idx, 'weather'] = weatherIntervalQueryUtil.query(row['time'])
@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 
@@ -16,28 +17,71 @@ from plot_cdf_thoughput import main as plot_cdf_throughput_main
 from plot_rtt_from_csv import main as plot_rtt_from_csv_main
 from plot_traceroute import main as plot_traceroute_main
 
+from scripts.maine_starlink_trip.configs import ROOT_DIR
+from scripts.logging_utils import create_logger
+from scripts.utilities.pipeline_runner import PipelineNode, PipelineRunner
+
+
+def data(*paths: str) -> str:
+    return os.path.join(ROOT_DIR, *paths)
+
+
+RAW_LOGS = data('raw/*_merged/**/*.out')
+MERGED_DATASETS = data('tmp/*_merged_datasets.json')
+
 
 def parsing():
-    # parse_nuttcp_data_to_csv_main()
-    # parse_iperf_data_to_csv_main()
-    # parse_weather_area_data_to_csv_main()
-    # append_weather_area_to_tput_dataset_main()
+    return [
+        PipelineNode('parse_nuttcp', parse_nuttcp_data_to_csv_main,
+                     inputs=[RAW_LOGS, MERGED_DATASETS], outputs=[data('throughput')]),
+        PipelineNode('parse_iperf', parse_iperf_data_to_csv_main,
+                     inputs=[RAW_LOGS, MERGED_DATASETS], outputs=[data('throughput')]),
+        PipelineNode('parse_weather_area', parse_weather_area_data_to_csv_main,
+                     inputs=[data('raw/weather_area')], outputs=[data('others/weather.csv'), data('others/area.csv')]),
+        PipelineNode('append_weather_area_to_tput', append_weather_area_to_tput_dataset_main,
+                     inputs=[data('throughput'), data('others')], outputs=[data('throughput')]),
 
-    # parse_ping_result_to_csv_main()
-    # parse_traceroute_data_to_csv_main()
-    # parse_nslookup_data_to_csv_main()
+        PipelineNode('parse_ping', parse_ping_result_to_csv_main,
+                     inputs=[RAW_LOGS, MERGED_DATASETS], outputs=[data('ping')]),
+        PipelineNode('parse_traceroute', parse_traceroute_data_to_csv_main,
+                     inputs=[RAW_LOGS, MERGED_DATASETS], outputs=[data('traceroute/*_traceroute.csv')]),
+        PipelineNode('parse_nslookup', parse_nslookup_data_to_csv_main,
+                     inputs=[RAW_LOGS, MERGED_DATASETS], outputs=[data('nslookup/starlink_dns_resolve.csv')]),
+    ]
 
 
 def plotting():
-    plot_cdf_throughput_main()
-    plot_rtt_from_csv_main()
-    plot_traceroute_main()
+    # plots are the leaves of the pipeline and are only redrawn when the datasets they read change
+    return [
+        PipelineNode('plot_cdf_throughput', plot_cdf_throughput_main,
+                     inputs=[data('throughput'), data('xcal'), data('starlink')]),
+        PipelineNode('plot_rtt', plot_rtt_from_csv_main, inputs=[data('ping')]),
+        PipelineNode('plot_traceroute', plot_traceroute_main, inputs=[data('traceroute/starlink_traceroute.csv')]),
+    ]
+
+
+def build_pipeline() -> PipelineRunner:
+    nodes = [
+        PipelineNode('separate_dataset', separate_dataset_main,
+                     inputs=[RAW_LOGS], outputs=[data('tmp/*_labels.json'), data('tmp/*_datasets.json')]),
+    ]
+    nodes.extend(parsing())
+    nodes.extend(plotting())
+    return PipelineRunner(
+        nodes,
+        state_path=data('tmp/pipeline_state.json'),
+        max_workers=min(4, os.cpu_count() or 1),
+        logger=create_logger('pipeline', filename=data('tmp/pipeline.log')),
+    )
 
 
 def main():
-    separate_dataset_main()
-    parsing()
-    plotting()
+    parser = argparse.ArgumentParser(description='Rebuild the stale datasets and plots of the trip')
+    parser.add_argument('targets', nargs='*', help='stages to bring up to date with their upstream stages, all by default')
+    parser.add_argument('--force', nargs='*', default=[], help='stages to rerun even if they are up to date')
+    args = parser.parse_args()
+
+    build_pipeline().run(targets=args.targets or None, force=args.force)
 
 
 if __name__ == '__main__':
@@ -1,13 +1,11 @@
 import os
 import sys
 
-import pandas as pd
-
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 from scripts.constants import DATASET_DIR
 
-from scripts.starlink_metric_utils import find_starlink_metric_files, parse_starlink_metric_logs
+from scripts.starlink_metric_utils import find_starlink_metric_files, stream_starlink_metric_file_to_csv
 
 base_dir = os.path.join(DATASET_DIR, 'maine_starlink_trip/raw/dish_metrics')
 
@@ -15,37 +13,38 @@ base_dir = os.path.join(DATASET_DIR, 'maine_starlink_trip/raw/dish_metrics')
 def main():
     all_metric_files = find_starlink_metric_files(base_dir)
     print(f"Found {len(all_metric_files)} metric files.")
+    output_dir = os.path.join(DATASET_DIR, 'maine_starlink_trip/starlink')
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+    total_csv_file = os.path.join(output_dir, 'starlink_metric.csv')
+    if os.path.exists(total_csv_file):
+        os.remove(total_csv_file)
 
     excluded_files = []
-    total_df = pd.DataFrame()
+    total_rows = 0
 
     for file in all_metric_files:
         try:
-            with open(file) as f:
-                content = f.read()
-                extracted_data = parse_starlink_metric_logs(content)
-                if not extracted_data:
-                    print(f"Error reading {file}: No data extracted.")
-                    excluded_files.append(file)
-                    continue
-
-                df = pd.DataFrame(extracted_data)
-
-                csv_file_path = file.replace('.out', '.csv')
-                df.to_csv(csv_file_path, index=False)
-                print(f"Extracted data is saved to {csv_file_path}")
-
-                total_df = pd.concat([total_df, df], ignore_index=True)
+            csv_file_path = file.replace('.out', '.csv')
+            # parsed in batches so memory stays flat on long logs, the total csv only gets fully parsed logs
+            row_count = stream_starlink_metric_file_to_csv(
+                file_path=file,
+                output_csv_path=csv_file_path,
+                combined_csv_path=total_csv_file,
+            )
+            if row_count == 0:
+                print(f"Error reading {file}: No data extracted.")
+                excluded_files.append(file)
+                continue
+            total_rows += row_count
+            print(f"Extracted data is saved to {csv_file_path}")
         except Exception as e:
             print(f"Error reading {file}: {e}")
+            excluded_files.append(file)
 
     print('Total files:', len(all_metric_files))
-    output_dir = os.path.join(DATASET_DIR, 'maine_starlink_trip/starlink')
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir, exist_ok=True)
-    total_csv_file = os.path.join(output_dir, 'starlink_metric.csv')
-    total_df.to_csv(total_csv_file, index=False)
-    print(f'Saved all the metric data to csv file: {output_dir}')
+    print(f'Saved all the metric data ({total_rows} rows) to csv file: {total_csv_file}')
 
 
 if __name__ == '__main__':
@@ -91,8 +91,12 @@ def show_summary(df: pd.DataFrame):
     return stats
 
 
-def main():
-    df = pd.read_csv(os.path.join(base_dir, 'starlink_dns_resolve.csv'))
+def main(df: pd.DataFrame = None):
+    """
+    :param df: DNS resolve data, e.g. returned by parse_nslookup_data_to_csv.main(), read from the merged csv if not given
+    """
+    if df is None:
+        df = pd.read_csv(os.path.join(base_dir, 'starlink_dns_resolve.csv'))
     show_summary(df)
     # filtered_df = filter_outliers_by_IQR(df['duration_ms'], threshold=1.5)
     # data_stats = create_stats(total_count=len(df), filter_by_count=len(filtered_df))
@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 from typing import List
@@ -15,6 +16,7 @@ from scripts.cdf_tput_plotting_utils import get_data_frame_from_all_csv, plot_cd
     plot_cdf_tput_tcp_vs_udp_for_starlink_and_cellular, plot_cdf_xcal_vs_app_tput_combined
 from scripts.maine_starlink_trip.configs import ROOT_DIR
 from scripts.constants import OUTPUT_DIR
+from scripts.utilities.plot_scheduler import PlotScheduler
 
 base_dir = os.path.join(ROOT_DIR, 'throughput')
 tmp_dir = os.path.join(ROOT_DIR, 'tmp')
@@ -275,7 +277,34 @@ def read_and_plot_xcal_tput_data(output_dir: str):
 
 
 
-def main():
+# figures rendered when no figure is selected
+DEFAULT_FIGURES = ['xcal_tput']
+
+
+def build_plot_scheduler() -> PlotScheduler:
+    scheduler = PlotScheduler(logger=logger)
+    all_weathers = ['sunny', 'cloudy', 'rainy', 'snowy']
+    for protocol in ['tcp', 'udp']:
+        for direction in ['downlink', 'uplink']:
+            scheduler.add(f'tput_{protocol}_{direction}',
+                          read_and_plot_throughput_data, protocol, direction, output_dir)
+            for area_type in ['urban', 'suburban', 'rural']:
+                scheduler.add(f'tput_by_area_{area_type}_{protocol}_{direction}',
+                              read_and_plot_throughput_data_by_area, protocol, direction, output_dir,
+                              area_type=area_type)
+            scheduler.add(f'tput_by_weather_{protocol}_{direction}',
+                          read_and_plot_throughput_data_by_weather, protocol, direction, output_dir,
+                          all_weathers=all_weathers)
+    for direction in ['downlink', 'uplink']:
+        scheduler.add(f'starlink_vs_cellular_{direction}', plot_cdf_tput_starlink_vs_cellular, direction)
+    scheduler.add('xcal_tput', read_and_plot_xcal_tput_data, output_dir)
+    return scheduler
+
+
+def main(figures: List[str] | None = None):
+    """
+    :param figures: names of the figures to render in parallel, DEFAULT_FIGURES by default
+    """
     if not os.path.exists(base_dir):
         raise FileNotFoundError(f"Dataset folder does not exist: {base_dir} ")
 
@@ -283,38 +312,13 @@ def main():
     if not os.path.exists(output_dir):
         os.makedirs(output_dir, exist_ok=True)
 
-    # read_and_plot_throughput_data('tcp', 'downlink', output_dir)
-    # print("--------------")
-    # read_and_plot_throughput_data('tcp', 'uplink', output_dir)
-    # print("--------------")
-    # read_and_plot_throughput_data('udp', 'downlink', output_dir)
-    # print("--------------")
-    # read_and_plot_throughput_data('udp', 'uplink', output_dir)
-    # print("--------------")
-
-    # for area_type in ['urban', 'suburban', 'rural']:
-    #     read_and_plot_throughput_data_by_area('tcp', 'downlink', output_dir, area_type=area_type)
-    #     print("--------------")
-    #     read_and_plot_throughput_data_by_area('tcp', 'uplink', output_dir, area_type=area_type)
-    #     print("--------------")
-    #     read_and_plot_throughput_data_by_area('udp', 'downlink', output_dir, area_type=area_type)
-    #     print("--------------")
-    #     read_and_plot_throughput_data_by_area('udp', 'uplink', output_dir, area_type=area_type)
-    #     print("--------------")
-
-    # all_weathers = ['sunny', 'cloudy', 'rainy', 'snowy']
-    # read_and_plot_throughput_data_by_weather('tcp', 'downlink', output_dir, all_weathers=all_weathers)
-    # read_and_plot_throughput_data_by_weather('tcp', 'uplink', output_dir, all_weathers=all_weathers)
-    # read_and_plot_throughput_data_by_weather('udp', 'downlink', output_dir, all_weathers=all_weathers)
-    # read_and_plot_throughput_data_by_weather('udp', 'uplink', output_dir, all_weathers=all_weathers)
-    # #
-    # # # read_and_plot_starlink_throughput_data(output_dir)
-    # # # print("--------------")
-    # #
-    # plot_cdf_tput_starlink_vs_cellular('downlink')
-    # plot_cdf_tput_starlink_vs_cellular('uplink')
-
-    read_and_plot_xcal_tput_data(output_dir)
+    build_plot_scheduler().run(figures or DEFAULT_FIGURES)
+
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Plot the throughput CDFs of the trip')
+    parser.add_argument('figures', nargs='*', help=f'figures to render, {DEFAULT_FIGURES} by default')
+    parser.add_argument('--all', action='store_true', help='render every figure')
+    args = parser.parse_args()
+
+    main(build_plot_scheduler().get_names() if args.all else args.figures)
@@ -1,11 +1,12 @@
-import json
 import os
 import sys
+from typing import List
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 from scripts.maine_starlink_trip.labels import DatasetLabel
 from scripts.utilities.AppTputPeriodExtractor import AppTputPeriodExtractor
+from scripts.utilities.dataset_manifest import DatasetManifest
 from scripts.utilities.starlink_metric_utils import StarlinkMetricProcessor
 from scripts.logging_utils import create_logger
 from scripts.time_utils import now
@@ -13,13 +14,10 @@ from scripts.maine_starlink_trip.configs import ROOT_DIR, TIMEZONE
 
 class MaineAppTputPeriodExtractor(AppTputPeriodExtractor):
     def __init__(self):
-        super().__init__(operator='starlink')
+        super().__init__(operator='starlink', period_index_path=os.path.join(ROOT_DIR, 'tmp', 'period_index.pkl'))
 
-    def read_dataset(self, category: str, label: str):
-        # read merged datasets
-        tmp_data_path = os.path.join(ROOT_DIR, 'tmp')
-        datasets = json.load(open(os.path.join(tmp_data_path, f'{category}_merged_datasets.json')))
-        return datasets[label]
+    def read_dataset(self, category: str, label: str | List[str]) -> List[str]:
+        return DatasetManifest.load(os.path.join(ROOT_DIR, 'tmp', f'{category}_merged_datasets.json')).get_run_dirs(label)
     
     def get_all_data_dirs(self):
         return self.read_dataset(self.operator, label=DatasetLabel.NORMAL.value)
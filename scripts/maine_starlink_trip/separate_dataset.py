@@ -10,6 +10,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 from scripts.maine_starlink_trip.labels import DatasetLabel
 from scripts.maine_starlink_trip.configs import ROOT_DIR
+from scripts.utilities.dataset_manifest import DatasetManifest
 import unittest
 from datetime import datetime
 
@@ -108,10 +109,11 @@ def separate_dataset(category: str):
     print(f'Separated dataset for {category} to {tmp_data_path}')
 
 
-def read_dataset(category: str, label: str):
-    # read the merged datasets
-    datasets = json.load(open(os.path.join(tmp_data_path, f'{category}_merged_datasets.json')))
-    return datasets[label]
+def read_dataset(category: str, label: str | List[str]) -> List[str]:
+    """
+    Run dirs of a category with a label, or with any of several labels
+    """
+    return DatasetManifest.load(os.path.join(tmp_data_path, f'{category}_merged_datasets.json')).get_run_dirs(label)
 
 
 def main():
@@ -3,8 +3,24 @@ from typing import List
 import numpy as np
 import pandas as pd
 
+# enough points to draw a CDF curve at the resolution of a saved figure
+MAX_CDF_POINTS = 2000
 
-def get_cdf(df: List or pd.DataFrame or pd.Series or np.array):
+
+def get_cdf(df: List or pd.DataFrame or pd.Series or np.array, max_points: int = None):
+    """
+    :param max_points: number of quantile points to keep for plotting, None keeps every sample
+    """
     sorted_data = np.sort(df)
     ranks = np.arange(1, len(sorted_data) + 1) / len(sorted_data)
-    return sorted_data, ranks
+    return downsample_cdf(sorted_data, ranks, max_points)
+
+
+def downsample_cdf(sorted_data: np.ndarray, ranks: np.ndarray, max_points: int = None):
+    """
+    Keep max_points evenly spaced quantiles of a CDF, including the first and last sample
+    """
+    if max_points is None or len(sorted_data) <= max_points:
+        return sorted_data, ranks
+    idx = np.unique(np.linspace(0, len(sorted_data) - 1, max_points).round().astype(int))
+    return sorted_data[idx], ranks[idx]
@@ -1,24 +1,45 @@
+import logging
+import os
 import re
+import tempfile
 import unittest
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
 
+import pandas as pd
+
+from scripts.time_utils import StartEndLogTimeProcessor, format_datetime_as_iso_8601
 from scripts.utils import find_files
 
 
+# Patterns are compiled once at import, they are applied to every result block of every nslookup log
+DNS_SERVER_PATTERN = re.compile(r"Server:\s+(\d+\.\d+\.\d+\.\d+)\s+Address:\s+\d+\.\d+\.\d+\.\d+#(\d+)")
+NON_AUTHORITATIVE_PATTERN = re.compile(r"Non-authoritative answer:")
+ANSWER_PATTERN = re.compile(r"Name:\s+([^\s]+)\s+Address:\s+([^\s]+)")
+
+NSLOOKUP_RESOLVE_FIELDS = [
+    'dns_server',
+    'dns_server_port',
+    'is_non_authoritative',
+    'start_ms',
+    'end_ms',
+    'duration_ms',
+    'req_domain',
+    'res_address',
+]
+
+
 def parse_nslookup_result(result: str):
-    dns_server_reg = r"Server:\s+(\d+\.\d+\.\d+\.\d+)\s+Address:\s+\d+\.\d+\.\d+\.\d+#(\d+)"
-    match = re.search(dns_server_reg, result)
+    match = DNS_SERVER_PATTERN.search(result)
     if not match:
         # if no dns server info, meaning the result is invalid
         return None
     dns_server_addr = match.group(1)
     dns_server_port = match.group(2)
 
-    non_authoritative_reg = r"Non-authoritative answer:"
-    is_non_authoritative = bool(re.search(non_authoritative_reg, result))
+    is_non_authoritative = NON_AUTHORITATIVE_PATTERN.search(result) is not None
 
-    answer_reg = r"Name:\s+([^\s]+)\s+Address:\s+([^\s]+)"
-    answer_match = re.findall(answer_reg, result) or []
+    answer_match = ANSWER_PATTERN.findall(result)
 
     return {
         "dns_server": dns_server_addr,
@@ -33,6 +54,98 @@ def split_multiple_nslookup_results(results: str):
     return [r.strip() for r in res if r.strip()]
 
 
+def parse_nslookup_log_to_columns(content: str, timezone_str: str) -> Dict[str, List]:
+    """
+    Parse a nslookup log into columnar buffers, one entry per answer of each result.
+    Results are paired in order with the start/end time pairs of the log.
+    :raises ValueError: if a paired result has no dns server info
+    """
+    columns = {field: [] for field in NSLOOKUP_RESOLVE_FIELDS}
+    start_end_times = StartEndLogTimeProcessor.get_start_end_time_from_log(content, timezone_str=timezone_str)
+    results = split_multiple_nslookup_results(content)
+    for (start_time, end_time), result in zip(start_end_times, results):
+        parsed_result = parse_nslookup_result(result)
+        if parsed_result is None:
+            raise ValueError(f'Invalid nslookup result: {result[:100]}')
+        answers = parsed_result['answers']
+        if not answers:
+            continue
+        count = len(answers)
+        start_ms = format_datetime_as_iso_8601(start_time)
+        end_ms = format_datetime_as_iso_8601(end_time)
+        duration_ms = (end_time - start_time).total_seconds() * 1000
+        columns['dns_server'].extend([parsed_result['dns_server']] * count)
+        columns['dns_server_port'].extend([parsed_result['dns_server_port']] * count)
+        columns['is_non_authoritative'].extend([parsed_result['is_non_authoritative']] * count)
+        columns['start_ms'].extend([start_ms] * count)
+        columns['end_ms'].extend([end_ms] * count)
+        columns['duration_ms'].extend([duration_ms] * count)
+        for req_domain, res_address in answers:
+            columns['req_domain'].append(req_domain)
+            columns['res_address'].append(res_address)
+    return columns
+
+
+def parse_nslookup_file(file: str, timezone_str: str, save_per_file_csv: bool = True) -> Dict[str, List]:
+    with open(file, 'r') as f:
+        content = f.read()
+    columns = parse_nslookup_log_to_columns(content, timezone_str=timezone_str)
+    if save_per_file_csv:
+        pd.DataFrame(columns, columns=NSLOOKUP_RESOLVE_FIELDS).to_csv(file.replace('.out', '.csv'), index=False)
+    return columns
+
+
+def _parse_nslookup_file_safely(file: str, timezone_str: str, save_per_file_csv: bool):
+    try:
+        return parse_nslookup_file(file, timezone_str=timezone_str, save_per_file_csv=save_per_file_csv), None
+    except Exception as e:
+        return None, str(e)
+
+
+def parse_nslookup_files(
+        nslookup_files: List[str],
+        timezone_str: str,
+        max_workers: int | None = None,
+        logger: logging.Logger | None = None,
+        save_per_file_csv: bool = True,
+) -> Tuple[Dict[str, List], List[str]]:
+    """
+    Parse nslookup logs over a process pool and merge them into one set of columns, in file order
+    :param nslookup_files: nslookup log files
+    :param timezone_str: timezone of the start/end time in the logs
+    :param max_workers: size of the process pool, 1 parses in the current process
+    :param logger: optional logger for progress and errors
+    :param save_per_file_csv: save the answers of each log next to it as a .csv file, default is True
+    :return: (columns of NSLOOKUP_RESOLVE_FIELDS, failed files)
+    """
+    columns = {field: [] for field in NSLOOKUP_RESOLVE_FIELDS}
+    failed_files = []
+    timezones = [timezone_str] * len(nslookup_files)
+    save_flags = [save_per_file_csv] * len(nslookup_files)
+    if max_workers == 1 or len(nslookup_files) <= 1:
+        results = map(_parse_nslookup_file_safely, nslookup_files, timezones, save_flags)
+        for file, (file_columns, error) in zip(nslookup_files, results):
+            _merge_nslookup_columns(columns, failed_files, file, file_columns, error, logger)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(_parse_nslookup_file_safely, nslookup_files, timezones, save_flags,
+                                   chunksize=16)
+            for file, (file_columns, error) in zip(nslookup_files, results):
+                _merge_nslookup_columns(columns, failed_files, file, file_columns, error, logger)
+    return columns, failed_files
+
+
+def _merge_nslookup_columns(columns, failed_files, file, file_columns, error, logger):
+    if error is not None:
+        if logger:
+            logger.error(f'Failed to process {file}: {error}')
+        failed_files.append(file)
+        return
+    for field in NSLOOKUP_RESOLVE_FIELDS:
+        columns[field].extend(file_columns[field])
+    if logger:
+        logger.info(f'Parsed DNS resolve data of {file}')
+
 
 def find_nslookup_files(base_dir: str):
     return find_files(base_dir, prefix="nslookup", suffix=".out")
@@ -103,3 +216,44 @@ class Unittest(unittest.TestCase):
             ],
         }
         self.assertEqual(parse_nslookup_result(result), expected)
+
+    def test_parse_nslookup_log_to_columns(self):
+        content = (
+            "Start time: 1719116806000\n"
+            "Server:\t\t8.8.8.8\nAddress:\t8.8.8.8#53\nNon-authoritative answer:\n"
+            "Name:\tgoogle.com\nAddress: 172.253.122.102\nName:\tgoogle.com\nAddress: 2607:f8b0:4008:809::200e\n"
+            "End time: 1719116806050\n"
+            "\n"
+            "Start time: 1719116807000\n"
+            "Server:\t\t1.1.1.1\nAddress:\t1.1.1.1#53\n"
+            "Name:\tfacebook.com\nAddress: 157.240.3.35\n"
+            "End time: 1719116807125\n"
+        )
+        columns = parse_nslookup_log_to_columns(content, timezone_str='UTC')
+        self.assertEqual(NSLOOKUP_RESOLVE_FIELDS, list(columns.keys()))
+        self.assertEqual(['8.8.8.8', '8.8.8.8', '1.1.1.1'], columns['dns_server'])
+        self.assertEqual([True, True, False], columns['is_non_authoritative'])
+        self.assertEqual([50.0, 50.0, 125.0], columns['duration_ms'])
+        self.assertEqual(['google.com', 'google.com', 'facebook.com'], columns['req_domain'])
+        self.assertEqual('157.240.3.35', columns['res_address'][2])
+
+    def test_parse_nslookup_files(self):
+        valid_content = (
+            "Start time: 1719116806000\n"
+            "Server:\t\t8.8.8.8\nAddress:\t8.8.8.8#53\n"
+            "Name:\tgoogle.com\nAddress: 172.253.122.102\n"
+            "End time: 1719116806050\n"
+        )
+        invalid_content = "Start time: 1719116806000\nconnection timed out\nEnd time: 1719116806050\n"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            files = []
+            for i, content in enumerate([valid_content, invalid_content, valid_content]):
+                files.append(os.path.join(tmp_dir, f'nslookup_{i}.out'))
+                with open(files[-1], 'w') as f:
+                    f.write(content)
+
+            for max_workers in [1, 2]:
+                columns, failed_files = parse_nslookup_files(files, timezone_str='UTC', max_workers=max_workers)
+                self.assertEqual([files[1]], failed_files)
+                self.assertEqual([50.0, 50.0], columns['duration_ms'])
+            self.assertTrue(os.path.exists(os.path.join(tmp_dir, 'nslookup_0.csv')))
@@ -2,7 +2,7 @@ import json
 import os
 import sys
 import unittest
-from typing import List
+from typing import Dict, List
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -11,17 +11,15 @@ from matplotlib.patches import Rectangle
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
+from scripts.utilities.TracerouteCube import TracerouteCube
+
 current_dir = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(current_dir, '../../datasets')
 OUTPUT_DIR = os.path.join(current_dir, './outputs')
+LOCATIONS = ['alaska', 'hawaii', 'maine']
 
 def get_last_hop_rtt_series(df: pd.DataFrame):
-    _df = df[df['rtt_ms'].notna() & df['exception'].isna()]
-    hop_df = _df.groupby(['start_time', 'hop_number']).agg({'rtt_ms': 'mean'}).reset_index()
-    res = []
-    for _, group in hop_df.groupby('start_time'):
-        res.append(group[group['hop_number'] == group['hop_number'].max()]['rtt_ms'].values[0])
-    return pd.Series(res).dropna().astype(float)
+    return TracerouteCube(df).get_last_hop_rtt_series()
 
 def get_rtt_diff_series_between_hops(df: pd.DataFrame, hop1: int, hop2: int):
     """
@@ -31,32 +29,16 @@ def get_rtt_diff_series_between_hops(df: pd.DataFrame, hop1: int, hop2: int):
     :param hop2: -1 means the last hop
     :return:
     """
-    if hop1 <= 0:
-        raise ValueError('hop1 must be greater than 0')
-    if hop2 != -1 and hop2 < hop1:
-        raise ValueError('hop2 must be greater than hop1')
-
-    _df = df[df['rtt_ms'].notna() & df['exception'].isna()]
-    hop_df = _df.groupby(['start_time', 'hop_number']).agg({'rtt_ms': 'min'}).reset_index()
-    result = []
-    for _, group in hop_df.groupby('start_time'):
-        if hop2 == -1:
-            hop2 = group['hop_number'].max()
-        hop1_rtt_values = group[group['hop_number'] == hop1]['rtt_ms'].values
-        hop2_rtt_values = group[group['hop_number'] == hop2]['rtt_ms'].values
-        if len(hop1_rtt_values) == 0 or len(hop2_rtt_values) == 0:
-            continue
-        rtt_diff = hop2_rtt_values[0] - hop1_rtt_values[0]
-        result.append(rtt_diff)
-    return pd.Series(result).dropna().astype(float)
+    return TracerouteCube(df).get_rtt_diff_series_between_hops(hop1, hop2)
 
 
 def get_largest_hop_number_of_given_ip_prefix(df: pd.DataFrame, ip_prefix: str):
-    _df = df.dropna(subset=['ip'])
-    res_df = _df[_df['ip'].str.startswith(ip_prefix)]
-    if res_df.empty:
-        return -1
-    return res_df['hop_number'].max()
+    return TracerouteCube(df).get_largest_hop_number_of_ip_prefix(ip_prefix)
+
+
+def read_traceroute_cube(location: str) -> TracerouteCube:
+    tr_df = pd.read_csv(os.path.join(DATA_DIR, f'{location}_starlink_trip/traceroute/starlink_traceroute.csv'))
+    return TracerouteCube(tr_df)
 
 
 # class UnitTest(unittest.TestCase):
@@ -80,91 +62,47 @@ def get_largest_hop_number_of_given_ip_prefix(df: pd.DataFrame, ip_prefix: str):
 #         self.assertEqual(10, rtt_diff_series[0])
 
 
-def get_datasource_of_bent_pipe_rtt_breakdown() -> dict:
+def get_datasource_of_bent_pipe_rtt_breakdown(cubes: Dict[str, TracerouteCube] = None) -> dict:
     """
     Get the datasource of bent-pipe rtt breakdown
     - d2g: dishy to gs
     - g2p: gs to pop
+    :param cubes: traceroute cube of each location, read from the datasets if not given
     :return:
     """
-    # ALASKA
-    ak_tr_df = pd.read_csv(os.path.join(DATA_DIR, 'alaska_starlink_trip/traceroute/starlink_traceroute.csv'))
-    ak_d2g = get_rtt_diff_series_between_hops(ak_tr_df, hop1=1, hop2=2)
-    ak_g2p = get_rtt_diff_series_between_hops(ak_tr_df, hop1=2, hop2=4)
-
-    # HAWAII
-    hi_tr_df = pd.read_csv(os.path.join(DATA_DIR, 'hawaii_starlink_trip/traceroute/starlink_traceroute.csv'))
-    hi_d2g = get_rtt_diff_series_between_hops(hi_tr_df, hop1=1, hop2=2)
-    hi_g2p = get_rtt_diff_series_between_hops(hi_tr_df, hop1=2, hop2=4)
-
-    # MAINE
-    me_tr_df = pd.read_csv(os.path.join(DATA_DIR, 'maine_starlink_trip/traceroute/starlink_traceroute.csv'))
-    me_d2g = get_rtt_diff_series_between_hops(me_tr_df, hop1=1, hop2=2)
-    me_g2p = get_rtt_diff_series_between_hops(me_tr_df, hop1=2, hop2=4)
-
-    return {
-        'alaska': {
-            'dishy_to_gs': ak_d2g,
-            'gs_to_pop': ak_g2p
-        },
-        'hawaii': {
-            'dishy_to_gs': hi_d2g,
-            'gs_to_pop': hi_g2p
-        },
-        'maine': {
-            'dishy_to_gs': me_d2g,
-            'gs_to_pop': me_g2p
-        },
-    }
-
-
-def get_datasource_of_overall_rtt_breakdown() -> dict:
+    if cubes is None:
+        cubes = {location: read_traceroute_cube(location) for location in LOCATIONS}
+    res = {}
+    for location in LOCATIONS:
+        cube = cubes[location]
+        res[location] = {
+            'dishy_to_gs': cube.get_rtt_diff_series_between_hops(hop1=1, hop2=2),
+            'gs_to_pop': cube.get_rtt_diff_series_between_hops(hop1=2, hop2=4),
+        }
+    return res
+
+
+def get_datasource_of_overall_rtt_breakdown(cubes: Dict[str, TracerouteCube] = None) -> dict:
     """
     Get the datasource of overall rtt breakdown
     - d2g: dishy to gs
     - g2p: gs to pop
     - p2p: pop to endpoint
+    :param cubes: traceroute cube of each location, read from the datasets if not given
     :return:
     """
-    # ALASKA
-    ak_tr_df = pd.read_csv(os.path.join(DATA_DIR, 'alaska_starlink_trip/traceroute/starlink_traceroute.csv'))
-    ak_d2g = get_rtt_diff_series_between_hops(ak_tr_df, hop1=1, hop2=2)
-    ak_g2p = get_rtt_diff_series_between_hops(ak_tr_df, hop1=2, hop2=4)
-    ak_p2p = get_rtt_diff_series_between_hops(ak_tr_df, hop1=4, hop2=-1)
-    ak_last_hop_rtt = get_last_hop_rtt_series(ak_tr_df)
-
-    # HAWAII
-    hi_tr_df = pd.read_csv(os.path.join(DATA_DIR, 'hawaii_starlink_trip/traceroute/starlink_traceroute.csv'))
-    hi_d2g = get_rtt_diff_series_between_hops(hi_tr_df, hop1=1, hop2=2)
-    hi_g2p = get_rtt_diff_series_between_hops(hi_tr_df, hop1=2, hop2=4)
-    hi_p2p = get_rtt_diff_series_between_hops(hi_tr_df, hop1=4, hop2=-1)
-    hi_last_hop_rtt = get_last_hop_rtt_series(hi_tr_df)
-    # MAINE
-    me_tr_df = pd.read_csv(os.path.join(DATA_DIR, 'maine_starlink_trip/traceroute/starlink_traceroute.csv'))
-    me_d2g = get_rtt_diff_series_between_hops(me_tr_df, hop1=1, hop2=2)
-    me_g2p = get_rtt_diff_series_between_hops(me_tr_df, hop1=2, hop2=4)
-    me_p2p = get_rtt_diff_series_between_hops(me_tr_df, hop1=4, hop2=-1)
-    me_last_hop_rtt = get_last_hop_rtt_series(me_tr_df)
-    return {
-        'alaska': {
-            'dishy_to_gs': ak_d2g,
-            'gs_to_pop': ak_g2p,
-            'pop_to_endpoint': ak_p2p,
-            'dishy_to_endpoint': ak_last_hop_rtt
-        },
-        'hawaii': {
-            'dishy_to_gs': hi_d2g,
-            'gs_to_pop': hi_g2p,
-            'pop_to_endpoint': hi_p2p,
-            'dishy_to_endpoint': hi_last_hop_rtt
-        },
-        'maine': {
-            'dishy_to_gs': me_d2g,
-            'gs_to_pop': me_g2p,
-            'pop_to_endpoint': me_p2p,
-            'dishy_to_endpoint': me_last_hop_rtt
-        },
-    }
+    if cubes is None:
+        cubes = {location: read_traceroute_cube(location) for location in LOCATIONS}
+    res = {}
+    for location in LOCATIONS:
+        cube = cubes[location]
+        res[location] = {
+            'dishy_to_gs': cube.get_rtt_diff_series_between_hops(hop1=1, hop2=2),
+            'gs_to_pop': cube.get_rtt_diff_series_between_hops(hop1=2, hop2=4),
+            'pop_to_endpoint': cube.get_rtt_diff_series_between_hops(hop1=4, hop2=-1),
+            'dishy_to_endpoint': cube.get_last_hop_rtt_series(),
+        }
+    return res
 
 
 config = {
@@ -333,8 +271,8 @@ def save_stats_to_json(stats: dict, output_path: str, indent: int = 4):
     with open(output_path, 'w') as f:
         json.dump(stats, f, indent=indent)
 
-def plot_bent_pipe_rtt_breakdown(x_step: int = 25):
-    data = get_datasource_of_bent_pipe_rtt_breakdown()
+def plot_bent_pipe_rtt_breakdown(x_step: int = 25, cubes: Dict[str, TracerouteCube] = None):
+    data = get_datasource_of_bent_pipe_rtt_breakdown(cubes)
     output_filepath = os.path.join(OUTPUT_DIR, 'bent_pipe_latency_breakdown.agg_min.png')
     stats = plot_rtt_breakdown_swimlane_chart(data,
                                               directions=['dishy_to_gs', 'gs_to_pop'],
@@ -345,8 +283,8 @@ def plot_bent_pipe_rtt_breakdown(x_step: int = 25):
     return stats
 
 
-def plot_overall_rtt_breakdown(x_step: int = 25):
-    data = get_datasource_of_overall_rtt_breakdown()
+def plot_overall_rtt_breakdown(x_step: int = 25, cubes: Dict[str, TracerouteCube] = None):
+    data = get_datasource_of_overall_rtt_breakdown(cubes)
     output_filepath = os.path.join(OUTPUT_DIR, 'overall_latency_breakdown.agg_min.png')
     stats = plot_rtt_breakdown_swimlane_chart(data,
                                               directions=['dishy_to_gs', 'gs_to_pop', 'pop_to_endpoint', 'dishy_to_endpoint'],
@@ -361,8 +299,10 @@ def plot_overall_rtt_breakdown(x_step: int = 25):
 def main():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
-    bent_pipe_stats = plot_bent_pipe_rtt_breakdown()
-    overall_stats = plot_overall_rtt_breakdown()
+    # build the traceroute cube of each location once for all breakdowns
+    cubes = {location: read_traceroute_cube(location) for location in LOCATIONS}
+    bent_pipe_stats = plot_bent_pipe_rtt_breakdown(cubes=cubes)
+    overall_stats = plot_overall_rtt_breakdown(cubes=cubes)
     
     # You can now use these stats as needed
     # Example of accessing stats:
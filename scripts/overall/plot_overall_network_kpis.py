@@ -13,6 +13,9 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 from scripts.alaska_starlink_trip.configs import ROOT_DIR as ALASKA_ROOT_DIR
 from scripts.hawaii_starlink_trip.configs import ROOT_DIR as HAWAII_ROOT_DIR
 from scripts.constants import operator_color_map
+from scripts.utilities.analytics_store import AnalyticsStore, TraceType
+from scripts.utilities.distribution_cache import Distribution, DistributionCache
+from scripts.utilities.plot_scheduler import PlotScheduler
 
 location_conf = {
     'alaska': {
@@ -92,56 +95,17 @@ operator_conf = {
     },
 }
 
-def read_tput_data(root_dir: str, operator: str, protocol: str, direction: str):
-    tput_data_path = os.path.join(root_dir, 'throughput', f'{operator}_{protocol}_{direction}.csv')
-    if not os.path.exists(tput_data_path):
-        raise FileNotFoundError(f'Throughput data file not found: {tput_data_path}')
-    return pd.read_csv(tput_data_path)
-
-def aggregate_operator_tput_data(root_dir: str, operators: List[str], protocol: str, direction: str):
-    df = pd.DataFrame()
-    for operator in operators:
-        tput_data = read_tput_data(root_dir, operator, protocol, direction)
-        tput_data['operator'] = operator_conf[operator]['label']
-        df = pd.concat([df, tput_data], ignore_index=True)
-    return df
-
-def read_latency_data(root_dir: str, operator: str):
-    latency_data_path = os.path.join(root_dir, 'ping', f'{operator}_ping.csv')
-    if not os.path.exists(latency_data_path):
-        raise FileNotFoundError(f'Latency data file not found: {latency_data_path}')
-    return pd.read_csv(latency_data_path)
-
-def aggregate_operator_latency_data(root_dir: str, operators: List[str]):
-    df = pd.DataFrame()
-    for operator in operators:
-        latency_data = read_latency_data(root_dir, operator)
-        latency_data['operator'] = operator_conf[operator]['label']
-        df = pd.concat([df, latency_data], ignore_index=True)
+def to_operator_labels(df: pd.DataFrame) -> pd.DataFrame:
+    df['operator'] = df['operator'].map(lambda operator: operator_conf[operator]['label'])
     return df
 
 def aggregate_latency_data_by_location(locations: List[str]):
-    combined_data = pd.DataFrame()
-    for location in locations:
-        conf = location_conf[location]
-        latency_data = aggregate_operator_latency_data(conf['root_dir'], conf['operators'])
-        latency_data['location'] = location
-        combined_data = pd.concat([combined_data, latency_data], ignore_index=True)
-    return combined_data
+    store = AnalyticsStore(location_conf)
+    return to_operator_labels(store.query(TraceType.PING, locations=locations))
 
 def aggregate_tput_data_by_location(locations: List[str], protocol: str, direction: str):
-    combined_data = pd.DataFrame()
-    for location in locations:
-        conf = location_conf[location]
-        tcp_dl_tput_data = aggregate_operator_tput_data(
-            root_dir=conf['root_dir'], 
-            operators=conf['operators'], 
-            protocol=protocol, 
-            direction=direction
-        )
-        tcp_dl_tput_data['location'] = location
-        combined_data = pd.concat([combined_data, tcp_dl_tput_data], ignore_index=True)
-    return combined_data
+    store = AnalyticsStore(location_conf)
+    return to_operator_labels(store.query(TraceType.TPUT, locations=locations, protocol=protocol, direction=direction))
 
 def plot_metric_grid(
         data: Dict[str, pd.DataFrame],
@@ -186,19 +150,17 @@ def plot_metric_grid(
         min_val = float('inf')
         percentile = percentile_filter.get(metric_name, 100) if percentile_filter else 100
         
+        distributions = DistributionCache().get_distributions(data[metric_name], ['location', 'operator'], data_field)
         for location in locations_sorted:
-            plot_df = data[metric_name][data[metric_name]['location'] == location]
-
             needed_operators = list(map(lambda op: operator_conf[op]['label'], loc_conf[location]['operators']))
-            plot_df = plot_df[plot_df['operator'].isin(needed_operators)]
-
-            for op_label in plot_df['operator'].unique():
-                op_data = plot_df[plot_df['operator'] == op_label][data_field]
+            for (dist_location, op_label), distribution in distributions.items():
+                if dist_location != location or op_label not in needed_operators:
+                    continue
                 if percentile < 100:
-                    max_val = max(max_val, np.percentile(op_data, percentile))
+                    max_val = max(max_val, distribution.percentile(percentile))
                 else:
-                    max_val = max(max_val, np.max(op_data))
-                min_val = min(min_val, np.min(op_data))
+                    max_val = max(max_val, distribution.max())
+                min_val = min(min_val, distribution.min())
         
         col_max_values.append(max_val)
         col_min_values.append(min_val)
@@ -215,23 +177,20 @@ def plot_metric_grid(
     for row, location in enumerate(locations_sorted):
         for col, (metric_name, column_title, xlabel, data_field) in enumerate(metrics):
             ax = axes[row, col]
-            plot_df = data[metric_name][data[metric_name]['location'] == location]
-
+            distributions = DistributionCache().get_distributions(data[metric_name], ['location', 'operator'], data_field)
             needed_operators = list(map(lambda op: operator_conf[op]['label'], loc_conf[location]['operators']))
-            plot_df = plot_df[plot_df['operator'].isin(needed_operators)]
 
             percentile = percentile_filter.get(metric_name, 100) if percentile_filter else 100
             
             for _, op_conf in sorted(operator_conf.items(), key=lambda x: x[1]['order']):
                 operator_label = op_conf['label']
-                if operator_label in plot_df['operator'].unique():
-                    operator_data = plot_df[plot_df['operator'] == operator_label][data_field]
+                if operator_label in needed_operators and (location, operator_label) in distributions:
+                    distribution = distributions[(location, operator_label)]
                     
                     if percentile < 100:
-                        operator_data = operator_data[operator_data <= np.percentile(operator_data, percentile)]
+                        distribution = distribution.truncate(percentile)
                     
-                    data_sorted = np.sort(operator_data)
-                    cdf = np.arange(1, len(data_sorted) + 1) / len(data_sorted)
+                    data_sorted, cdf = distribution.get_cdf()
                     
                     ax.plot(
                         data_sorted,
@@ -350,15 +309,15 @@ def plot_metric_grid_flexible(
                 row_data = col_data
             
             operator_labels = list(map(lambda op: operator_conf[op]['label'], operator_conf.keys()))
-            row_data = row_data[row_data['operator'].isin(operator_labels)]
+            distributions = DistributionCache().get_distributions(row_data, ['operator'], x_field)
 
             for op_label in operator_labels:
-                op_data = row_data[row_data['operator'] == op_label][x_field]
-                if percentile_filter and len(op_data) > 0:
-                    max_val = max(max_val, np.percentile(op_data, percentile_filter))
+                op_distribution = distributions.get((op_label,), Distribution.merge([]))
+                if percentile_filter and len(op_distribution) > 0:
+                    max_val = max(max_val, op_distribution.percentile(percentile_filter))
                 else:
-                    max_val = max(max_val, np.max(op_data))
-                min_val = min(min_val, np.min(op_data))
+                    max_val = max(max_val, op_distribution.max())
+                min_val = min(min_val, op_distribution.min())
         
         col_max_values.append(max_val)
         col_min_values.append(min_val)
@@ -382,19 +341,17 @@ def plot_metric_grid_flexible(
             else:
                 col_data = plot_data
 
-            operator_labels = list(map(lambda op: operator_conf[op]['label'], operator_conf.keys()))
-            row_data = col_data[col_data['operator'].isin(operator_labels)]
+            distributions = DistributionCache().get_distributions(col_data, ['operator'], x_field)
             
             for _, op_conf in sorted(operator_conf.items(), key=lambda x: x[1]['order']):
                 operator_label = op_conf['label']
-                if operator_label in row_data['operator'].unique():
-                    operator_data = row_data[row_data['operator'] == operator_label][x_field]
+                if (operator_label,) in distributions:
+                    distribution = distributions[(operator_label,)]
                     
                     if percentile_filter:
-                        operator_data = operator_data[operator_data <= np.percentile(operator_data, percentile_filter)]
+                        distribution = distribution.truncate(percentile_filter)
                     
-                    data_sorted = np.sort(operator_data)
-                    cdf = np.arange(1, len(data_sorted) + 1) / len(data_sorted)
+                    data_sorted, cdf = distribution.get_cdf()
                     
                     ax.plot(
                         data_sorted,
@@ -805,7 +762,11 @@ def main():
     #     percentile_filter={'latency': 95}
     # )
     
-    plot_metric_grid_flexible(
+    # figures render in forked workers sharing the data loaded above
+    scheduler = PlotScheduler()
+    scheduler.add(
+        'all_operators_latency',
+        plot_metric_grid_flexible,
         plot_data=latency_data,
         row_conf={
             'latency': {
@@ -838,8 +799,12 @@ def main():
         x_step=25,
         output_filepath=os.path.join(output_dir, 'ak_hi_all_operators.latency.png')
     )
-
-    save_stats_network_kpi(tput_data, latency_data, location_conf, operator_conf, output_dir)
+    scheduler.add(
+        'network_kpi_stats',
+        save_stats_network_kpi,
+        tput_data, latency_data, location_conf, operator_conf, output_dir,
+    )
+    scheduler.run()
 
 
 if __name__ == '__main__':
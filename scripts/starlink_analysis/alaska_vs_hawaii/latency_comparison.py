@@ -5,7 +5,7 @@ import json
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 
-from scripts.math_utils import get_cdf
+from scripts.math_utils import MAX_CDF_POINTS, get_cdf
 from scripts.alaska_starlink_trip.configs import ROOT_DIR as ALASKA_ROOT_DIR
 from scripts.hawaii_starlink_trip.configs import ROOT_DIR as HAWAII_ROOT_DIR
 from scripts.maine_starlink_trip.configs import ROOT_DIR as MAINE_ROOT_DIR
@@ -71,7 +71,7 @@ def create_cdf_plot(
         logger.info(f"Plotting data for {location}. Data points: {len(subset)}")
         
         # Sort the data and calculate CDF
-        sorted_data, yvals = get_cdf(subset['rtt_ms'])
+        sorted_data, yvals = get_cdf(subset['rtt_ms'], max_points=MAX_CDF_POINTS)
         
         ax.plot(sorted_data, yvals, color=colors[i], label=f"{location.capitalize()}")
 
@@ -152,7 +152,7 @@ def plot_latency_comparison_by_weather(df: pd.DataFrame, output_file_path: str =
         for location in locations:
             weather_loc_df = df[(df['weather'] == weather) & (df['location'] == location)]['rtt_ms']
             if not weather_loc_df.empty:
-                xvals, yvals = get_cdf(weather_loc_df)
+                xvals, yvals = get_cdf(weather_loc_df, max_points=MAX_CDF_POINTS)
                 ax.plot(
                     xvals,
                     yvals,
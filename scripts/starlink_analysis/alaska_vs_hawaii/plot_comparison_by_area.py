@@ -10,6 +10,9 @@ from typing import Any, List, Dict
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 from scripts.constants import CommonField
 from scripts.logging_utils import create_logger
+from scripts.utilities.analytics_store import AnalyticsStore, TraceType
+from scripts.utilities.distribution_cache import Distribution, DistributionCache
+from scripts.utilities.plot_scheduler import PlotScheduler
 
 
 from scripts.alaska_starlink_trip.configs import ROOT_DIR as AL_DATASET_DIR
@@ -18,6 +21,7 @@ from scripts.hawaii_starlink_trip.configs import ROOT_DIR as HI_DATASET_DIR
 current_dir = os.path.dirname(os.path.abspath(__file__))
 output_dir = os.path.join(current_dir, './outputs')
 logger = create_logger('sl_by_area', filename=os.path.join(output_dir, 'plot_starlink_comparison_by_area.log'))
+distribution_cache = DistributionCache(cache_dir=os.path.join(output_dir, '.cache'))
 
 location_conf = {
     'alaska': {
@@ -101,97 +105,69 @@ protocol_conf = {
     }
 }
 
-def read_tput_data(root_dir: str, operator: str, protocol: str = None, direction: str = None):
-    input_csv_path = os.path.join(root_dir, 'throughput', f'{operator}_{protocol}_{direction}.csv')
-    df = pd.read_csv(input_csv_path)
-    df[CommonField.APP_TPUT_PROTOCOL] = protocol
-    df[CommonField.APP_TPUT_DIRECTION] = direction
-    return df
-
-def aggregate_tput_data(
-        root_dir: str, 
-        operators: List[str], 
-        protocol: str = None, 
-        direction: str = None, 
-    ):
-    data = pd.DataFrame()
-    for operator in operators:
-        df = read_tput_data(
-            root_dir=root_dir, 
-            operator=operator,
-            protocol=protocol, 
-            direction=direction, 
-        )
-        df['operator'] = operator
-        data = pd.concat([data, df])
-    return data
-
 def aggregate_tput_data_by_location(
         locations: List[str], 
         protocol: str = None, 
         direction: str = None, 
+        filters: Dict[str, Any] = None,
     ):
-    data = pd.DataFrame()
-    for location in locations:
-        conf = location_conf[location]
-        df = aggregate_tput_data(
-            root_dir=conf['root_dir'], 
-            operators=conf['operators'], 
-            protocol=protocol, 
-            direction=direction, 
-        )
-        df['location'] = location
-        data = pd.concat([data, df])
-    return data
-
-def read_latency_data(root_dir: str, operator: str, protocol: str = 'icmp'):
-    if protocol == 'icmp':
-        input_csv_path = os.path.join(root_dir, 'ping', f'{operator}_ping.csv')
-    else:
-        raise ValueError(f'Unsupported protocol: {protocol}')
-
-    df = pd.read_csv(input_csv_path)
-    return df
-
-def aggregate_latency_data_by_operator(
-        root_dir: str,
-        operators: List[str], 
-        protocol: str = 'icmp',
-    ):
-    data = pd.DataFrame()
-    for operator in operators:
-        df = read_latency_data(
-            root_dir=root_dir, 
-            operator=operator, 
-            protocol=protocol
-        )
-        df[CommonField.OPERATOR] = operator
-        data = pd.concat([data, df])
-    return data
+    """
+    :param filters: column -> value or list of values to keep, such as {CommonField.AREA_TYPE: 'rural'}
+    """
+    store = AnalyticsStore(location_conf)
+    return store.query(
+        TraceType.TPUT,
+        locations=locations,
+        protocol=protocol,
+        direction=direction,
+        filters=filters,
+    )
 
 def aggregate_latency_data_by_location(
         locations: List[str], 
         protocol: str = 'icmp',
+        filters: Dict[str, Any] = None,
     ):
-    data = pd.DataFrame()
-    for location in locations:
-        df = aggregate_latency_data_by_operator(
-            root_dir=location_conf[location]['root_dir'],
-            operators=location_conf[location]['operators'], 
-            protocol=protocol
-        )
-        df[CommonField.LOCATION] = location
-        data = pd.concat([data, df])
-    return data
+    if protocol != 'icmp':
+        raise ValueError(f'Unsupported protocol: {protocol}')
+    store = AnalyticsStore(location_conf)
+    return store.query(TraceType.PING, locations=locations, filters=filters)
+
+# area types of the data in each plotted area type
+area_groups = {
+    'urban': ['urban', 'suburban'],
+    'rural': ['rural'],
+}
 
 def filter_data_by_area(df: pd.DataFrame, area_type: str):
-    if area_type == 'urban':
-        mask = (df[CommonField.AREA_TYPE] == 'urban') | (df[CommonField.AREA_TYPE] == 'suburban')
-    elif area_type == 'rural':
-        mask = df[CommonField.AREA_TYPE] == 'rural'
-    else:
+    if area_type not in area_groups:
         raise ValueError(f'Unsupported area type: {area_type}')
-    return df[mask]
+    return df[df[CommonField.AREA_TYPE].isin(area_groups[area_type])]
+
+def get_area_distributions(
+        df: pd.DataFrame,
+        group_fields: List[str],
+        data_field: str,
+        key: str,
+    ) -> Dict[tuple, Distribution]:
+    """
+    Sorted distributions of data_field per (area_type, *group_fields), shared by the plots and stats of the same data
+    """
+    distributions = distribution_cache.get_distributions(
+        df,
+        group_fields=[CommonField.AREA_TYPE] + group_fields,
+        value_field=data_field,
+        key=f'{key}.{data_field}.' + '_'.join(group_fields),
+    )
+    area_distributions = {}
+    for area_type, data_area_types in area_groups.items():
+        grouped = {}
+        for (data_area_type, *group), distribution in distributions.items():
+            if data_area_type in data_area_types:
+                grouped.setdefault(tuple(group), []).append(distribution)
+        for group, group_distributions in grouped.items():
+            area_distributions[(area_type, *group)] = Distribution.merge(group_distributions)
+    return area_distributions
 
 def plot_tput_metric_grid(
         data: Dict[str, pd.DataFrame],
@@ -229,18 +205,18 @@ def plot_tput_metric_grid(
         min_val = float('inf')
         percentile = percentile_filter.get(metric_name, 100) if percentile_filter else 100
         
+        distributions = get_area_distributions(
+            data[metric_name], [CommonField.LOCATION, CommonField.APP_TPUT_PROTOCOL], data_field, key=metric_name)
         for area in area_types:
-            df = data[metric_name]
-            plot_df = filter_data_by_area(df, area)
-            for _, proto_df in plot_df.groupby([CommonField.LOCATION, CommonField.APP_TPUT_PROTOCOL]):
-                filtered_data = proto_df[data_field]
-                
-                if len(filtered_data) >= data_sample_threshold:
+            for (area_type, _, _), distribution in distributions.items():
+                if area_type != area:
+                    continue
+                if len(distribution) >= data_sample_threshold:
                     if percentile < 100:
-                        max_val = max(max_val, np.percentile(filtered_data, percentile))
+                        max_val = max(max_val, distribution.percentile(percentile))
                     else:
-                        max_val = max(max_val, np.max(filtered_data))
-                    min_val = min(min_val, np.min(filtered_data))
+                        max_val = max(max_val, distribution.max())
+                    min_val = min(min_val, distribution.min())
         
         col_max_values.append(max_val)
         col_min_values.append(min_val)
@@ -290,25 +266,23 @@ def plot_tput_metric_grid(
     for row, area_type in enumerate(area_types):
         for col, (metric_name, column_title, xlabel, data_field) in enumerate(metrics):
             ax = axes[row, col]
-            df = data[metric_name]
-            plot_df = filter_data_by_area(df, area_type)
+            distributions = get_area_distributions(
+                data[metric_name], [CommonField.LOCATION, CommonField.APP_TPUT_PROTOCOL], data_field, key=metric_name)
             percentile = percentile_filter.get(metric_name, 100) if percentile_filter else 100
             
             # Plot each location+protocol combination
             for location in sorted(location_conf.keys(), key=lambda x: location_conf[x]['order']):
                 for protocol in sorted(protocol_conf.keys(), key=lambda x: protocol_conf[x]['order']):
-                    mask = (plot_df[CommonField.LOCATION] == location) & (plot_df[CommonField.APP_TPUT_PROTOCOL] == protocol)
-                    filtered_data = plot_df[mask][data_field]
+                    distribution = distributions.get((area_type, location, protocol), Distribution.merge([]))
 
-                    if len(filtered_data) < data_sample_threshold:
-                        logger.warn(f'{area_type}-{location}-{protocol} data sample is less than required threshold, skip plotting: {len(filtered_data)} < {data_sample_threshold}')
+                    if len(distribution) < data_sample_threshold:
+                        logger.warn(f'{area_type}-{location}-{protocol} data sample is less than required threshold, skip plotting: {len(distribution)} < {data_sample_threshold}')
                         continue
                     
                     if percentile < 100:
-                        filtered_data = filtered_data[filtered_data <= np.percentile(filtered_data, percentile)]
+                        distribution = distribution.truncate(percentile)
                     
-                    data_sorted = np.sort(filtered_data)
-                    cdf = np.arange(1, len(data_sorted) + 1) / len(data_sorted)
+                    data_sorted, cdf = distribution.get_cdf()
                     
                     ax.plot(
                         data_sorted,
@@ -391,18 +365,18 @@ def plot_tput_metric_grid_reversed(
         min_val = float('inf')
         percentile = percentile_filter.get(metric_name, 100) if percentile_filter else 100
         
-        df = data[metric_name]
+        distributions = get_area_distributions(
+            data[metric_name], [CommonField.LOCATION, CommonField.APP_TPUT_PROTOCOL], data_field, key=metric_name)
         for area in area_types:
-            plot_df = filter_data_by_area(df, area)
-            for _, proto_df in plot_df.groupby([CommonField.LOCATION, CommonField.APP_TPUT_PROTOCOL]):
-                filtered_data = proto_df[data_field]
-                
-                if len(filtered_data) >= data_sample_threshold:
+            for (area_type, _, _), distribution in distributions.items():
+                if area_type != area:
+                    continue
+                if len(distribution) >= data_sample_threshold:
                     if percentile < 100:
-                        max_val = max(max_val, np.percentile(filtered_data, percentile))
+                        max_val = max(max_val, distribution.percentile(percentile))
                     else:
-                        max_val = max(max_val, np.max(filtered_data))
-                    min_val = min(min_val, np.min(filtered_data))
+                        max_val = max(max_val, distribution.max())
+                    min_val = min(min_val, distribution.min())
         
         col_max_values.extend([max_val] * n_areas)
         col_min_values.extend([min_val] * n_areas)
@@ -449,28 +423,26 @@ def plot_tput_metric_grid_reversed(
     
     # Second pass: create plots
     for row, (metric_name, column_title, xlabel, data_field) in enumerate(metrics):
-        df = data[metric_name]
+        distributions = get_area_distributions(
+            data[metric_name], [CommonField.LOCATION, CommonField.APP_TPUT_PROTOCOL], data_field, key=metric_name)
         percentile = percentile_filter.get(metric_name, 100) if percentile_filter else 100
         
         for col, area_type in enumerate(area_types):
             ax = axes[row, col]
-            plot_df = filter_data_by_area(df, area_type)
             
             # Plot each location+protocol combination
             for location in sorted(location_conf.keys(), key=lambda x: location_conf[x]['order']):
                 for protocol in sorted(protocol_conf.keys(), key=lambda x: protocol_conf[x]['order']):
-                    mask = (plot_df[CommonField.LOCATION] == location) & (plot_df[CommonField.APP_TPUT_PROTOCOL] == protocol)
-                    filtered_data = plot_df[mask][data_field]
+                    distribution = distributions.get((area_type, location, protocol), Distribution.merge([]))
 
-                    if len(filtered_data) < data_sample_threshold:
-                        logger.warn(f'{area_type}-{location}-{protocol} data sample is less than required threshold, skip plotting: {len(filtered_data)} < {data_sample_threshold}')
+                    if len(distribution) < data_sample_threshold:
+                        logger.warn(f'{area_type}-{location}-{protocol} data sample is less than required threshold, skip plotting: {len(distribution)} < {data_sample_threshold}')
                         continue
                     
                     if percentile < 100:
-                        filtered_data = filtered_data[filtered_data <= np.percentile(filtered_data, percentile)]
+                        distribution = distribution.truncate(percentile)
                     
-                    data_sorted = np.sort(filtered_data)
-                    cdf = np.arange(1, len(data_sorted) + 1) / len(data_sorted)
+                    data_sorted, cdf = distribution.get_cdf()
                     
                     ax.plot(
                         data_sorted,
@@ -531,6 +503,8 @@ def save_tput_stats_to_json(
         stats[metric_name] = {}
         df = data[metric_name]
         grouped_df = df.groupby([CommonField.LOCATION, CommonField.APP_TPUT_PROTOCOL, CommonField.APP_TPUT_DIRECTION])
+        distributions = get_area_distributions(
+            df, [CommonField.LOCATION, CommonField.APP_TPUT_PROTOCOL], data_field, key=metric_name)
         
         # First level: Area Type
         for area_type in area_conf.keys():
@@ -545,23 +519,14 @@ def save_tput_stats_to_json(
                 
                 # Third level: Protocol
                 for protocol in loc_df[CommonField.APP_TPUT_PROTOCOL].unique():
-                    proto_df = loc_df[loc_df[CommonField.APP_TPUT_PROTOCOL] == protocol]
-                    proto_data = proto_df[data_field]
-                    if len(proto_data) == 0:
+                    distribution = distributions.get((area_type, location, protocol))
+                    if distribution is None or len(distribution) == 0:
                         continue
                     
                     total_count = len(grouped_df.get_group((location, protocol, metric_name)))
                     stats[metric_name][area_type][location][protocol] = {
-                        'min': float(np.min(proto_data)),
-                        'max': float(np.max(proto_data)),
-                        'median': float(np.median(proto_data)),
-                        'mean': float(np.mean(proto_data)),
-                        'percentile_5': float(np.percentile(proto_data, 5)),
-                        'percentile_25': float(np.percentile(proto_data, 25)),
-                        'percentile_75': float(np.percentile(proto_data, 75)),
-                        'percentile_95': float(np.percentile(proto_data, 95)),
-                        'sample_count': len(proto_data),
-                        'percent_of_total': len(proto_data) / total_count * 100,
+                        **distribution.get_stats(),
+                        'percent_of_total': len(distribution) / total_count * 100,
                     }
     
     # Save to JSON file
@@ -656,18 +621,17 @@ def plot_latency_metric_grid(
         min_val = float('inf')
         percentile = percentile_filter.get(metric_name, 100) if percentile_filter else 100
         
+        distributions = get_area_distributions(data[metric_name], [CommonField.LOCATION], data_field, key=metric_name)
         for area in area_types:
-            df = data[metric_name]
-            plot_df = filter_data_by_area(df, area)
-            for _, loc_df in plot_df.groupby([CommonField.LOCATION]):
-                filtered_data = loc_df[data_field]
-                
-                if len(filtered_data) >= data_sample_threshold:
+            for (area_type, _), distribution in distributions.items():
+                if area_type != area:
+                    continue
+                if len(distribution) >= data_sample_threshold:
                     if percentile < 100:
-                        max_val = max(max_val, np.percentile(filtered_data, percentile))
+                        max_val = max(max_val, distribution.percentile(percentile))
                     else:
-                        max_val = max(max_val, np.max(filtered_data))
-                    min_val = min(min_val, np.min(filtered_data))
+                        max_val = max(max_val, distribution.max())
+                    min_val = min(min_val, distribution.min())
         
         col_max_values.append(max_val)
         col_min_values.append(min_val)
@@ -700,24 +664,21 @@ def plot_latency_metric_grid(
     for row, area_type in enumerate(area_types):
         for col, (metric_name, column_title, xlabel, data_field) in enumerate(metrics):
             ax = axes[row, col]
-            df = data[metric_name]
-            plot_df = filter_data_by_area(df, area_type)
+            distributions = get_area_distributions(data[metric_name], [CommonField.LOCATION], data_field, key=metric_name)
             percentile = percentile_filter.get(metric_name, 100) if percentile_filter else 100
             
             # Plot each location
             for location in sorted(location_conf.keys(), key=lambda x: location_conf[x]['order']):
-                mask = plot_df[CommonField.LOCATION] == location
-                filtered_data = plot_df[mask][data_field]
+                distribution = distributions.get((area_type, location), Distribution.merge([]))
 
-                if len(filtered_data) < data_sample_threshold:
-                    logger.warn(f'{area_type}-{location} data sample is less than required threshold, skip plotting: {len(filtered_data)} < {data_sample_threshold}')
+                if len(distribution) < data_sample_threshold:
+                    logger.warn(f'{area_type}-{location} data sample is less than required threshold, skip plotting: {len(distribution)} < {data_sample_threshold}')
                     continue
                 
                 if percentile < 100:
-                    filtered_data = filtered_data[filtered_data <= np.percentile(filtered_data, percentile)]
+                    distribution = distribution.truncate(percentile)
                 
-                data_sorted = np.sort(filtered_data)
-                cdf = np.arange(1, len(data_sorted) + 1) / len(data_sorted)
+                data_sorted, cdf = distribution.get_cdf()
                 
                 ax.plot(
                     data_sorted,
@@ -782,6 +743,7 @@ def save_latency_stats_to_json(
         stats[metric_name] = {}
         df = data[metric_name]
         grouped_df = df.groupby([CommonField.LOCATION])
+        distributions = get_area_distributions(df, [CommonField.LOCATION], data_field, key=metric_name)
         
         # First level: Area Type
         for area_type in area_conf.keys():
@@ -790,24 +752,14 @@ def save_latency_stats_to_json(
             
             # Second level: Location
             for location in area_df[CommonField.LOCATION].unique():
-                loc_df = area_df[area_df[CommonField.LOCATION] == location]
-                loc_data = loc_df[data_field]
-                
-                if len(loc_data) == 0:
+                distribution = distributions.get((area_type, location))
+                if distribution is None or len(distribution) == 0:
                     continue
                 
                 total_count = len(grouped_df.get_group((location,)))
                 stats[metric_name][area_type][location] = {
-                    'min': float(np.min(loc_data)),
-                    'max': float(np.max(loc_data)),
-                    'median': float(np.median(loc_data)),
-                    'mean': float(np.mean(loc_data)),
-                    'percentile_5': float(np.percentile(loc_data, 5)),
-                    'percentile_25': float(np.percentile(loc_data, 25)),
-                    'percentile_75': float(np.percentile(loc_data, 75)),
-                    'percentile_95': float(np.percentile(loc_data, 95)),
-                    'sample_count': len(loc_data),
-                    'percent_of_total': len(loc_data) / total_count * 100,
+                    **distribution.get_stats(),
+                    'percent_of_total': len(distribution) / total_count * 100,
                 }
     
     # Save to JSON file
@@ -849,20 +801,31 @@ def plot_latency_by_area():
 def main():
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    
-    plot_tput_direction_by_area(
+
+    # loaded once here and shared by the forked plot workers
+    store = AnalyticsStore(location_conf)
+    store.preload(TraceType.TPUT, locations=['alaska', 'hawaii'])
+    store.preload(TraceType.PING, locations=['alaska', 'hawaii'])
+
+    scheduler = PlotScheduler(logger=logger)
+    scheduler.add(
+        'tput_downlink_by_area',
+        plot_tput_direction_by_area,
         direction='downlink',
         direction_label='Downlink',
         x_step=50,
         reversed_layout=True,
     )
-    plot_tput_direction_by_area(
+    scheduler.add(
+        'tput_uplink_by_area',
+        plot_tput_direction_by_area,
         direction='uplink',
         direction_label='Uplink',
         x_step=10,
         reversed_layout=True,
     )
-    plot_latency_by_area()
+    scheduler.add('latency_by_area', plot_latency_by_area)
+    scheduler.run()
 
 if __name__ == '__main__':
     main()
@@ -13,6 +13,7 @@ from scripts.constants import CommonField
 from scripts.alaska_starlink_trip.configs import ROOT_DIR as ALASKA_ROOT_DIR
 from scripts.hawaii_starlink_trip.configs import ROOT_DIR as HAWAII_ROOT_DIR
 from scripts.maine_starlink_trip.configs import ROOT_DIR as MAINE_ROOT_DIR
+from scripts.utilities.plot_scheduler import PlotScheduler
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 output_dir = os.path.join(current_dir, "outputs")
@@ -55,39 +56,64 @@ area_conf = {
 }
 
 
-def get_total_duration_s(df: pd.DataFrame):
-    # Drop rows where SEGMENT_ID or LOCAL_DT is NA
-    clean_df = df.dropna(subset=[CommonField.SEGMENT_ID])
-    grouped_df = clean_df.groupby([CommonField.SEGMENT_ID])
-    total_duration_s = 0
-    for _, segment_df in grouped_df:
-        first_utc_ts = segment_df[CommonField.LOCAL_DT].min()
-        last_utc_ts = segment_df[CommonField.LOCAL_DT].max()
-        segment_duration_s = (last_utc_ts - first_utc_ts).total_seconds()
-        total_duration_s += segment_duration_s
-    return total_duration_s
+PLOT_LOCATION = "plot_location"
+PLOT_AREA = "plot_area"
+OUTAGE_START = "outage_start_time_ns"
+OUTAGE_DURATION = "outage.duration_ns"
+OUTAGE_CAUSE = "outage_cause"
 
 
-def get_outage_duration_s(df: pd.DataFrame):
-    # Drop rows where outage_start_time_ns or outage.duration_ns is NA
-    clean_df = df.dropna(subset=["outage_start_time_ns", "outage.duration_ns"])
-    grouped_df = clean_df.groupby(["outage_start_time_ns"])
-    total_outage_duration_s = 0
-    for _, outage_df in grouped_df:
-        max_duration = outage_df["outage.duration_ns"].max()
-        max_duration_sec = max_duration / 1e9
-        total_outage_duration_s += max_duration_sec
-    return total_outage_duration_s
+def aggregate_outage_tables(plot_data: Dict) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Compute every outage rate and outage cause duration in one grouped pass over all (location, area) data.
 
+    Returns:
+        outage_rate_df: indexed by (location, area) with total_duration_s, outage_duration_s and outage_fraction,
+            an area without rows has zero durations and a NaN fraction
+        cause_duration_s: total outage duration in seconds indexed by (location, area, outage_cause)
+    """
+    keys = [PLOT_LOCATION, PLOT_AREA]
+    columns = [CommonField.SEGMENT_ID, CommonField.LOCAL_DT, OUTAGE_START, OUTAGE_DURATION, OUTAGE_CAUSE]
+    frames = []
+    for location, area_data in plot_data.items():
+        for area, df in area_data.items():
+            frames.append(df[columns].assign(**{PLOT_LOCATION: location, PLOT_AREA: area}))
+    all_df = pd.concat(frames, ignore_index=True)
+    index = pd.MultiIndex.from_tuples(
+        [(location, area) for location, area_data in plot_data.items() for area in area_data.keys()],
+        names=keys,
+    )
+
+    segment_df = all_df.dropna(subset=[CommonField.SEGMENT_ID]) \
+        .groupby(keys + [CommonField.SEGMENT_ID])[CommonField.LOCAL_DT].agg(["min", "max"])
+    segment_duration_s = pd.to_timedelta(segment_df["max"] - segment_df["min"]).dt.total_seconds()
+
+    outage_df = all_df.dropna(subset=[OUTAGE_START, OUTAGE_DURATION])
+    outage_duration_s = outage_df.groupby(keys + [OUTAGE_START])[OUTAGE_DURATION].max() / 1e9
+
+    outage_rate_df = pd.DataFrame({
+        "total_duration_s": segment_duration_s.groupby(level=keys).sum().reindex(index, fill_value=0.0),
+        "outage_duration_s": outage_duration_s.groupby(level=keys).sum().reindex(index, fill_value=0.0),
+    })
+    outage_rate_df["outage_fraction"] = outage_rate_df["outage_duration_s"] / outage_rate_df["total_duration_s"]
 
-def calculate_outage_fraction(df: pd.DataFrame):
-    total_duration_s = get_total_duration_s(df)
-    total_outage_duration_s = get_outage_duration_s(df)
-    return total_outage_duration_s / total_duration_s
+    cause_df = outage_df.dropna(subset=[OUTAGE_CAUSE])
+    cause_duration_s = cause_df.groupby(keys + [OUTAGE_CAUSE, OUTAGE_START])[OUTAGE_DURATION].max() / 1e9
+    cause_duration_s = cause_duration_s.groupby(level=keys + [OUTAGE_CAUSE]).sum()
+    return outage_rate_df, cause_duration_s
+
+
+def get_locations_and_areas(outage_rate_df: pd.DataFrame, location_conf: Dict, area_conf: Dict) -> List[Tuple[str, List[str]]]:
+    res = []
+    locations = outage_rate_df.index.get_level_values(PLOT_LOCATION).unique()
+    for location in sorted(locations, key=lambda x: location_conf[x]["order"]):
+        areas = outage_rate_df.loc[location].index.tolist()
+        res.append((location, sorted(areas, key=lambda x: area_conf[x]["order"])))
+    return res
 
 
 def plot_outage_rate_by_area(
-    plot_data: Dict,
+    outage_rate_df: pd.DataFrame,
     location_conf: Dict,
     area_conf: Dict,
     output_dir: str,
@@ -96,21 +122,20 @@ def plot_outage_rate_by_area(
     fig, ax = plt.subplots(figsize=(4, 3))
     
     # Calculate bar positions
-    n_locations = len(plot_data)
+    locations_and_areas = get_locations_and_areas(outage_rate_df, location_conf, area_conf)
+    n_locations = len(locations_and_areas)
     n_areas = len(area_conf)
     width = 0.3  # Width of bars
     
-    # Calculate outage rates and prepare plotting data
+    # Read outage rates from the precomputed table
     x_positions = np.arange(n_locations)
     outage_rates = {
-        location: {} for location in plot_data.keys()
+        location: {} for location, _ in locations_and_areas
     }
     
-    for location in plot_data.keys():
-        area_data = plot_data[location]
-        for area in area_data.keys():
-            loc_area_df = area_data[area]
-            outage_fraction = calculate_outage_fraction(loc_area_df)
+    for location, areas in locations_and_areas:
+        for area in areas:
+            outage_fraction = outage_rate_df.loc[(location, area), "outage_fraction"]
             outage_rates[location][area] = round(outage_fraction * 100, 2)
     
     # Track whether we've added labels to legend
@@ -140,7 +165,7 @@ def plot_outage_rate_by_area(
     # Set x-axis ticks and labels
     ax.set_xticks(
         x_positions,
-        [location_conf[loc]["label"] for loc in sorted(plot_data.keys(), key=lambda x: location_conf[x]["order"])]
+        [location_conf[loc]["label"] for loc, _ in locations_and_areas]
     )
     
     # Add legend
@@ -153,22 +178,15 @@ def plot_outage_rate_by_area(
     print(f"Saved outage rate by area plot to {output_path}")
     plt.close()
 
-def get_duration_map_of_outage_causes(df: pd.DataFrame) -> Dict[str, float]:
-    # Drop rows where outage cause or duration is NA
-    clean_df = df.dropna(subset=["outage_cause", "outage_start_time_ns", "outage.duration_ns"])
-    
-    # Group by outage cause and calculate total duration for each cause
-    cause_groups = clean_df.groupby(["outage_cause", "outage_start_time_ns"])
-    
-    cause_duration_map = {}
-    for (cause, _), group_df in cause_groups:
-        duration_s = group_df["outage.duration_ns"].max() / 1e9
-        cause_duration_map[cause] = cause_duration_map.get(cause, 0) + duration_s
-    
-    return cause_duration_map
+def get_duration_map_of_outage_causes(cause_duration_s: pd.Series, location: str, area: str) -> Dict[str, float]:
+    # Total outage duration for each cause of one (location, area) from the precomputed table
+    if (location, area) not in cause_duration_s.index.droplevel(OUTAGE_CAUSE):
+        return {}
+    return cause_duration_s.loc[(location, area)].to_dict()
 
 def plot_outage_reason_distribution_by_area_with_white_list(
-    plot_data: Dict,
+    outage_rate_df: pd.DataFrame,
+    cause_duration_s: pd.Series,
     location_conf: Dict,
     area_conf: Dict,
     output_dir: str,
@@ -192,10 +210,10 @@ def plot_outage_reason_distribution_by_area_with_white_list(
     x_labels = []
     x_positions = []
     pos = 0
+    locations_and_areas = get_locations_and_areas(outage_rate_df, location_conf, area_conf)
     
-    for location in sorted(plot_data.keys(), key=lambda x: location_conf[x]["order"]):
-        area_data = plot_data[location]
-        for area in sorted(area_data.keys(), key=lambda x: area_conf[x]["order"]):
+    for location, areas in locations_and_areas:
+        for area in areas:
             x_labels.append(f"{location_conf[location]['label']} {area_conf[area]['label']}")
             x_positions.append(pos)
             pos += 1
@@ -203,11 +221,9 @@ def plot_outage_reason_distribution_by_area_with_white_list(
     # Plot stacked bars
     bar_width = 0.6
     bar_idx = 0
-    for location in sorted(plot_data.keys(), key=lambda x: location_conf[x]["order"]):
-        area_data = plot_data[location]
-        for area in sorted(area_data.keys(), key=lambda x: area_conf[x]["order"]):
-            df = area_data[area]
-            cause_duration_map = get_duration_map_of_outage_causes(df)
+    for location, areas in locations_and_areas:
+        for area in areas:
+            cause_duration_map = get_duration_map_of_outage_causes(cause_duration_s, location, area)
             
             # Filter for whitelisted causes and calculate total duration
             filtered_duration_map = {
@@ -265,19 +281,17 @@ def filter_data_by_area(df: pd.DataFrame, area_type: str):
     return df[mask]
 
 def save_outage_rate_stats(
-    plot_data: Dict,
+    outage_rate_df: pd.DataFrame,
     location_conf: Dict,
     area_conf: Dict,
     output_dir: str,
 ):
     stats = {}
-    for location in sorted(plot_data.keys(), key=lambda x: location_conf[x]["order"]):
+    for location, areas in get_locations_and_areas(outage_rate_df, location_conf, area_conf):
         stats[location] = {}
-        area_data = plot_data[location]
-        for area in sorted(area_data.keys(), key=lambda x: area_conf[x]["order"]):
-            df = area_data[area]
-            total_duration = get_total_duration_s(df)
-            outage_duration = get_outage_duration_s(df)
+        for area in areas:
+            total_duration = float(outage_rate_df.loc[(location, area), "total_duration_s"])
+            outage_duration = float(outage_rate_df.loc[(location, area), "outage_duration_s"])
             outage_percentage = (outage_duration / total_duration * 100) if total_duration > 0 else 0
             
             stats[location][area] = {
@@ -291,7 +305,8 @@ def save_outage_rate_stats(
         json.dump(stats, f, indent=2)
 
 def save_outage_distribution_stats_with_white_list(
-    plot_data: Dict,
+    outage_rate_df: pd.DataFrame,
+    cause_duration_s: pd.Series,
     location_conf: Dict,
     area_conf: Dict,
     output_dir: str,
@@ -299,12 +314,10 @@ def save_outage_distribution_stats_with_white_list(
     whitelist_causes = ["NO_SCHEDULE", "OBSTRUCTED"]
     stats = {}
     
-    for location in sorted(plot_data.keys(), key=lambda x: location_conf[x]["order"]):
+    for location, areas in get_locations_and_areas(outage_rate_df, location_conf, area_conf):
         stats[location] = {}
-        area_data = plot_data[location]
-        for area in sorted(area_data.keys(), key=lambda x: area_conf[x]["order"]):
-            df = area_data[area]
-            cause_duration_map = get_duration_map_of_outage_causes(df)
+        for area in areas:
+            cause_duration_map = get_duration_map_of_outage_causes(cause_duration_s, location, area)
             
             # Filter for whitelisted causes
             filtered_duration_map = {
@@ -356,34 +369,42 @@ def main():
         },
     }
 
-    # Plot and save outage rate stats
-    plot_outage_rate_by_area(
-        plot_data=plot_data,
+    outage_rate_df, cause_duration_s = aggregate_outage_tables(plot_data)
+
+    # The tables are aggregated once, the figures render in forked workers sharing them
+    scheduler = PlotScheduler()
+    scheduler.add(
+        "outage_rate_by_area",
+        plot_outage_rate_by_area,
+        outage_rate_df=outage_rate_df,
         location_conf=location_conf,
         area_conf=area_conf,
         output_dir=output_dir,
     )
-    save_outage_rate_stats(
-        plot_data=plot_data,
+    scheduler.add(
+        "outage_reason_distribution_by_area",
+        plot_outage_reason_distribution_by_area_with_white_list,
+        outage_rate_df=outage_rate_df,
+        cause_duration_s=cause_duration_s,
         location_conf=location_conf,
         area_conf=area_conf,
         output_dir=output_dir,
     )
+    scheduler.run()
 
-    # Plot and save filtered outage distribution stats
-    plot_outage_reason_distribution_by_area_with_white_list(
-        plot_data=plot_data,
+    save_outage_rate_stats(
+        outage_rate_df=outage_rate_df,
         location_conf=location_conf,
         area_conf=area_conf,
         output_dir=output_dir,
     )
     save_outage_distribution_stats_with_white_list(
-        plot_data=plot_data,
+        outage_rate_df=outage_rate_df,
+        cause_duration_s=cause_duration_s,
         location_conf=location_conf,
         area_conf=area_conf,
         output_dir=output_dir,
     )
 
-
 if __name__ == "__main__":
     main()
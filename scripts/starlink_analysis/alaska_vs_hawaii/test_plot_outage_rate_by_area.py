@@ -0,0 +1,66 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.constants import CommonField
+from scripts.starlink_analysis.alaska_vs_hawaii.plot_outage_rate_by_area import OUTAGE_CAUSE, OUTAGE_DURATION, \
+    OUTAGE_START, aggregate_outage_tables
+
+
+def create_metric_df(local_dts, segment_ids, outage_starts, outage_durations, outage_causes):
+    return pd.DataFrame({
+        CommonField.SEGMENT_ID: segment_ids,
+        CommonField.LOCAL_DT: pd.to_datetime(local_dts, format='ISO8601'),
+        OUTAGE_START: outage_starts,
+        OUTAGE_DURATION: outage_durations,
+        OUTAGE_CAUSE: outage_causes,
+    })
+
+
+class TestAggregateOutageTables(unittest.TestCase):
+    def setUp(self):
+        # Alaska and Hawaii local times have different UTC offsets
+        self.alaska_df = create_metric_df(
+            ['2024-06-21T10:00:00-08:00', '2024-06-21T10:00:10-08:00', '2024-06-21T10:00:30-08:00',
+             '2024-06-21T10:00:40-08:00'],
+            ['0:1', '0:1', '2:3', '2:3'],
+            [1.0, 1.0, 2.0, np.nan],
+            [2e9, 3e9, 1e9, np.nan],
+            ['OBSTRUCTED', 'OBSTRUCTED', 'NO_SCHEDULE', None],
+        )
+        self.hawaii_df = create_metric_df(
+            ['2024-07-01T10:00:00-10:00', '2024-07-01T10:00:20-10:00'],
+            ['0:1', '0:1'],
+            [5.0, np.nan],
+            [4e9, np.nan],
+            ['NO_SCHEDULE', None],
+        )
+
+    def test_aggregate_outage_tables(self):
+        outage_rate_df, cause_duration_s = aggregate_outage_tables({
+            'alaska': {'urban': self.alaska_df, 'rural': self.alaska_df.iloc[0:0]},
+            'hawaii': {'urban': self.hawaii_df},
+        })
+
+        self.assertEqual([('alaska', 'urban'), ('alaska', 'rural'), ('hawaii', 'urban')], outage_rate_df.index.tolist())
+        # segments of 10s and 10s, outages of max 3s and 1s
+        self.assertEqual([20.0, 0.0, 20.0], outage_rate_df['total_duration_s'].tolist())
+        self.assertEqual([4.0, 0.0, 4.0], outage_rate_df['outage_duration_s'].tolist())
+        self.assertEqual(0.2, outage_rate_df.loc[('alaska', 'urban'), 'outage_fraction'])
+        self.assertTrue(np.isnan(outage_rate_df.loc[('alaska', 'rural'), 'outage_fraction']))
+        self.assertEqual(0.2, outage_rate_df.loc[('hawaii', 'urban'), 'outage_fraction'])
+
+        self.assertEqual({
+            ('alaska', 'urban', 'NO_SCHEDULE'): 1.0,
+            ('alaska', 'urban', 'OBSTRUCTED'): 3.0,
+            ('hawaii', 'urban', 'NO_SCHEDULE'): 4.0,
+        }, cause_duration_s.to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
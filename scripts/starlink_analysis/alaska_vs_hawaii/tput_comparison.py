@@ -6,7 +6,7 @@ import json
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 
 from scripts.logging_utils import create_logger
-from scripts.math_utils import get_cdf
+from scripts.math_utils import MAX_CDF_POINTS, get_cdf
 from scripts.alaska_starlink_trip.configs import ROOT_DIR as ALASKA_ROOT_DIR
 from scripts.hawaii_starlink_trip.configs import ROOT_DIR as HAWAII_ROOT_DIR
 from scripts.maine_starlink_trip.configs import ROOT_DIR as MAINE_ROOT_DIR
@@ -74,7 +74,7 @@ def create_cdf_plot(data, title, output_filename, x_step: float = None):
             logger.info(f"Plotting {protocol} data for {location}. Data points: {len(subset)}")
             
             # Sort the data and calculate CDF
-            sorted_data, yvals = get_cdf(subset['throughput_mbps'])
+            sorted_data, yvals = get_cdf(subset['throughput_mbps'], max_points=MAX_CDF_POINTS)
             
             ax.plot(
                 sorted_data, 
@@ -231,7 +231,7 @@ def plot_tput_comparison_by_weather(df: pd.DataFrame, output_file_path: str = No
                 for location in locations:
                     weather_loc_df = filtered_df[(filtered_df['weather'] == weather) & (filtered_df['location'] == location)]['throughput_mbps']
                     if not weather_loc_df.empty:
-                        xvals, yvals = get_cdf(weather_loc_df)
+                        xvals, yvals = get_cdf(weather_loc_df, max_points=MAX_CDF_POINTS)
                         ax.plot(
                             xvals,
                             yvals,
@@ -0,0 +1,360 @@
+import json
+import os
+import re
+import unittest
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Tuple, TextIO
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from scripts.constants import CommonField
+from scripts.starlink_metric_utils import STARLINK_METRIC_LOG_PATTERN, parse_starlink_metric_time
+from scripts.utils import find_files
+
+# Output column -> ring buffer in dishGetHistory, one sample per second
+HISTORY_SERIES_FIELDS = {
+    'latency_ms': 'popPingLatencyMs',
+    'ping_drop_rate': 'popPingDropRate',
+    'tput_dl_bps': 'downlinkThroughputBps',
+    'tput_ul_bps': 'uplinkThroughputBps',
+}
+SAMPLE_COUNTER = 'sample_counter'
+BOOT_EPOCH = 'boot_epoch'
+# max drift of the boot time implied by (res_time, current) between snapshots of the same boot
+BOOT_TIME_TOLERANCE_S = 30
+
+START_TIME_PATTERN = re.compile(r'^Start time:\s*(\d+)')
+END_TIME_PATTERN = re.compile(r'^End time:\s*(\d+)')
+
+
+def find_starlink_history_files(base_dir):
+    return find_files(base_dir, prefix="dish_history", suffix=".out")
+
+
+def unroll_ring_buffer(values: List, current: int, after_counter: int = -1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unroll a dish history ring buffer into chronological order.
+    The sample with counter c (0 <= c < current) is stored at index c % len(values).
+
+    :param values: the ring buffer, e.g. popPingLatencyMs.
+    :param current: total number of samples the dish has produced.
+    :param after_counter: only keep samples with a counter greater than this one, default keeps all.
+    :return: (sample counters, values) of the valid samples, oldest first.
+    """
+    buffer_size = len(values)
+    first_counter = max(current - buffer_size, after_counter + 1, 0)
+    counters = np.arange(first_counter, current, dtype=np.int64)
+    if len(counters) == 0:
+        return counters, np.array([], dtype=float)
+    return counters, np.asarray(values, dtype=float)[counters % buffer_size]
+
+
+def iter_starlink_history_snapshots(lines: TextIO | List[str]) -> Iterator[Tuple[datetime, Dict]]:
+    """
+    Stream (res_time, dishGetHistory) snapshots from a history log.
+    Supports the polling format of pull_dish_metric.sh (one `req: | res: | data:` line per snapshot) and
+    the one-shot format of pull_starlink_history.sh (multi-line json between Start time and End time, stamped with End time).
+    """
+    json_lines = []
+    for line in lines:
+        match = STARLINK_METRIC_LOG_PATTERN.search(line)
+        if match:
+            _, res_time, data = match.groups()
+            try:
+                history = json.loads(data).get('dishGetHistory')
+            except json.JSONDecodeError:
+                # e.g. a line truncated when the polling script was stopped
+                continue
+            if history:
+                yield parse_starlink_metric_time(res_time), history
+            continue
+
+        if START_TIME_PATTERN.match(line):
+            json_lines = []
+            continue
+        end_match = END_TIME_PATTERN.match(line)
+        if end_match:
+            if json_lines:
+                try:
+                    history = json.loads(''.join(json_lines)).get('dishGetHistory')
+                except json.JSONDecodeError:
+                    history = None
+                if history:
+                    res_time = datetime.fromtimestamp(int(end_match.group(1)) / 1000.0, timezone.utc)
+                    yield res_time, history
+            json_lines = []
+            continue
+        json_lines.append(line)
+
+
+def parse_history_outages(history: Dict, after_start_ns: int = -1) -> pd.DataFrame:
+    rows = []
+    for outage in history.get('outages') or []:
+        start_ns = int(outage.get('startTimestampNs', -1))
+        if start_ns <= after_start_ns:
+            continue
+        rows.append({
+            'outage_start_time_ns': start_ns,
+            'outage_duration_ns': int(outage.get('durationNs', 0)),
+            'outage_cause': outage.get('cause'),
+            'outage_did_switch': outage.get('didSwitch'),
+        })
+    return pd.DataFrame(rows, columns=['outage_start_time_ns', 'outage_duration_ns', 'outage_cause', 'outage_did_switch'])
+
+
+class StarlinkHistoryStore:
+    """
+    Append-only, deduplicated time series of dish history samples for one trip.
+
+    Every ingested log becomes one part per table (samples.NNNNN.pkl, outages.NNNNN.pkl) holding only samples
+    that were not seen in earlier snapshots. manifest.json keeps the last sample counter and the time range of
+    every part, so range queries only load the parts they overlap.
+    """
+    MANIFEST_FILENAME = 'manifest.json'
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.manifest = self.load_manifest()
+
+    def get_manifest_path(self):
+        return os.path.join(self.store_dir, self.MANIFEST_FILENAME)
+
+    def load_manifest(self) -> Dict:
+        manifest_path = self.get_manifest_path()
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                return json.load(f)
+        return {
+            'boot_epoch': 0,
+            'boot_ts': None,
+            'last_counter': -1,
+            'last_outage_start_ns': -1,
+            'ingested_files': [],
+            'parts': {'samples': [], 'outages': []},
+        }
+
+    def save_manifest(self):
+        if not os.path.exists(self.store_dir):
+            os.makedirs(self.store_dir)
+        tmp_path = self.get_manifest_path() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.get_manifest_path())
+
+    def unroll_snapshot(self, res_time: datetime, history: Dict) -> pd.DataFrame:
+        """
+        New samples of one snapshot, deduplicated against everything ingested before.
+        A reboot starts a new boot epoch. It is detected from the boot time implied by the snapshot (res_time minus
+        one second per sample), as the dish may have been up longer than the last counter again by the next snapshot.
+        """
+        current = int(history['current'])
+        boot_ts = res_time.timestamp() - current
+        last_boot_ts = self.manifest.get('boot_ts')
+        rebooted = current - 1 < self.manifest['last_counter']
+        if last_boot_ts is not None and abs(boot_ts - last_boot_ts) > BOOT_TIME_TOLERANCE_S:
+            rebooted = True
+        if rebooted:
+            self.manifest['boot_epoch'] += 1
+            self.manifest['last_counter'] = -1
+        # follow the drift of the dish clock within a boot
+        self.manifest['boot_ts'] = boot_ts
+
+        buffer_size = max(len(history.get(field) or []) for field in HISTORY_SERIES_FIELDS.values())
+        after_counter = self.manifest['last_counter']
+        data = {}
+        counters = np.array([], dtype=np.int64)
+        for column, field in HISTORY_SERIES_FIELDS.items():
+            values = history.get(field) or []
+            if len(values) != buffer_size:
+                values = [np.nan] * buffer_size
+            counters, data[column] = unroll_ring_buffer(values, current, after_counter=after_counter)
+        if len(counters) == 0:
+            return pd.DataFrame()
+
+        # the newest sample (counter current - 1) was taken at res_time, one sample per second before it
+        data[CommonField.UTC_TS] = res_time.timestamp() - (current - 1 - counters)
+        data[SAMPLE_COUNTER] = counters
+        data[BOOT_EPOCH] = self.manifest['boot_epoch']
+        self.manifest['last_counter'] = current - 1
+        return pd.DataFrame(data)
+
+    def ingest_lines(self, lines: TextIO | List[str]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        sample_dfs = []
+        outage_dfs = []
+        for res_time, history in iter_starlink_history_snapshots(lines):
+            sample_df = self.unroll_snapshot(res_time, history)
+            if len(sample_df) > 0:
+                sample_dfs.append(sample_df)
+            outage_df = parse_history_outages(history, after_start_ns=self.manifest['last_outage_start_ns'])
+            if len(outage_df) > 0:
+                self.manifest['last_outage_start_ns'] = int(outage_df['outage_start_time_ns'].max())
+                outage_dfs.append(outage_df)
+        samples = pd.concat(sample_dfs, ignore_index=True) if sample_dfs else pd.DataFrame()
+        outages = pd.concat(outage_dfs, ignore_index=True) if outage_dfs else pd.DataFrame()
+        return samples, outages
+
+    def ingest_file(self, file_path: str) -> int:
+        """
+        Ingest one history log, skipping logs that were ingested already.
+        :return: number of new samples.
+        """
+        abs_path = os.path.abspath(file_path)
+        if abs_path in self.manifest['ingested_files']:
+            return 0
+        with open(file_path, 'r') as f:
+            samples, outages = self.ingest_lines(f)
+        self.append_part('samples', samples, time_field=CommonField.UTC_TS)
+        if len(outages) > 0:
+            outages[CommonField.UTC_TS] = outages['outage_start_time_ns'] / 1e9
+        self.append_part('outages', outages, time_field=CommonField.UTC_TS)
+        self.manifest['ingested_files'].append(abs_path)
+        self.save_manifest()
+        return len(samples)
+
+    def ingest_files(self, file_paths: List[str]) -> int:
+        """
+        Ingest logs in chronological order of their {date}/{time} folders, which the counter based dedup relies on
+        """
+        total = 0
+        for file_path in sorted(file_paths, key=lambda path: path.split(os.sep)[-3:]):
+            total += self.ingest_file(file_path)
+        return total
+
+    def append_part(self, table: str, df: pd.DataFrame, time_field: str):
+        if len(df) == 0:
+            return
+        if not os.path.exists(self.store_dir):
+            os.makedirs(self.store_dir)
+        parts = self.manifest['parts'][table]
+        filename = f'{table}.{len(parts):05d}.pkl'
+        df.to_pickle(os.path.join(self.store_dir, filename))
+        parts.append({
+            'file': filename,
+            'rows': len(df),
+            'min_utc_ts': float(df[time_field].min()),
+            'max_utc_ts': float(df[time_field].max()),
+        })
+
+    def query(self, start_ts: float | None = None, end_ts: float | None = None, table: str = 'samples') -> pd.DataFrame:
+        """
+        Samples (or outages) with start_ts <= utc_ts <= end_ts, reading only the overlapping parts.
+        """
+        dfs = []
+        for part in self.manifest['parts'][table]:
+            if start_ts is not None and part['max_utc_ts'] < start_ts:
+                continue
+            if end_ts is not None and part['min_utc_ts'] > end_ts:
+                continue
+            df = pd.read_pickle(os.path.join(self.store_dir, part['file']))
+            mask = np.ones(len(df), dtype=bool)
+            if start_ts is not None:
+                mask &= df[CommonField.UTC_TS].to_numpy() >= start_ts
+            if end_ts is not None:
+                mask &= df[CommonField.UTC_TS].to_numpy() <= end_ts
+            dfs.append(df[mask])
+        if not dfs:
+            return pd.DataFrame()
+        return pd.concat(dfs, ignore_index=True).sort_values(CommonField.UTC_TS, kind='stable').reset_index(drop=True)
+
+    def query_outages(self, start_ts: float | None = None, end_ts: float | None = None) -> pd.DataFrame:
+        return self.query(start_ts=start_ts, end_ts=end_ts, table='outages')
+
+
+def ingest_starlink_history_of_trip(raw_dirs: List[str], store_dir: str) -> StarlinkHistoryStore:
+    """
+    Ingest every dish_history*.out log under raw_dirs into the history store of a trip
+    """
+    store = StarlinkHistoryStore(store_dir)
+    history_files = []
+    for raw_dir in raw_dirs:
+        history_files.extend(find_starlink_history_files(raw_dir))
+    print(f'Found {len(history_files)} history files.')
+    new_samples = store.ingest_files(history_files)
+    print(f'Ingested {new_samples} new history samples to {store_dir}')
+    return store
+
+
+class Unittest(unittest.TestCase):
+    def test_unroll_ring_buffer(self):
+        # counters 0..5 with a buffer of 4: counter 4 at idx 0, counter 5 at idx 1
+        counters, values = unroll_ring_buffer([40, 50, 20, 30], current=6)
+        self.assertEqual(counters.tolist(), [2, 3, 4, 5])
+        self.assertEqual(values.tolist(), [20, 30, 40, 50])
+
+        counters, values = unroll_ring_buffer([40, 50, 20, 30], current=6, after_counter=3)
+        self.assertEqual(counters.tolist(), [4, 5])
+        self.assertEqual(values.tolist(), [40, 50])
+
+    def test_unroll_partially_filled_ring_buffer(self):
+        counters, values = unroll_ring_buffer([1, 2, 0, 0], current=2)
+        self.assertEqual(counters.tolist(), [0, 1])
+        self.assertEqual(values.tolist(), [1, 2])
+
+    def test_ingest_deduplicates_overlapping_snapshots(self):
+        import tempfile
+
+        def snapshot_line(res_time: str, current: int, latency: List[float]):
+            history = {
+                'current': str(current),
+                'popPingLatencyMs': latency,
+                'popPingDropRate': [0] * len(latency),
+                'downlinkThroughputBps': [0] * len(latency),
+                'uplinkThroughputBps': [0] * len(latency),
+                'outages': [{'cause': 'NO_SCHEDULE', 'startTimestampNs': str(current * 10 ** 9), 'durationNs': '1', 'didSwitch': False}],
+            }
+            return f'req: {res_time} | res: {res_time} | data: {json.dumps({"dishGetHistory": history})}'
+
+        lines = [
+            snapshot_line('2024-05-27T10:00:05.000000-04:00', 6, [40, 50, 20, 30]),
+            snapshot_line('2024-05-27T10:00:07.000000-04:00', 8, [40, 50, 60, 70]),
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, 'dish_history.out')
+            with open(log_path, 'w') as f:
+                f.write('\n'.join(lines))
+            store = StarlinkHistoryStore(os.path.join(tmp_dir, 'store'))
+            self.assertEqual(store.ingest_file(log_path), 6)
+            self.assertEqual(store.ingest_file(log_path), 0)
+
+            store = StarlinkHistoryStore(os.path.join(tmp_dir, 'store'))
+            df = store.query()
+            self.assertEqual(df[SAMPLE_COUNTER].tolist(), [2, 3, 4, 5, 6, 7])
+            self.assertEqual(df['latency_ms'].tolist(), [20, 30, 40, 50, 60, 70])
+
+            end_ts = parse_starlink_metric_time('2024-05-27T10:00:07.000000-04:00').timestamp()
+            self.assertEqual(df[CommonField.UTC_TS].iloc[-1], end_ts)
+            self.assertEqual(store.query(start_ts=end_ts - 1)['latency_ms'].tolist(), [60, 70])
+            self.assertEqual(len(store.query_outages()), 2)
+
+    def test_ingest_detects_reboot_past_last_counter(self):
+        def snapshot_line(res_time: str, current: int, latency: List[float]):
+            history = {
+                'current': str(current),
+                'popPingLatencyMs': latency,
+                'popPingDropRate': [0] * len(latency),
+                'downlinkThroughputBps': [0] * len(latency),
+                'uplinkThroughputBps': [0] * len(latency),
+            }
+            return f'req: {res_time} | res: {res_time} | data: {json.dumps({"dishGetHistory": history})}'
+
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = StarlinkHistoryStore(tmp_dir)
+            samples, _ = store.ingest_lines([
+                snapshot_line('2024-05-27T10:00:05.000000-04:00', 6, [40, 50, 20, 30]),
+                'req: 2024-05-27T10:00:06.000000-04:00 | res: 2024-05-27T10:00:06.000000-04:00 | data: {"dishGe',
+                # rebooted at 10:05:00 and up for 8 seconds, longer than the last counter 5 of the previous boot
+                snapshot_line('2024-05-27T10:05:08.000000-04:00', 8, [1, 2, 3, 4]),
+                snapshot_line('2024-05-27T10:05:09.000000-04:00', 9, [5, 2, 3, 4]),
+            ])
+            self.assertEqual(samples[BOOT_EPOCH].tolist(), [0] * 4 + [1] * 5)
+            self.assertEqual(samples[SAMPLE_COUNTER].tolist(), [2, 3, 4, 5, 4, 5, 6, 7, 8])
+            self.assertEqual(samples['latency_ms'].tolist()[-5:], [1, 2, 3, 4, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,12 @@ import re
 import unittest
 import json
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Iterator, List, TextIO
 import sys
 import os
+import shutil
+
+import pandas as pd
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))        
 
@@ -31,26 +34,138 @@ def parse_starlink_metric_logs(content: str):
     :param content:
     :return: List[Tuple[time, rtt_ms]]
     """
-    pattern = re.compile(r'req: (.*?) \| res: (.*?) \| data: (.*)')
+    return list(iter_starlink_metric_records(content.splitlines()))
+
+
+STARLINK_METRIC_LOG_PATTERN = re.compile(r'req: (.*?) \| res: (.*?) \| data: (.*)')
+
+# Output column -> path in dishGetStatus, the same projection as StarlinkMetric.get_useful_metrics
+PROJECTED_METRIC_FIELDS = {
+    'latency_ms': ('popPingLatencyMs',),
+    'tput_dl_bps': ('downlinkThroughputBps',),
+    'tput_ul_bps': ('uplinkThroughputBps',),
+    'snr_above_noise_floor': ('isSnrAboveNoiseFloor',),
+    'snr_persistently_low': ('isSnrPersistentlyLow',),
+    'outage_cause': ('outage', 'cause'),
+    'outage_start_time_ns': ('outage', 'startTimestampNs'),
+    'outage.duration_ns': ('outage', 'durationNs'),
+    'outage.did_switch': ('outage', 'didSwitch'),
+    'obstruction_flag': ('obstructionStats', 'currentlyObstructed'),
+    'obstruction_fraction': ('obstructionStats', 'fractionObstructed'),
+    'obstruction_valid_s': ('obstructionStats', 'validS'),
+    'obstruction_avg_prolonged_s': ('obstructionStats', 'avgProlongedObstructionDurationS'),
+    'obstruction_avg_interval_s': ('obstructionStats', 'avgProlongedObstructionIntervalS'),
+    'obstruction_time_s': ('obstructionStats', 'timeObstructed'),
+    'obstruction_patches_valid': ('obstructionStats', 'patchesValid'),
+}
+
+
+def get_projected_value(status: Dict, path: tuple):
+    value = status
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def extract_projected_metrics(data: Dict) -> Dict:
+    """
+    Pick the useful metrics from a parsed status payload by their paths, without flattening the whole tree
+    """
+    status = data.get('dishGetStatus')
+    if not isinstance(status, dict):
+        status = {}
+    metrics = {field: get_projected_value(status, path) for field, path in PROJECTED_METRIC_FIELDS.items()}
+
+    alerts = status.get('alerts')
+    if isinstance(alerts, dict):
+        active_alerts = [event.lower() for event, value in alerts.items() if value is True]
+    else:
+        active_alerts = []
+    metrics['alerts'] = ','.join(active_alerts)
+    return metrics
 
-    extracted_data = []
 
-    for line in content.splitlines():
-        match = pattern.search(line)
-        if match:
-            req_time, res_time, data = match.groups()
-            req_time = parse_starlink_metric_time(req_time)
-            res_time = parse_starlink_metric_time(res_time)
-            metric = StarlinkMetric(data)
-            extracted_data.append({
-                "req_time": format_datetime_as_iso_8601(req_time),
-                "res_time": format_datetime_as_iso_8601(res_time),
-                CommonField.LOCAL_DT: format_datetime_as_iso_8601(res_time), # Use res_time as local time
-                CommonField.UTC_TS: res_time.timestamp(),
-                **metric.get_useful_metrics()
-            })
+def iter_starlink_metric_records(lines: TextIO | List[str]) -> Iterator[Dict]:
+    """
+    Stream the records of a dish status log line by line, each with the projected metrics only
+    """
+    for line in lines:
+        match = STARLINK_METRIC_LOG_PATTERN.search(line)
+        if not match:
+            continue
+        req_time, res_time, data = match.groups()
+        req_time = parse_starlink_metric_time(req_time)
+        res_time = parse_starlink_metric_time(res_time)
+        yield {
+            "req_time": format_datetime_as_iso_8601(req_time),
+            "res_time": format_datetime_as_iso_8601(res_time),
+            CommonField.LOCAL_DT: format_datetime_as_iso_8601(res_time), # Use res_time as local time
+            CommonField.UTC_TS: res_time.timestamp(),
+            **extract_projected_metrics(json.loads(data))
+        }
 
-    return extracted_data
+
+def iter_starlink_metric_batches(file_path: str, batch_size: int = 10000) -> Iterator[pd.DataFrame]:
+    """
+    Read a dish status log lazily and yield its records as DataFrames of at most batch_size rows
+    """
+    batch = []
+    with open(file_path) as f:
+        for record in iter_starlink_metric_records(f):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch)
+                batch = []
+    if batch:
+        yield pd.DataFrame(batch)
+
+
+def stream_starlink_metric_file_to_csv(
+        file_path: str,
+        output_csv_path: str,
+        combined_csv_path: str | None = None,
+        batch_size: int = 10000,
+) -> int:
+    """
+    Parse a dish status log in batches and write every batch as soon as it is parsed, so memory stays flat.
+    Batches go to a temporary file that replaces output_csv_path and is appended to combined_csv_path only once
+    the whole log is parsed, so a log failing halfway leaves neither a partial csv nor partial rows behind.
+    :param output_csv_path: csv file of this log, overwritten.
+    :param combined_csv_path: csv file of the whole trip, the log is appended (with a header if the file is new).
+    :return: number of records written
+    """
+    tmp_csv_path = output_csv_path + '.tmp'
+    row_count = 0
+    try:
+        for batch_df in iter_starlink_metric_batches(file_path, batch_size=batch_size):
+            is_first_batch = row_count == 0
+            batch_df.to_csv(tmp_csv_path, mode='w' if is_first_batch else 'a', header=is_first_batch, index=False)
+            row_count += len(batch_df)
+    except Exception:
+        if os.path.exists(tmp_csv_path):
+            os.remove(tmp_csv_path)
+        raise
+    if row_count == 0:
+        return 0
+
+    os.replace(tmp_csv_path, output_csv_path)
+    if combined_csv_path is not None:
+        append_csv(output_csv_path, combined_csv_path)
+    return row_count
+
+
+def append_csv(csv_path: str, combined_csv_path: str):
+    """
+    Append the rows of a csv file to another one without loading them, keeping the header only if the file is new
+    """
+    write_header = not os.path.exists(combined_csv_path) or os.path.getsize(combined_csv_path) == 0
+    with open(csv_path, 'rb') as src, open(combined_csv_path, 'ab') as dst:
+        header = src.readline()
+        if write_header:
+            dst.write(header)
+        shutil.copyfileobj(src, dst)
 
 
 def parse_metric_json(json_data: str):
@@ -250,6 +365,64 @@ class Unittest(unittest.TestCase):
         leaf_children = metric.get_immediate_subkeys('alerts.motorsStuck')
         self.assertEqual(leaf_children, [])
 
+    def test_extract_projected_metrics(self):
+        json_data = {
+            "dishGetStatus": {
+                "popPingLatencyMs": 30.5,
+                "downlinkThroughputBps": 1000,
+                "alerts": {
+                    "motorsStuck": False,
+                    "roaming": True,
+                    "isHeating": True
+                },
+                "outage": None,
+                "obstructionStats": {
+                    "fractionObstructed": 0.1,
+                    "validS": 100
+                }
+            }
+        }
+        metrics = extract_projected_metrics(json_data)
+        self.assertEqual(metrics, StarlinkMetric(json_data).get_useful_metrics())
+        self.assertEqual(metrics['latency_ms'], 30.5)
+        self.assertEqual(metrics['outage_cause'], None)
+        self.assertEqual(metrics['obstruction_fraction'], 0.1)
+        self.assertEqual(metrics['alerts'], 'roaming,isheating')
+
+    def test_stream_starlink_metric_file_to_csv(self):
+        import tempfile
+        lines = []
+        for i in range(5):
+            lines.append(
+                f'req: 2024-05-27T10:53:1{i}.000000-04:00 | res: 2024-05-27T10:53:1{i}.500000-04:00 | '
+                f'data: {{"dishGetStatus":{{"popPingLatencyMs":{20 + i},"alerts":{{}}}}}}'
+            )
+        lines.insert(2, 'not a metric line')
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, 'dish_status.out')
+            with open(log_path, 'w') as f:
+                f.write('\n'.join(lines))
+            output_csv_path = os.path.join(tmp_dir, 'dish_status.csv')
+            combined_csv_path = os.path.join(tmp_dir, 'starlink_metric.csv')
+
+            row_count = stream_starlink_metric_file_to_csv(log_path, output_csv_path, combined_csv_path, batch_size=2)
+            stream_starlink_metric_file_to_csv(log_path, output_csv_path, combined_csv_path, batch_size=2)
+
+            self.assertEqual(row_count, 5)
+            df = pd.read_csv(output_csv_path)
+            self.assertEqual(df['latency_ms'].tolist(), [20, 21, 22, 23, 24])
+            self.assertEqual(df[CommonField.UTC_TS].iloc[0], parse_starlink_metric_time('2024-05-27T10:53:10.500000-04:00').timestamp())
+            self.assertEqual(len(pd.read_csv(combined_csv_path)), 10)
+
+            # a log failing after its first batch contributes nothing
+            with open(log_path, 'a') as f:
+                f.write('\nreq: 2024-05-27T10:53:20.000000-04:00 | res: 2024-05-27T10:53:20.500000-04:00 | data: {"dish')
+            with self.assertRaises(json.JSONDecodeError):
+                stream_starlink_metric_file_to_csv(log_path, output_csv_path, combined_csv_path, batch_size=2)
+            self.assertEqual(len(pd.read_csv(combined_csv_path)), 10)
+            self.assertEqual(sorted(os.listdir(tmp_dir)), ['dish_status.csv', 'dish_status.out', 'starlink_metric.csv'])
+
 
 if __name__ == '__main__':
     unittest.main()
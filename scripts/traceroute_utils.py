@@ -1,10 +1,16 @@
 import json
+import logging
 import os
 import re
+import tempfile
 import unittest
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Tuple
 
+import pandas as pd
+
+from scripts.time_utils import StartEndLogTimeProcessor, format_datetime_as_iso_8601
 from scripts.utilities.IpQuery import IpQuery
+from scripts.utilities.ip_info_cache import IpInfoCache, IpInfoService, RateLimiter, ip_api_batch_fetcher
 from scripts.utils import find_files
 
 traceroute_exceptions = {
@@ -37,24 +43,57 @@ traceroute_exceptions = {
 }
 
 
-def parse_traceroute_log(content):
-    # Regular expression pattern to match hop lines
-    pattern = r'.?]\s+(\d+)\s+(.*)'
+# Patterns are compiled once at import, they are applied to every hop line of every traceroute log
+HOP_LINE_PATTERN = re.compile(r'.?]\s+(\d+)\s+(.*)')
+PROBE_GROUP_PATTERN = re.compile(r'\*|\S+(?:\s+(?!\*)\S+)*')
+PROBE_SEPARATION_PATTERN = re.compile(r'(.*?)\sms(?:\s+!\w)?|\*')
+PROBE_EXCEPTION_PATTERN = re.compile(r'!\w')
+HOST_INFO_PATTERN = re.compile(r'([^\s]+) \(([^\s]+)\) \s*([\d\.]+)')
+
+TRACEROUTE_HOP_FIELDS = ['hostname', 'ip', 'rtt_ms', 'exception', 'hop_number']
 
-    # Find all matches in the traceroute log
-    matches = re.findall(pattern, content)
 
+def parse_traceroute_log(content):
     # Extract hop information
     hops = []
-    for match in matches:
-        hop_number = match[0]
-        content = match[1]
-        res = parse_traceroute_line(content)
-        res = list(map(lambda x: {**x, 'hop_number': hop_number}, res))
+    for hop_number, line in HOP_LINE_PATTERN.findall(content):
+        res = parse_traceroute_line(line)
+        for probe_info in res:
+            probe_info['hop_number'] = hop_number
         hops.append(res)
     return hops
 
 
+def new_traceroute_hop_columns() -> Dict[str, List]:
+    return {field: [] for field in TRACEROUTE_HOP_FIELDS}
+
+
+def append_traceroute_log_to_columns(content: str, columns: Dict[str, List]) -> int:
+    """
+    Parse every probe of a traceroute log straight into columnar buffers, one entry per probe
+    :param content: content of a traceroute log
+    :param columns: buffers created by new_traceroute_hop_columns
+    :return: number of probes appended
+    """
+    hostnames, ips, rtts, exceptions, hop_numbers = (columns[field] for field in TRACEROUTE_HOP_FIELDS)
+    count = 0
+    for hop_number, line in HOP_LINE_PATTERN.findall(content):
+        for hostname, ip, rtt_ms, exception in iter_probe_fields(line):
+            hostnames.append(hostname)
+            ips.append(ip)
+            rtts.append(rtt_ms)
+            exceptions.append(exception)
+            hop_numbers.append(hop_number)
+            count += 1
+    return count
+
+
+def parse_traceroute_log_to_columns(content: str) -> Dict[str, List]:
+    columns = new_traceroute_hop_columns()
+    append_traceroute_log_to_columns(content, columns)
+    return columns
+
+
 def sanitize_probe_result(probe_result: str):
     res = probe_result.strip()
     return res
@@ -62,72 +101,132 @@ def sanitize_probe_result(probe_result: str):
 
 def separate_three_probes(line: str) -> List[str]:
     # remove all *
-    first_sep_list = re.findall(r'\*|\S+(?:\s+(?!\*)\S+)*', line)
+    first_sep_list = PROBE_GROUP_PATTERN.findall(line)
     res = []
-    for i in range(len(first_sep_list)):
-        ele = first_sep_list[i]
+    for ele in first_sep_list:
         if ele == '':
             res.append('')
         else:
             # split by ms
-            separation_reg = re.compile(r'(.*?)\sms(?:\s+!\w)?|\*')
-            matches = separation_reg.findall(ele)
-            res.extend(list(map(sanitize_probe_result, matches)))
+            matches = PROBE_SEPARATION_PATTERN.findall(ele)
+            res.extend(map(sanitize_probe_result, matches))
+            if len(res) >= 3:
+                break
     # get first 3 elements
     return res[:3]
 
 
 def detect_probe_exception(line: str) -> str | None:
     if '!' in line:
-        reg = r'!\w'
-        match = re.search(reg, line)
+        match = PROBE_EXCEPTION_PATTERN.search(line)
         if match:
             return match.group(0)
     return None
 
 
-def extract_host_info(probe_str: str) -> Dict:
-    res = {
-        'hostname': None,
-        'ip': None,
-        'rtt_ms': None,
-    }
+def extract_host_fields(probe_str: str) -> Tuple[str | None, str | None, str | None]:
+    """
+    :return: (hostname, ip, rtt_ms) of a single probe
+    """
     if not probe_str or probe_str == '*':
-        return res
+        return None, None, None
     if '(' in probe_str:
-        pattern = r'([^\s]+) \(([^\s]+)\) \s*([\d\.]+)'
-        match = re.match(pattern, probe_str)
+        match = HOST_INFO_PATTERN.match(probe_str)
         if match:
-            res['hostname'] = match.group(1)
-            res['ip'] = match.group(2)
-            res['rtt_ms'] = match.group(3)
-        return res
+            return match.group(1), match.group(2), match.group(3)
+        return None, None, None
     # only rtt
-    res['rtt_ms'] = probe_str
-    return res
+    return None, None, probe_str
 
 
-def parse_traceroute_line(line: str) -> List[Dict[str, str]]:
-    three_probes = separate_three_probes(line)
+def extract_host_info(probe_str: str) -> Dict:
+    hostname, ip, rtt_ms = extract_host_fields(probe_str)
+    return {
+        'hostname': hostname,
+        'ip': ip,
+        'rtt_ms': rtt_ms,
+    }
+
+
+def iter_probe_fields(line: str) -> Iterator[Tuple[str | None, str | None, str | None, str | None]]:
+    """
+    Yield (hostname, ip, rtt_ms, exception) of each probe in a hop line.
+    A probe with only an rtt inherits the host of the last probe that has one.
+    """
     exception_symbol = detect_probe_exception(line)
-    results = []
-    last_valid_probe_info = None
-    for probe in three_probes:
-        probe_info = extract_host_info(probe)
-        if probe_info['rtt_ms'] and probe_info['hostname'] is None:
-            if last_valid_probe_info:
-                probe_info['hostname'] = last_valid_probe_info['hostname']
-                probe_info['ip'] = last_valid_probe_info['ip']
-
-        if exception_symbol:
-            probe_info['exception'] = exception_symbol
-        else:
-            probe_info['exception'] = None
-        results.append(probe_info)
+    last_hostname = None
+    last_ip = None
+    for probe in separate_three_probes(line):
+        hostname, ip, rtt_ms = extract_host_fields(probe)
+        if rtt_ms and hostname is None and last_hostname:
+            hostname, ip = last_hostname, last_ip
+        yield hostname, ip, rtt_ms, exception_symbol
+        if hostname:
+            last_hostname, last_ip = hostname, ip
+
+
+def parse_traceroute_line(line: str) -> List[Dict[str, str]]:
+    return [
+        {
+            'hostname': hostname,
+            'ip': ip,
+            'rtt_ms': rtt_ms,
+            'exception': exception,
+        }
+        for hostname, ip, rtt_ms, exception in iter_probe_fields(line)
+    ]
+
+
+def parse_traceroute_files_to_df(
+        traceroute_files: List[str],
+        timezone_str: str,
+        logger: logging.Logger | None = None,
+        save_per_file_csv: bool = True,
+) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Parse traceroute logs into one DataFrame with hop fields and the start/end time of each log.
+    Probes of all files are collected in shared columnar buffers and the DataFrame is built once.
+    :param traceroute_files: traceroute log files
+    :param timezone_str: timezone of the start/end time in the logs
+    :param logger: optional logger for progress and errors
+    :param save_per_file_csv: save the probes of each log next to it as a .csv file, default is True
+    :return: (merged DataFrame, failed files)
+    """
+    columns = new_traceroute_hop_columns()
+    start_times = []
+    end_times = []
+    failed_files = []
+    for file in traceroute_files:
+        if logger:
+            logger.info(f'Start to process {file} ...')
+        try:
+            with open(file, 'r') as f:
+                content = f.read()
+            start_end_time = StartEndLogTimeProcessor.get_start_end_time_from_log(
+                content, timezone_str=timezone_str)[0]
+            file_columns = parse_traceroute_log_to_columns(content)
+        except Exception as e:
+            if logger:
+                logger.error(f'Failed to process {file}: {e}')
+            failed_files.append(file)
+            continue
 
-        if probe_info['hostname']:
-            last_valid_probe_info = probe_info
-    return results
+        if save_per_file_csv:
+            output_filename = file.replace('.out', '.csv')
+            pd.DataFrame(file_columns, columns=TRACEROUTE_HOP_FIELDS).to_csv(output_filename, index=False)
+            if logger:
+                logger.info(f'Saved traceroute data to {output_filename}')
+
+        probe_count = len(file_columns['hop_number'])
+        for field in TRACEROUTE_HOP_FIELDS:
+            columns[field].extend(file_columns[field])
+        start_times.extend([format_datetime_as_iso_8601(start_end_time[0])] * probe_count)
+        end_times.extend([format_datetime_as_iso_8601(start_end_time[1])] * probe_count)
+
+    df = pd.DataFrame(columns, columns=TRACEROUTE_HOP_FIELDS)
+    df['start_time'] = start_times
+    df['end_time'] = end_times
+    return df, failed_files
 
 
 def find_traceroute_files(base_dir: str):
@@ -141,20 +240,22 @@ def find_traceroute_files_by_dir_list(dir_list: List[str]):
     return traceroute_files
 
 
-def batch_query_ip_info(ip_list: List[str]):
-    unique_ips = list(set(ip_list))
-    public_ips = IpQuery.filter_public_ips(unique_ips)
-    max_count = IpQuery.MAX_IP_PER_REQUEST
-    iteration_count = len(public_ips) // max_count + 1
-    results = []
-    for i in range(iteration_count):
-        query_ips = public_ips[i * max_count: (i + 1) * max_count]
-        try:
-            results.extend(IpQuery.batch_ip_lookup(query_ips))
-        except Exception as e:
-            print(f"Error querying IP info: {e} at iteration {i}/{iteration_count}")
-            continue
-    return results
+def batch_query_ip_info(ip_list: List[str], cache_path: str | None = None):
+    """
+    Query ip-api.com for the public IPs in ip_list, in concurrent rate-limited batches
+    :param ip_list: IP addresses, duplicates and non-public IPs are skipped
+    :param cache_path: optional SQLite cache, only IPs missing from it are queried
+    :return: list of ip info dicts
+    """
+    public_ips = IpQuery.filter_public_ips(list(dict.fromkeys(ip_list)))
+    rate_limiter = RateLimiter(IpQuery.MAX_BATCH_REQUESTS_PER_MINUTE, period_s=60)
+    cache = IpInfoCache(cache_path) if cache_path else None
+    try:
+        service = IpInfoService(ip_api_batch_fetcher(), cache=cache, rate_limiter=rate_limiter)
+        return list(service.lookup(public_ips).values())
+    finally:
+        if cache:
+            cache.close()
 
 
 def save_ip_info_to_map(ip_info_list: List[Dict], output_filepath: str):
@@ -484,3 +585,47 @@ class Unittest(unittest.TestCase):
             },
         ]
         self.assertEqual(expected, parse_traceroute_line(line))
+
+    def test_parse_traceroute_log_to_columns(self):
+        traceroute_log = """
+        [2024-06-22 20:26:46.595866]  1  192.168.1.1 (192.168.1.1)  2.875 ms  2.454 ms !H  2.127 ms !H
+        [2024-06-22 20:26:48.527682]  2  * * *
+        [2024-06-22 20:26:51.864641]  3  * ec2-50-112-93-113.us-west-2.compute.amazonaws.com (50.112.93.113)  95.990 ms *
+        """
+        columns = parse_traceroute_log_to_columns(traceroute_log)
+        self.assertEqual(TRACEROUTE_HOP_FIELDS, list(columns.keys()))
+        self.assertEqual(['1', '1', '1', '2', '2', '2', '3', '3', '3'], columns['hop_number'])
+        self.assertEqual(['2.875', '2.454', '2.127', None, None, None, None, '95.990', None], columns['rtt_ms'])
+        self.assertEqual(['192.168.1.1'] * 3 + [None] * 4 + ['50.112.93.113', None], columns['ip'])
+        self.assertEqual(['!H'] * 3 + [None] * 6, columns['exception'])
+
+        records = [dict(zip(TRACEROUTE_HOP_FIELDS, row)) for row in zip(*columns.values())]
+        expected = [probe for hop in parse_traceroute_log(traceroute_log) for probe in hop]
+        self.assertEqual(expected, records)
+
+    def test_parse_traceroute_files_to_df(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_contents = {
+                'traceroute_1.out': 'Start time: 1719116806332\n'
+                                    '[2024-06-22 20:26:46.595866]  1  192.168.1.1 (192.168.1.1)  2.875 ms * *\n'
+                                    'End time: 1719116811892\n',
+                'traceroute_2.out': 'Start time: 1719116906332\n'
+                                    '[2024-06-22 20:28:26.595866]  1  * * *\n'
+                                    '[2024-06-22 20:28:26.695866]  2  100.64.0.1 (100.64.0.1)  72.716 ms  79.912 ms  79.730 ms\n'
+                                    'End time: 1719116911892\n',
+                'traceroute_3.out': 'no time range\n',
+            }
+            files = []
+            for filename, content in file_contents.items():
+                files.append(os.path.join(tmp_dir, filename))
+                with open(files[-1], 'w') as f:
+                    f.write(content)
+
+            df, failed_files = parse_traceroute_files_to_df(files, timezone_str='UTC')
+            self.assertEqual([files[2]], failed_files)
+            self.assertEqual(TRACEROUTE_HOP_FIELDS + ['start_time', 'end_time'], df.columns.tolist())
+            self.assertEqual(9, len(df))
+            self.assertEqual(['1'] * 3 + ['1'] * 3 + ['2'] * 3, df['hop_number'].tolist())
+            self.assertEqual(1, df['start_time'].iloc[:3].nunique())
+            self.assertNotEqual(df['start_time'].iloc[0], df['start_time'].iloc[3])
+            self.assertTrue(os.path.exists(os.path.join(tmp_dir, 'traceroute_2.csv')))
@@ -2,32 +2,30 @@ from abc import ABC
 from datetime import datetime
 import json
 import os
-from typing import List, Tuple
+from typing import List, Tuple, Union
 import pandas as pd
 
 from scripts.constants import CommonField
 from scripts.time_utils import ensure_timezone
 from scripts.alaska_starlink_trip.labels import DatasetLabel
-from scripts.utilities.xcal_processing_utils import collect_periods_of_tput_measurements
+from scripts.utilities.period_index import TPUT_TRACE_TYPES, PeriodIndex
 
 class AppTputPeriodExtractor(ABC):
-    def __init__(self, operator: str):
+    def __init__(self, operator: str, period_index_path: str | None = None):
+        """
+        :param period_index_path: pickle file of the per-trip PeriodIndex, None keeps it in memory only
+        """
         self.operator = operator
+        self.period_index = PeriodIndex(index_path=period_index_path)
 
     def get_all_data_dirs(self):
         raise NotImplementedError
 
     def get_app_tput_periods(self, dir_list: List[str], timezone: str):
-        all_tput_periods = []
-        for dir in dir_list:
-            try:
-                periods_of_tcp_dl = collect_periods_of_tput_measurements(base_dir=dir, protocol='tcp', direction='downlink')
-                periods_of_tcp_ul = collect_periods_of_tput_measurements(base_dir=dir, protocol='tcp', direction='uplink')
-                periods_of_udp_dl = collect_periods_of_tput_measurements(base_dir=dir, protocol='udp', direction='downlink')
-                periods_of_udp_ul = collect_periods_of_tput_measurements(base_dir=dir, protocol='udp', direction='uplink')
-                all_tput_periods.extend(periods_of_tcp_dl + periods_of_tcp_ul + periods_of_udp_dl + periods_of_udp_ul)
-            except Exception as e:
-                raise Exception(f"Failed to collect periods of tput measurements: {str(e)}")
+        try:
+            all_tput_periods = self.period_index.get_tput_periods(dir_list, operator=self.operator)
+        except Exception as e:
+            raise Exception(f"Failed to collect periods of tput measurements: {str(e)}")
         
         def transform_period(period: tuple[datetime, datetime, str]) -> tuple[datetime, datetime, str, str]:
             start_time, end_time, protocol_direction = period
@@ -44,6 +42,16 @@ class AppTputPeriodExtractor(ABC):
         all_tput_periods = self.get_app_tput_periods(dir_list, timezone=timezone)
         return all_tput_periods
 
+    def query_app_tput_intervals(self, times: Union[pd.Series, List]) -> pd.DataFrame:
+        """
+        Match times against the app tput periods of all data dirs, see PeriodIndex.query_intervals
+        """
+        dir_list = self.get_all_data_dirs()
+        # refresh the index, runs whose directory is unchanged are answered from it without rescanning
+        self.period_index.get_tput_periods(dir_list, operator=self.operator)
+        return self.period_index.query_intervals(
+            times, operator=self.operator, trace_types=TPUT_TRACE_TYPES, run_dirs=dir_list)
+
     def save_extracted_periods_as_csv(self, periods: list[tuple[datetime, datetime, str]], output_file_path: str):
         df = pd.DataFrame(periods, columns=['start_time', 'end_time', CommonField.APP_TPUT_PROTOCOL, CommonField.APP_TPUT_DIRECTION])
         df.to_csv(output_file_path, index=False)
@@ -1,57 +1,116 @@
 import os
+from typing import List
+
+import numpy as np
 import pandas as pd
 
+from scripts.utilities.frame_cache import FrameCache
+
+OPERATORS = ['starlink', 'verizon', 'att', 'tmobile']
+PROTOCOLS = ['tcp', 'udp']
+DIRECTIONS = ['downlink', 'uplink']
+
+
 class DatasetHelper:
-    def __init__(self, base_dir: str):
+    """
+    Load the per-operator throughput and ping CSVs of a dataset directory.
+    Parsed CSVs are cached per process and per set of requested columns, so repeated queries only copy
+    the cached frame and add the operator, protocol and direction label columns.
+    """
+
+    def __init__(self, base_dir: str, cache_dir: str | None = None):
+        """
+        :param base_dir: directory of the {operator}_{protocol}_{direction}.csv and {operator}_ping.csv files
+        :param cache_dir: directory to also pickle the parsed frames to, None keeps them in memory only
+        """
         self.base_dir = base_dir
+        self.frame_cache = FrameCache(cache_dir=cache_dir)
 
-    def get_tput_data(self, operator: str, protocol: str = '*', direction: str = '*') -> pd.DataFrame:
+    def get_tput_data(
+            self,
+            operator: str,
+            protocol: str = '*',
+            direction: str = '*',
+            usecols: List[str] | None = None,
+            categorical_labels: bool = False,
+    ) -> pd.DataFrame:
         """
         Get the throughput data for the given operator, protocol, and direction from the given base directory.
         :param base_dir: The base directory to search for the throughput data.
         :param operator: The operator to filter the throughput data.
         :param protocol: tcp or udp or *, default is *.
         :param direction: downlink or uplink or *, default is *.
+        :param usecols: columns to read from the CSVs, None reads all columns.
+        :param categorical_labels: store the operator, protocol and direction columns as categoricals.
         :return: A pandas DataFrame containing the throughput data.
         """
-        if protocol == '*': 
-            if direction == '*':
-                return pd.concat([
-                    self.get_single_tput_data(operator, 'tcp', direction='downlink'),
-                    self.get_single_tput_data(operator, 'tcp', direction='uplink'),
-                    self.get_single_tput_data(operator, 'udp', direction='downlink'),
-                    self.get_single_tput_data(operator, 'udp', direction='uplink'),
-                ])
-            else:
-                return pd.concat([
-                    self.get_single_tput_data(operator, 'tcp', direction=direction),
-                    self.get_single_tput_data(operator, 'udp', direction=direction),
-                ])
-        else:
-            if direction == '*':
-                return pd.concat([
-                    self.get_single_tput_data(operator, protocol, direction='downlink'),
-                    self.get_single_tput_data(operator, protocol, direction='uplink'),
-                ])
-            else:
-                return self.get_single_tput_data(operator, protocol, direction)
-    
-    def get_single_tput_data(self, operator: str, protocol: str, direction: str) -> pd.DataFrame:
-        if protocol not in ['tcp', 'udp']:
+        protocols = PROTOCOLS if protocol == '*' else [protocol]
+        directions = DIRECTIONS if direction == '*' else [direction]
+        dfs = [
+            self.get_single_tput_data(operator, _protocol, _direction, usecols=usecols,
+                                      categorical_labels=categorical_labels)
+            for _protocol in protocols
+            for _direction in directions
+        ]
+        if len(dfs) == 1:
+            return dfs[0]
+        return pd.concat(dfs)
+
+    def get_single_tput_data(
+            self,
+            operator: str,
+            protocol: str,
+            direction: str,
+            usecols: List[str] | None = None,
+            categorical_labels: bool = False,
+    ) -> pd.DataFrame:
+        if protocol not in PROTOCOLS:
             raise ValueError(f'Invalid protocol: {protocol}')
-        if direction not in ['downlink', 'uplink']:
+        if direction not in DIRECTIONS:
             raise ValueError(f'Invalid direction: {direction}')
         csv_filename = f'{operator}_{protocol}_{direction}.csv'
-        file_path = os.path.join(self.base_dir, csv_filename)
-        df = pd.read_csv(file_path)
-        df['operator'] = operator
-        df['protocol'] = protocol
-        df['direction'] = direction
+        df = self.read_csv(csv_filename, usecols=usecols)
+        self.add_label(df, 'operator', operator, OPERATORS, categorical_labels)
+        self.add_label(df, 'protocol', protocol, PROTOCOLS, categorical_labels)
+        self.add_label(df, 'direction', direction, DIRECTIONS, categorical_labels)
         return df
 
-    def get_ping_data(self, operator: str) -> pd.DataFrame:
+    def get_ping_data(
+            self,
+            operator: str,
+            usecols: List[str] | None = None,
+            categorical_labels: bool = False,
+    ) -> pd.DataFrame:
         csv_filename = f'{operator}_ping.csv'
-        file_path = os.path.join(self.base_dir, csv_filename)
-        df = pd.read_csv(file_path)
-        df['operator'] = operator
+        df = self.read_csv(csv_filename, usecols=usecols)
+        self.add_label(df, 'operator', operator, OPERATORS, categorical_labels)
         return df
+
+    def read_csv(self, csv_filename: str, usecols: List[str] | None = None) -> pd.DataFrame:
+        """
+        :return: a copy of the cached frame of the CSV, reduced to usecols if given
+        """
+        file_path = os.path.join(self.base_dir, csv_filename)
+        key = os.path.splitext(csv_filename)[0]
+        if usecols is not None:
+            usecols = sorted(set(usecols) - {'operator', 'protocol', 'direction'})
+            key += '.' + '-'.join(usecols)
+        return self.frame_cache.get(
+            key=key,
+            source_paths=[file_path],
+            loader=lambda: pd.read_csv(file_path, usecols=usecols),
+        )
+
+    @staticmethod
+    def add_label(df: pd.DataFrame, field: str, value: str, categories: List[str], categorical: bool):
+        """
+        Add a constant label column, as a categorical with fixed categories so that concatenated frames stay
+        categorical, or as plain strings
+        """
+        if categorical:
+            if value not in categories:
+                raise ValueError(f'Invalid {field}: {value}')
+            codes = np.full(len(df), categories.index(value), dtype=np.int8)
+            df[field] = pd.Categorical.from_codes(codes, categories=categories)
+        else:
+            df[field] = value
@@ -0,0 +1,52 @@
+import os
+from typing import List
+
+import pandas as pd
+
+from scripts.utilities.frame_cache import FrameCache
+
+
+class FusedTraceLoader:
+    """
+    Load fused_trace.* and mptcp_trace.* CSVs of an operator pair with parsed datetime columns.
+    Each trace is parsed once per process and the parsed frame is cached on disk under `{base_dir}/.cache`.
+    """
+    TIME_FIELDS = ['A_time', 'B_time', 'time']
+
+    def __init__(self, base_dir: str, cache_dir: str | None = None, use_disk_cache: bool = True):
+        self.base_dir = base_dir
+        if cache_dir is None and use_disk_cache:
+            cache_dir = os.path.join(base_dir, '.cache')
+        self.frame_cache = FrameCache(cache_dir=cache_dir)
+
+    def get_fused_trace_path(self, operator_a: str, operator_b: str, trace_type: str) -> str:
+        return os.path.join(self.base_dir, f'fused_trace.{trace_type}.{operator_a}_{operator_b}.csv')
+
+    def get_mptcp_trace_path(self, operator_a: str, operator_b: str, trace_type: str) -> str:
+        return os.path.join(self.base_dir, f'mptcp_trace.{trace_type}.{operator_a}_{operator_b}.csv')
+
+    def read_fused_trace(self, operator_a: str, operator_b: str, trace_type: str) -> pd.DataFrame:
+        """
+        :param trace_type: tcp_downlink, tcp_uplink or ping.
+        """
+        return self.read_trace(self.get_fused_trace_path(operator_a, operator_b, trace_type))
+
+    def read_mptcp_trace(self, operator_a: str, operator_b: str, trace_type: str) -> pd.DataFrame:
+        return self.read_trace(self.get_mptcp_trace_path(operator_a, operator_b, trace_type))
+
+    def read_trace(self, csv_path: str) -> pd.DataFrame:
+        key = os.path.splitext(os.path.basename(csv_path))[0]
+        return self.frame_cache.get(
+            key=key,
+            source_paths=[csv_path],
+            loader=lambda: self.parse_trace(csv_path),
+        )
+
+    def parse_trace(self, csv_path: str) -> pd.DataFrame:
+        df = pd.read_csv(csv_path)
+        for field in self.get_time_fields(df):
+            df[field] = pd.to_datetime(df[field], format='ISO8601')
+        return df
+
+    def get_time_fields(self, df: pd.DataFrame) -> List[str]:
+        return [field for field in self.TIME_FIELDS if field in df.columns]
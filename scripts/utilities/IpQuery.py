@@ -5,14 +5,20 @@ import requests
 import json
 import ipaddress
 
+from scripts.utilities.ip_utils import IpClass, classify_ips
+
 
 class IpQuery:
     MAX_IP_PER_REQUEST = 100
+    BATCH_URL = "http://ip-api.com/batch?fields=66842623"
+    # ip-api.com allows 15 batch requests per minute for free usage
+    MAX_BATCH_REQUESTS_PER_MINUTE = 15
 
     @staticmethod
-    def batch_ip_lookup(ip_list) -> List[dict]:
+    def batch_ip_lookup(ip_list, url: str = BATCH_URL) -> List[dict]:
         """Perform a batch IP lookup using ip-api.com
         :param ip_list: List of IP addresses to lookup
+        :param url: batch endpoint, default is ip-api.com
         :return: List of dictionaries containing the results
 
         Example result:
@@ -42,8 +48,6 @@ class IpQuery:
           "query": "8.8.8.8"
         }
         """
-        url = "http://ip-api.com/batch?fields=66842623"
-
         if len(ip_list) > IpQuery.MAX_IP_PER_REQUEST:
             raise ValueError(f"Number of IP addresses exceeds the maximum limit of {IpQuery.MAX_IP_PER_REQUEST}")
 
@@ -58,13 +62,15 @@ class IpQuery:
     @staticmethod
     def filter_public_ips(ip_list):
         public_ips = []
-        for ip in ip_list:
+        ip_classes = classify_ips(ip_list)
+        for ip, ip_class in zip(ip_list, ip_classes):
+            if ip_class == IpClass.PUBLIC:
+                public_ips.append(ip)
+                continue
+            if ip_class != IpClass.INVALID or not isinstance(ip, str):
+                continue
+            # not an IPv4 address, e.g. IPv6
             try:
-                if not isinstance(ip, str):
-                    continue
-                # CGNAT reserved IP
-                if ip.startswith('100.64'):
-                    continue
                 ip_obj = ipaddress.ip_address(ip)
                 if ip_obj.is_private:
                     continue
@@ -1,13 +1,36 @@
 import datetime
 import os
 import re
+import shutil
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from scripts.utils import get_datetime_from_path
 
 
+class MergeMode:
+    # merged files are hardlinks of the raw logs, falling back to a copy across file systems
+    HARDLINK = 'hardlink'
+    # merged files are symlinks to the absolute paths of the raw logs
+    SYMLINK = 'symlink'
+    COPY = 'copy'
+
+
 class RunMerger:
+    def __init__(self, mode: str = MergeMode.HARDLINK, max_workers: int = 8):
+        """
+        :param mode: how files of matched runs are placed into the merged folders, see MergeMode.
+            Linked files share their content with the raw logs, so they must be replaced rather than
+            modified in place.
+        :param max_workers: threads merging folder pairs concurrently
+        """
+        if mode not in (MergeMode.HARDLINK, MergeMode.SYMLINK, MergeMode.COPY):
+            raise ValueError(f'Unsupported merge mode: {mode}')
+        self.mode = mode
+        self.max_workers = max_workers
+
     def fmt_list(self, lst):
         return "\n".join(lst)
 
@@ -41,14 +64,59 @@ class RunMerger:
         udp_folders.sort(key=self.get_timestamp_as_key)
         return tcp_folders, udp_folders
 
-    def save_merged_folders(self, operator: str, merged_folder_tuples: List[tuple]):
-        for tcp_folder, udp_folder in merged_folder_tuples:
-            # copy files in tcp_folder and udp_folder to output_dir
-            new_folder = re.sub(r'^(.*?)/([^/]+)/(\d+/\d+)$', r'\1/' + operator + r'_merged/\3', tcp_folder)
-            if not os.path.exists(new_folder):
-                os.makedirs(new_folder)
-            os.system(f'cp -r {tcp_folder}/* {new_folder}')
-            os.system(f'cp -r {udp_folder}/* {new_folder}')
+    @staticmethod
+    def get_merged_folder(operator: str, tcp_folder: str) -> str:
+        return re.sub(r'^(.*?)/([^/]+)/(\d+/\d+)$', r'\1/' + operator + r'_merged/\3', tcp_folder)
+
+    def place_file(self, src: str, dst: str):
+        if os.path.lexists(dst):
+            # later runs overwrite files of the same name, like cp
+            os.remove(dst)
+        if self.mode == MergeMode.SYMLINK:
+            os.symlink(os.path.abspath(src), dst)
+            return
+        if self.mode == MergeMode.HARDLINK:
+            try:
+                os.link(src, dst)
+                return
+            except OSError:
+                # e.g. the merged folder is on another file system, or it does not support hardlinks
+                pass
+        shutil.copy2(src, dst)
+
+    def merge_folder_into(self, folder: str, new_folder: str):
+        """
+        Place the files of folder into new_folder recursively, equivalent to cp -r folder/* new_folder
+        """
+        for root, dirs, files in os.walk(folder):
+            rel_root = os.path.relpath(root, folder)
+            if rel_root == '.':
+                # like the shell glob, hidden entries at the top level are not merged
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                files = [f for f in files if not f.startswith('.')]
+            dst_root = os.path.normpath(os.path.join(new_folder, rel_root))
+            os.makedirs(dst_root, exist_ok=True)
+            for file in files:
+                self.place_file(os.path.join(root, file), os.path.join(dst_root, file))
+
+    def save_merged_folder(self, operator: str, tcp_folder: str, udp_folder: str) -> str:
+        new_folder = self.get_merged_folder(operator, tcp_folder)
+        os.makedirs(new_folder, exist_ok=True)
+        self.merge_folder_into(tcp_folder, new_folder)
+        self.merge_folder_into(udp_folder, new_folder)
+        return new_folder
+
+    def save_merged_folders(self, operator: str, merged_folder_tuples: List[tuple]) -> List[str]:
+        """
+        Merge the files of each matched (tcp_folder, udp_folder) pair into {operator}_merged, next to the
+        operator folder, keeping the date/time path of the tcp folder. Pairs are merged concurrently.
+        :return: the merged folders in the order of merged_folder_tuples
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(
+                lambda folders: self.save_merged_folder(operator, *folders),
+                merged_folder_tuples,
+            ))
 
     def match_folders(self, tcp_folders: List[str], udp_folders: List[str]) -> (List[tuple], List[str], List[str]):
         idx1 = 0
@@ -102,3 +170,29 @@ class Unittest(unittest.TestCase):
         self.assertEqual([('20240618/000100000', '20240618/000500000')], matched_folder_tuples)
         self.assertEqual(len(leftover_tcp_folders), 1)
         self.assertEqual(len(leftover_udp_folders), 0)
+
+    def test_save_merged_folders(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tcp_folder = os.path.join(tmp_dir, 'att', '20240618', '000100000')
+            udp_folder = os.path.join(tmp_dir, 'att', '20240618', '000500000')
+            for folder, name in [(tcp_folder, 'tcp_downlink.out'), (udp_folder, 'udp_downlink.out')]:
+                os.makedirs(os.path.join(folder, 'sub'))
+                for file in [name, 'sub/ping.out', '.hidden']:
+                    with open(os.path.join(folder, file), 'w') as f:
+                        f.write(folder)
+            merged_folder = os.path.join(tmp_dir, 'att_merged', '20240618', '000100000')
+
+            for mode in [MergeMode.HARDLINK, MergeMode.SYMLINK, MergeMode.COPY]:
+                shutil.rmtree(os.path.join(tmp_dir, 'att_merged'), ignore_errors=True)
+                merged_folders = RunMerger(mode=mode).save_merged_folders('att', [(tcp_folder, udp_folder)])
+                self.assertEqual([merged_folder], merged_folders)
+                self.assertEqual(['sub', 'tcp_downlink.out', 'udp_downlink.out'], sorted(os.listdir(merged_folder)))
+                with open(os.path.join(merged_folder, 'sub', 'ping.out')) as f:
+                    # the udp folder is merged last and overwrites files of the same name
+                    self.assertEqual(udp_folder, f.read())
+                self.assertEqual(mode == MergeMode.SYMLINK,
+                                 os.path.islink(os.path.join(merged_folder, 'tcp_downlink.out')))
+                self.assertEqual(mode == MergeMode.HARDLINK,
+                                 os.path.samefile(os.path.join(merged_folder, 'tcp_downlink.out'),
+                                                  os.path.join(tcp_folder, 'tcp_downlink.out'))
+                                 and not os.path.islink(os.path.join(merged_folder, 'tcp_downlink.out')))
@@ -0,0 +1,122 @@
+from typing import List
+
+import pandas as pd
+
+from scripts.utilities.ip_utils import classify_ips, label_ip_prefixes
+
+
+class TracerouteCube:
+    """
+    Per-(run, hop, ip) aggregates of a traceroute frame, built once and queried by hop analyses.
+    A run is one traceroute identified by its start_time. Probes with and without an exception
+    are aggregated separately so that queries can include or exclude them.
+    """
+    RUN = 'start_time'
+    HOP = 'hop_number'
+    IP = 'ip'
+    HAS_EXCEPTION = 'has_exception'
+    IP_PREFIX = 'ip_prefix'
+    IP_CLASS = 'ip_class'
+    IP_OPERATOR_PREFIX = 'ip_operator_prefix'
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        :param df: traceroute frame with start_time, hop_number, ip, rtt_ms and exception columns
+        """
+        frame = pd.DataFrame({
+            self.RUN: df[self.RUN],
+            self.HOP: df[self.HOP],
+            self.IP: df[self.IP],
+            self.HAS_EXCEPTION: df['exception'].notna(),
+            'rtt_ms': pd.to_numeric(df['rtt_ms'], errors='coerce'),
+        })
+        keys = [self.RUN, self.HOP, self.IP, self.HAS_EXCEPTION]
+        # sort=False keeps groups in order of first appearance, like Series.unique()
+        cube_df = frame.groupby(keys, sort=False, dropna=False)['rtt_ms'].agg(
+            probe_count='size',
+            rtt_count='count',
+            rtt_sum='sum',
+            rtt_min='min',
+            rtt_max='max',
+        ).reset_index()
+        # first two octets of IPv4 addresses, e.g. 100.64 for CGNAT or 206.224 for Starlink PoPs
+        cube_df[self.IP_PREFIX] = cube_df[self.IP].str.extract(r'^(\d+\.\d+)\.', expand=False)
+        cube_df[self.IP_CLASS] = classify_ips(cube_df[self.IP])
+        cube_df[self.IP_OPERATOR_PREFIX] = label_ip_prefixes(cube_df[self.IP])
+        self.cube_df = cube_df
+
+    def get_valid_rtt_df(self) -> pd.DataFrame:
+        """
+        Cube rows of probes without exception that have an RTT
+        """
+        return self.cube_df[~self.cube_df[self.HAS_EXCEPTION] & (self.cube_df['rtt_count'] > 0)]
+
+    def get_runs_with_max_hop_below(self, min_hop: int) -> List:
+        max_hop_series = self.cube_df.groupby(self.RUN)[self.HOP].max()
+        return max_hop_series[max_hop_series < min_hop].index.tolist()
+
+    def get_hop_ip_summary(self, hop: int, exclude_exceptions: bool = True) -> pd.DataFrame:
+        """
+        Probe count and mean RTT of every IP seen at a hop, in order of first appearance
+        :return: DataFrame with ip, probe_count and rtt_mean columns
+        """
+        hop_df = self.cube_df[self.cube_df[self.HOP] == hop]
+        if exclude_exceptions:
+            hop_df = hop_df[~hop_df[self.HAS_EXCEPTION]]
+        summary_df = hop_df.groupby(self.IP, sort=False, dropna=False)[['probe_count', 'rtt_count', 'rtt_sum']] \
+            .sum().reset_index()
+        summary_df['rtt_mean'] = summary_df['rtt_sum'] / summary_df['rtt_count']
+        return summary_df[[self.IP, 'probe_count', 'rtt_mean']]
+
+    def get_hop_rtt_series(self, agg: str = 'min') -> pd.Series:
+        """
+        RTT of each (run, hop) over valid probes, sorted by run and hop
+        :param agg: 'min' or 'mean'
+        """
+        valid_df = self.get_valid_rtt_df()
+        grouped = valid_df.groupby([self.RUN, self.HOP])
+        if agg == 'min':
+            return grouped['rtt_min'].min()
+        if agg == 'mean':
+            return grouped['rtt_sum'].sum() / grouped['rtt_count'].sum()
+        raise ValueError(f'Unsupported agg: {agg}')
+
+    @staticmethod
+    def get_last_hop_rtt(hop_rtt_series: pd.Series) -> pd.Series:
+        # the index is sorted by (run, hop), so the last entry of each run is its largest hop
+        return hop_rtt_series.groupby(level=0).tail(1).droplevel(1)
+
+    def get_last_hop_rtt_series(self) -> pd.Series:
+        """
+        Mean RTT of the last hop of each run
+        """
+        last_hop_rtt = self.get_last_hop_rtt(self.get_hop_rtt_series(agg='mean'))
+        return pd.Series(last_hop_rtt.values).dropna().astype(float)
+
+    def get_rtt_diff_series_between_hops(self, hop1: int, hop2: int) -> pd.Series:
+        """
+        Min RTT difference between two hops of each run that has both
+        :param hop1:
+        :param hop2: -1 means the last hop of each run
+        """
+        if hop1 <= 0:
+            raise ValueError('hop1 must be greater than 0')
+        if hop2 != -1 and hop2 < hop1:
+            raise ValueError('hop2 must be greater than hop1')
+
+        hop_rtt_series = self.get_hop_rtt_series(agg='min')
+        hop_numbers = hop_rtt_series.index.get_level_values(self.HOP)
+        hop1_rtt = hop_rtt_series[hop_numbers == hop1].droplevel(1)
+        if hop2 == -1:
+            hop2_rtt = self.get_last_hop_rtt(hop_rtt_series)
+        else:
+            hop2_rtt = hop_rtt_series[hop_numbers == hop2].droplevel(1)
+        hop1_rtt, hop2_rtt = hop1_rtt.align(hop2_rtt, join='inner')
+        return pd.Series(hop2_rtt.values - hop1_rtt.values).dropna().astype(float)
+
+    def get_largest_hop_number_of_ip_prefix(self, ip_prefix: str) -> int:
+        ip_df = self.cube_df.dropna(subset=[self.IP])
+        res_df = ip_df[ip_df[self.IP].str.startswith(ip_prefix)]
+        if res_df.empty:
+            return -1
+        return res_df[self.HOP].max()
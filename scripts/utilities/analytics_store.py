@@ -0,0 +1,192 @@
+import os
+from typing import Any, Dict, List, NamedTuple
+
+import pandas as pd
+
+from scripts.constants import CommonField, DATASET_DIR
+from scripts.utilities.frame_cache import FrameCache
+
+DEFAULT_STORE_DIR = os.path.join(DATASET_DIR, '.analytics_store')
+PROTOCOLS = ['tcp', 'udp']
+DIRECTIONS = ['downlink', 'uplink']
+
+
+class TraceType:
+    TPUT = 'tput'
+    PING = 'ping'
+    XCAL_TPUT = 'xcal_tput'
+
+
+# path of each trace type relative to the root_dir of a location
+DEFAULT_LAYOUT = {
+    TraceType.TPUT: 'throughput/{operator}_{protocol}_{direction}.csv',
+    TraceType.PING: 'ping/{operator}_ping.csv',
+    TraceType.XCAL_TPUT: 'xcal/sizhe_new_data/{operator}_xcal_smart_tput.csv',
+}
+
+
+class Partition(NamedTuple):
+    location: str
+    operator: str
+    trace_type: str
+    protocol: str | None = None
+    direction: str | None = None
+
+
+class AnalyticsStore:
+    """
+    Cross-trip view of the per-operator throughput, ping and xcal CSVs of every location in a location_conf,
+    partitioned by (location, operator, trace type, protocol, direction).
+    Each source CSV is parsed once per process and stored under store_dir, so cross-trip plots query
+    the store instead of rereading and concatenating the raw CSVs.
+
+    Queries prune partitions on the partition keys and apply the row filters (area, weather, tech, ...)
+    to each partition before concatenating, so only the matching rows and requested columns are copied.
+    """
+
+    def __init__(
+            self,
+            location_conf: Dict[str, Dict],
+            layout: Dict[str, str] | None = None,
+            store_dir: str | None = DEFAULT_STORE_DIR,
+    ):
+        """
+        :param location_conf: location -> conf with the root_dir and operators of the location
+        :param layout: overrides of DEFAULT_LAYOUT, such as the ping CSVs with tech of a trip
+        :param store_dir: directory of the stored partitions, None keeps them in memory only
+        """
+        self.location_conf = location_conf
+        self.layout = {**DEFAULT_LAYOUT, **(layout or {})}
+        self.frame_cache = FrameCache(cache_dir=store_dir)
+
+    def get_partitions(
+            self,
+            trace_type: str,
+            locations: List[str] | None = None,
+            operators: List[str] | None = None,
+            protocol: str | None = None,
+            direction: str | None = None,
+    ) -> List[Partition]:
+        """
+        Partitions matching the partition keys, None matches every value
+        """
+        if trace_type not in self.layout:
+            raise ValueError(f'Unsupported trace type: {trace_type}')
+        if trace_type == TraceType.PING:
+            protocols, directions = [None], [None]
+        elif trace_type == TraceType.XCAL_TPUT:
+            # one source file per operator, a None key keeps the rows of every protocol or direction
+            protocols, directions = [protocol], [direction]
+        else:
+            protocols = PROTOCOLS if protocol is None else [protocol]
+            directions = DIRECTIONS if direction is None else [direction]
+
+        partitions = []
+        for location in (locations if locations is not None else list(self.location_conf)):
+            for operator in self.location_conf[location]['operators']:
+                if operators is not None and operator not in operators:
+                    continue
+                for _protocol in protocols:
+                    for _direction in directions:
+                        partitions.append(Partition(location, operator, trace_type, _protocol, _direction))
+        return partitions
+
+    def get_source_path(self, partition: Partition) -> str:
+        rel_path = self.layout[partition.trace_type].format(
+            operator=partition.operator,
+            protocol=partition.protocol,
+            direction=partition.direction,
+        )
+        return os.path.join(self.location_conf[partition.location]['root_dir'], rel_path)
+
+    def read_source(self, partition: Partition) -> pd.DataFrame:
+        """
+        Cached frame of the source CSV of a partition, shared by all callers so it must not be mutated.
+        The xcal CSV of an operator holds all of its protocol/direction partitions.
+        """
+        source_path = self.get_source_path(partition)
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(f'Source data file not found: {source_path}')
+        rel_path = os.path.relpath(source_path, self.location_conf[partition.location]['root_dir'])
+        key = f'{partition.location}.{os.path.splitext(rel_path)[0]}'
+        return self.frame_cache.get(
+            key=key,
+            source_paths=[source_path],
+            loader=lambda: pd.read_csv(source_path),
+            copy=False,
+        )
+
+    def read_partition(
+            self,
+            partition: Partition,
+            filters: Dict[str, Any] | None = None,
+            columns: List[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Rows of a partition matching the filters, with the partition labels as columns
+        :param filters: column -> value or list of values to keep
+        :param columns: source columns to return, None returns all of them
+        """
+        df = self.read_source(partition)
+        mask = pd.Series(True, index=df.index)
+        if partition.trace_type == TraceType.XCAL_TPUT:
+            if partition.protocol is not None:
+                mask &= df[CommonField.APP_TPUT_PROTOCOL] == partition.protocol
+            if partition.direction is not None:
+                mask &= df[CommonField.APP_TPUT_DIRECTION] == partition.direction
+        for field, value in (filters or {}).items():
+            if field not in df.columns:
+                raise ValueError(f'Filter field {field} not found in {self.get_source_path(partition)}')
+            if isinstance(value, (list, tuple, set)):
+                mask &= df[field].isin(value)
+            else:
+                mask &= df[field] == value
+
+        df = df.loc[mask, columns if columns is not None else df.columns].copy()
+        if partition.trace_type == TraceType.TPUT:
+            df[CommonField.APP_TPUT_PROTOCOL] = partition.protocol
+            df[CommonField.APP_TPUT_DIRECTION] = partition.direction
+        df[CommonField.OPERATOR] = partition.operator
+        df[CommonField.LOCATION] = partition.location
+        return df
+
+    def query(
+            self,
+            trace_type: str,
+            locations: List[str] | None = None,
+            operators: List[str] | None = None,
+            protocol: str | None = None,
+            direction: str | None = None,
+            filters: Dict[str, Any] | None = None,
+            columns: List[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Rows of every matching partition in location and operator order, with a fresh index
+        :param filters: column -> value or list of values to keep, such as {CommonField.AREA_TYPE: ['urban', 'suburban']}
+        :param columns: source columns to return in addition to the partition labels, None returns all of them
+        """
+        partitions = self.get_partitions(trace_type, locations, operators, protocol, direction)
+        dfs = [self.read_partition(partition, filters=filters, columns=columns) for partition in partitions]
+        if not dfs:
+            return pd.DataFrame()
+        return pd.concat(dfs, ignore_index=True)
+
+    def preload(
+            self,
+            trace_type: str,
+            locations: List[str] | None = None,
+            operators: List[str] | None = None,
+    ) -> int:
+        """
+        Read the source frames of the matching partitions into the in-process memo, e.g. before forking plot workers
+        so that they share the frames instead of reading them again. Missing source files are skipped.
+        :return: number of source files loaded
+        """
+        source_paths = set()
+        for partition in self.get_partitions(trace_type, locations, operators):
+            source_path = self.get_source_path(partition)
+            if source_path in source_paths or not os.path.exists(source_path):
+                continue
+            self.read_source(partition)
+            source_paths.add(source_path)
+        return len(source_paths)
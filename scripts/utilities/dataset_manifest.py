@@ -0,0 +1,102 @@
+import json
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List
+
+import pandas as pd
+
+# run dirs end with {date}/{time}, such as /path/to/att_merged/20240621/094108769
+RUN_DIR_PATTERN = re.compile(r'(\d{8})/(\d{9})/*$')
+
+
+class DatasetManifest:
+    """
+    In-memory index of the run dirs of a {category}_datasets.json file written by separate_dataset,
+    one row per (run dir, label) with the date, time and start time of the run parsed from its path.
+    Manifests are loaded once per process and file version with DatasetManifest.load, so repeated
+    read_dataset calls and time window queries do not touch the filesystem.
+    """
+    COLUMNS = ['run_dir', 'label', 'date', 'time', 'start_time']
+
+    def __init__(self, datasets: Dict[str, List[str]]):
+        """
+        :param datasets: label -> run dirs, as saved by separate_dataset
+        """
+        self.datasets = {label: list(run_dirs) for label, run_dirs in datasets.items()}
+        records = []
+        for label, run_dirs in self.datasets.items():
+            for run_dir in run_dirs:
+                match = RUN_DIR_PATTERN.search(run_dir)
+                date, time = match.groups() if match else (None, None)
+                records.append((run_dir, label, date, time))
+        df = pd.DataFrame(records, columns=self.COLUMNS[:-1])
+        df['start_time'] = pd.to_datetime(df['date'].str.cat(df['time']), format='%Y%m%d%H%M%S%f', errors='coerce')
+        self.df = df
+
+    @staticmethod
+    def load(path: str) -> 'DatasetManifest':
+        """
+        Manifest of a datasets json file, memoized until the file is modified
+        """
+        stat = os.stat(path)
+        return _load_manifest(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    def get_labels(self) -> List[str]:
+        return list(self.datasets)
+
+    def get_run_dirs(self, labels: str | List[str]) -> List[str]:
+        """
+        :param labels: a label, or labels whose run dirs are concatenated in the given order without duplicates
+        :return: a new list, so that callers can extend it
+        """
+        if isinstance(labels, str):
+            return list(self.datasets[labels])
+        run_dirs = []
+        for label in labels:
+            run_dirs.extend(self.datasets[label])
+        return list(dict.fromkeys(run_dirs))
+
+    def get_run_df(
+            self,
+            labels: str | List[str] | None = None,
+            start: datetime | str | None = None,
+            end: datetime | str | None = None,
+    ) -> pd.DataFrame:
+        """
+        Rows of the runs with any of the labels that started in [start, end), sorted by start time
+        :param start: local start time of the window, None means unbounded
+        :param end: local end time of the window, None means unbounded
+        """
+        mask = pd.Series(True, index=self.df.index)
+        if labels is not None:
+            mask &= self.df['label'].isin([labels] if isinstance(labels, str) else labels)
+        if start is not None:
+            mask &= self.df['start_time'] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= self.df['start_time'] < pd.Timestamp(end)
+        return self.df[mask].sort_values(by=['start_time', 'run_dir'], kind='stable').reset_index(drop=True)
+
+    def query_run_dirs(
+            self,
+            labels: str | List[str] | None = None,
+            start: datetime | str | None = None,
+            end: datetime | str | None = None,
+    ) -> List[str]:
+        """
+        Run dirs with any of the labels that started in [start, end), sorted by start time
+        """
+        return self.get_run_df(labels=labels, start=start, end=end)['run_dir'].drop_duplicates().tolist()
+
+    def get_dates(self, labels: str | List[str] | None = None) -> List[str]:
+        """
+        Sorted dates (YYYYMMDD) of the runs with any of the labels
+        """
+        return sorted(self.get_run_df(labels=labels)['date'].dropna().unique().tolist())
+
+
+@lru_cache(maxsize=None)
+def _load_manifest(path: str, mtime_ns: int, size: int) -> DatasetManifest:
+    with open(path) as f:
+        return DatasetManifest(json.load(f))
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import pickle
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from scripts.math_utils import MAX_CDF_POINTS, downsample_cdf
+
+# Distributions shared by every DistributionCache in the current process, keyed by group fields, value field and
+# fingerprint of the data
+_memo: Dict[tuple, Dict[tuple, 'Distribution']] = {}
+
+
+class Distribution:
+    """
+    Sorted samples of a metric. CDF points, percentiles and summary statistics are read from the sorted array,
+    so plots and stats of the same group do not sort the raw samples again.
+    NaN samples are kept (sorted last) so that the statistics match numpy on the raw samples.
+    """
+
+    def __init__(self, sorted_values: np.ndarray, mean: float | None = None):
+        self.values = sorted_values
+        self.has_nan = len(sorted_values) > 0 and bool(np.isnan(sorted_values[-1]))
+        if mean is None and len(sorted_values) > 0:
+            mean = float(np.mean(sorted_values))
+        self.mean = mean
+
+    @staticmethod
+    def from_values(values: Iterable[float]) -> 'Distribution':
+        values = np.asarray(values, dtype=float)
+        mean = float(np.mean(values)) if len(values) > 0 else None
+        return Distribution(np.sort(values), mean=mean)
+
+    @staticmethod
+    def merge(distributions: List['Distribution']) -> 'Distribution':
+        """
+        Distribution of the union of the samples, the mean is recomputed from the merged samples
+        """
+        if len(distributions) == 1:
+            return distributions[0]
+        if not distributions:
+            return Distribution(np.array([], dtype=float))
+        # stable sort merges the already sorted runs
+        return Distribution(np.sort(np.concatenate([d.values for d in distributions]), kind='stable'))
+
+    def __len__(self):
+        return len(self.values)
+
+    def min(self) -> float:
+        return float('nan') if self.has_nan else float(self.values[0])
+
+    def max(self) -> float:
+        return float(self.values[-1])
+
+    def median(self) -> float:
+        return float(np.median(self.values))
+
+    def percentile(self, q: float) -> float:
+        return float(np.percentile(self.values, q))
+
+    def truncate(self, percentile: float) -> 'Distribution':
+        """
+        Samples up to the given percentile, the same as values[values <= np.percentile(values, percentile)]
+        """
+        if self.has_nan:
+            return Distribution(np.array([], dtype=float))
+        end = np.searchsorted(self.values, self.percentile(percentile), side='right')
+        return Distribution(self.values[:end])
+
+    def get_cdf(self, max_points: int | None = MAX_CDF_POINTS):
+        """
+        :param max_points: number of quantile points to keep, None keeps every sample
+        :return: sorted values and their cumulative probabilities, as math_utils.get_cdf
+        """
+        ranks = np.arange(1, len(self.values) + 1) / len(self.values)
+        return downsample_cdf(self.values, ranks, max_points)
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            'min': self.min(),
+            'max': self.max(),
+            'median': self.median(),
+            'mean': self.mean,
+            'percentile_5': self.percentile(5),
+            'percentile_25': self.percentile(25),
+            'percentile_75': self.percentile(75),
+            'percentile_95': self.percentile(95),
+            'sample_count': len(self),
+        }
+
+
+def get_frame_fingerprint(df: pd.DataFrame, fields: List[str]) -> str:
+    hashes = pd.util.hash_pandas_object(df[fields], index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+
+class DistributionCache:
+    """
+    Per-group sorted distributions of a value field, built with a single groupby and reused by every plot and stats
+    function of the same data within the process. With a cache_dir and a key, the distributions are also pickled
+    and reused by later runs as long as the data has the same fingerprint.
+    """
+
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = cache_dir
+
+    def get_distributions(
+            self,
+            df: pd.DataFrame,
+            group_fields: List[str],
+            value_field: str,
+            key: str | None = None,
+    ) -> Dict[tuple, Distribution]:
+        """
+        :param group_fields: fields to group by, rows with a NaN group field are dropped as in DataFrame.groupby
+        :param key: unique key of the data, used as the on-disk cache filename
+        :return: group tuple -> distribution of value_field, in the order the groups first appear in df
+        """
+        fingerprint = get_frame_fingerprint(df, group_fields + [value_field])
+        memo_key = (tuple(group_fields), value_field, fingerprint)
+        if memo_key not in _memo:
+            distributions = self._get_from_disk(key, fingerprint)
+            if distributions is None:
+                distributions = self.build_distributions(df, group_fields, value_field)
+                self._save_to_disk(key, fingerprint, distributions)
+            _memo[memo_key] = distributions
+        return _memo[memo_key]
+
+    @staticmethod
+    def build_distributions(df: pd.DataFrame, group_fields: List[str], value_field: str) -> Dict[tuple, Distribution]:
+        return {
+            group: Distribution.from_values(group_df[value_field].to_numpy())
+            for group, group_df in df.groupby(group_fields, sort=False)
+        }
+
+    def get_cache_path(self, key: str) -> str:
+        filename = key.replace(os.sep, '_') + '.dist.pkl'
+        return os.path.join(self.cache_dir, filename)
+
+    def _get_from_disk(self, key: str | None, fingerprint: str) -> Dict[tuple, Distribution] | None:
+        if self.cache_dir is None or key is None:
+            return None
+        cache_path = self.get_cache_path(key)
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if payload.get('fingerprint') != fingerprint:
+            return None
+        return payload['distributions']
+
+    def _save_to_disk(self, key: str | None, fingerprint: str, distributions: Dict[tuple, Distribution]):
+        if self.cache_dir is None or key is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_path = self.get_cache_path(key)
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'fingerprint': fingerprint, 'distributions': distributions}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+
+    @staticmethod
+    def clear_memo():
+        _memo.clear()
@@ -0,0 +1,97 @@
+import os
+import pickle
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+# Frames shared by every FrameCache in the current process, keyed by cache key and source paths
+_memo: Dict[Tuple[str, tuple], Tuple[tuple, pd.DataFrame]] = {}
+
+
+def get_source_signature(source_paths: List[str]) -> tuple:
+    """
+    Signature of the source files used to invalidate cached frames, (path, mtime_ns, size) per file
+    """
+    signature = []
+    for path in source_paths:
+        stat = os.stat(path)
+        signature.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class FrameCache:
+    """
+    In-process memo of parsed DataFrames, optionally backed by pickled frames on disk.
+    Pickles keep parsed dtypes (datetimes, categoricals), so a warm cache skips CSV and datetime parsing.
+    A cached frame is only reused while the signature of its source files is unchanged.
+    """
+
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = cache_dir
+
+    def get_cache_path(self, key: str) -> str:
+        filename = key.replace(os.sep, '_') + '.pkl'
+        return os.path.join(self.cache_dir, filename)
+
+    def get(
+            self,
+            key: str,
+            source_paths: List[str],
+            loader: Callable[[], pd.DataFrame],
+            copy: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Return the frame cached under key, calling loader only if the source files changed.
+        :param key: unique key of the frame, used as the on-disk cache filename.
+        :param source_paths: files the frame is derived from.
+        :param loader: callable that builds the frame from the source files.
+        :param copy: return a copy so that callers can mutate the frame freely, default is True.
+        """
+        signature = get_source_signature(source_paths)
+        memo_key = (key, tuple(os.path.abspath(path) for path in source_paths))
+        df = self._get_from_memo(memo_key, signature)
+        if df is None:
+            df = self._get_from_disk(key, signature)
+            if df is None:
+                df = loader()
+                self._save_to_disk(key, signature, df)
+            _memo[memo_key] = (signature, df)
+        return df.copy() if copy else df
+
+    def _get_from_memo(self, memo_key: tuple, signature: tuple) -> pd.DataFrame | None:
+        if memo_key not in _memo:
+            return None
+        cached_signature, df = _memo[memo_key]
+        if cached_signature != signature:
+            return None
+        return df
+
+    def _get_from_disk(self, key: str, signature: tuple) -> pd.DataFrame | None:
+        if self.cache_dir is None:
+            return None
+        cache_path = self.get_cache_path(key)
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if payload.get('signature') != signature:
+            return None
+        return payload['df']
+
+    def _save_to_disk(self, key: str, signature: tuple, df: pd.DataFrame):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_path = self.get_cache_path(key)
+        # per-process temporary file, concurrent plot workers may save the same key
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'signature': signature, 'df': df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+
+    @staticmethod
+    def clear_memo():
+        _memo.clear()
@@ -1,13 +1,143 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Tuple, Any
+from typing import Optional, Dict, Tuple, Any, Iterable, List
+import ipaddress
 import os
 import json
 import requests
 from urllib.parse import urljoin
 
 
+def get_narrowest_network(networks: List[Any]) -> Optional[str]:
+    """Narrowest of the networks containing the same IP, the one every record of that IP applies to"""
+    parsed = []
+    for network in networks:
+        try:
+            parsed.append(ipaddress.ip_network(str(network), strict=False))
+        except ValueError:
+            continue
+    if not parsed:
+        return None
+    return str(max(parsed, key=lambda x: x.prefixlen))
+
+
+class GeoIPLookupCache:
+    """Memo of location lookups keyed by IP, plus locations shared by every IP of a known network prefix"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.locations: Dict[str, Optional[Dict]] = {}
+        # (ip version, prefix length) -> {network address >> host bits: location}
+        self.networks: Dict[Tuple[int, int], Dict[int, Optional[Dict]]] = {}
+        self.hits = 0
+        self.prefix_hits = 0
+        self.lookups = 0
+
+    def get(self, ip_address: str) -> Tuple[bool, Optional[Dict]]:
+        """Returns (found, location), counting hits of known IPs and of known networks"""
+        if ip_address in self.locations:
+            self.hits += 1
+            return True, self.locations[ip_address]
+        if self.networks:
+            try:
+                ip_obj = ipaddress.ip_address(ip_address)
+            except ValueError:
+                ip_obj = None
+            if ip_obj is not None:
+                for (version, prefixlen), network_map in self.networks.items():
+                    if version != ip_obj.version:
+                        continue
+                    key = int(ip_obj) >> (ip_obj.max_prefixlen - prefixlen)
+                    if key in network_map:
+                        self.prefix_hits += 1
+                        location = network_map[key]
+                        self.locations[ip_address] = location
+                        return True, location
+        return False, None
+
+    def put(self, ip_address: str, location: Optional[Dict], network: Optional[str] = None):
+        self.locations[ip_address] = location
+        if network is None:
+            return
+        network_obj = ipaddress.ip_network(network, strict=False)
+        key = int(network_obj.network_address) >> (network_obj.max_prefixlen - network_obj.prefixlen)
+        self.networks.setdefault((network_obj.version, network_obj.prefixlen), {})[key] = location
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'prefix_hits': self.prefix_hits,
+            'lookups': self.lookups,
+            'size': len(self.locations),
+            'networks': sum(len(network_map) for network_map in self.networks.values()),
+        }
+
+
 class IGeoIPQuery(ABC):
     """Interface for GeoIP queries"""
+
+    @property
+    def lookup_cache(self) -> GeoIPLookupCache:
+        if '_lookup_cache' not in self.__dict__:
+            self._lookup_cache = GeoIPLookupCache()
+        return self._lookup_cache
+
+    def _lookup_location(self, ip_address: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Uncached lookup of one IP.
+
+        Returns:
+            Tuple of (location or None, network prefix the location applies to or None)
+        """
+        return self.get_location(ip_address), None
+
+    def _lookup_locations(self, ip_addresses: List[str]) -> Dict[str, Tuple[Optional[Dict], Optional[str]]]:
+        """Lookup of unique uncached IPs, backends with a bulk endpoint override this"""
+        cache = self.lookup_cache
+        res = {}
+        for ip in ip_addresses:
+            # a network resolved earlier in this call may already cover the IP
+            found, location = cache.get(ip)
+            if found:
+                res[ip] = (location, None)
+                continue
+            cache.lookups += 1
+            res[ip] = self._lookup_location(ip)
+            cache.put(ip, *res[ip])
+        return res
+
+    def get_locations(self, ip_addresses: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """Get location information for many IP addresses.
+
+        Every distinct IP is looked up at most once per instance, results are
+        reused for repeated IPs and for other IPs of an already resolved network.
+
+        Args:
+            ip_addresses: IPv4 or IPv6 address strings, may contain duplicates
+
+        Returns:
+            Dictionary of IP to location info (see get_location) or None if lookup fails
+        """
+        cache = self.lookup_cache
+        res = {}
+        misses = []
+        for ip in dict.fromkeys(ip_addresses):
+            found, location = cache.get(ip)
+            if found:
+                res[ip] = location
+            else:
+                misses.append(ip)
+        for ip, (location, network) in self._lookup_locations(misses).items():
+            cache.put(ip, location, network)
+            res[ip] = location
+        return res
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Hits, prefix hits, backend lookups and size of the lookup cache"""
+        return self.lookup_cache.get_stats()
+
+    def clear_cache(self):
+        self.lookup_cache.clear()
     
     @abstractmethod
     def get_location(self, ip_address: str) -> Optional[Dict]:
@@ -71,10 +201,18 @@ class MaxMindGeoIPQuery(IGeoIPQuery):
         self.reader = geoip2.database.Reader(db_path)
 
     def get_location(self, ip_address: str) -> Optional[Dict]:
+        return self.get_locations([ip_address])[ip_address]
+
+    def _lookup_location(self, ip_address: str) -> Tuple[Optional[Dict], Optional[str]]:
         try:
             response = self.reader.city(ip_address)
             isp = self.reader.isp(ip_address)
             asn = self.reader.asn(ip_address)
+            network = get_narrowest_network([
+                getattr(response.traits, 'network', None),
+                getattr(isp, 'network', None),
+                getattr(asn, 'network', None),
+            ])
             res = {
                 'country': response.country.name,
                 'city': response.city.name,
@@ -85,10 +223,10 @@ class MaxMindGeoIPQuery(IGeoIPQuery):
                 'asn': asn.autonomous_system_number,
                 'isp': isp.isp
             }
-            return res
+            return res, network
         except Exception as e:
             print(f"Error getting location for {ip_address}: {e}")
-            return None
+            return None, None
 
     def get_coordinates(self, ip_address: str) -> Optional[Tuple[float, float]]:
         location = self.get_location(ip_address)
@@ -195,9 +333,12 @@ class IPAPIQuery(IGeoIPQuery):
             return None
 
     def get_location(self, ip_address: str) -> Optional[Dict]:
+        return self.get_locations([ip_address])[ip_address]
+
+    def _lookup_location(self, ip_address: str) -> Tuple[Optional[Dict], Optional[str]]:
         data = self._query_api(ip_address)
         if not data:
-            return None
+            return None, None
             
         return {
             'country': data.get('country'),
@@ -208,25 +349,25 @@ class IPAPIQuery(IGeoIPQuery):
             'timezone': data.get('timezone'),
             'asn': data.get('as'),
             'isp': data.get('isp')
-        }
+        }, None
 
     def get_coordinates(self, ip_address: str) -> Optional[Tuple[float, float]]:
-        data = self._query_api(ip_address)
-        if not data:
+        location = self.get_location(ip_address)
+        if not location:
             return None
         
-        lat = data.get('lat')
-        lon = data.get('lon')
+        lat = location['latitude']
+        lon = location['longitude']
         if lat is not None and lon is not None:
             return (lat, lon)
         return None
 
     def get_country(self, ip_address: str) -> Optional[str]:
-        data = self._query_api(ip_address)
-        if not data:
+        location = self.get_location(ip_address)
+        if not location:
             return None
         
-        return data.get('country')
+        return location['country']
 
 
 class IPStackQuery(IGeoIPQuery):
@@ -267,9 +408,12 @@ class IPStackQuery(IGeoIPQuery):
             return None
 
     def get_location(self, ip_address: str) -> Optional[Dict]:
+        return self.get_locations([ip_address])[ip_address]
+
+    def _lookup_location(self, ip_address: str) -> Tuple[Optional[Dict], Optional[str]]:
         data = self._query_api(ip_address)
         if not data:
-            return None
+            return None, None
             
         return {
             'country': data.get('country_name'),
@@ -280,25 +424,52 @@ class IPStackQuery(IGeoIPQuery):
             'timezone': data.get('time_zone', {}).get('id'),
             'asn': None,  # Only available in premium plans
             'isp': None   # Only available in premium plans
-        }
+        }, None
+
+    def _lookup_locations(self, ip_addresses: List[str]) -> Dict[str, Tuple[Optional[Dict], Optional[str]]]:
+        res = {}
+        for i in range(0, len(ip_addresses), self.MAX_BULK_IPS):
+            chunk = ip_addresses[i: i + self.MAX_BULK_IPS]
+            items = self.bulk_lookup(chunk) if len(chunk) > 1 else None
+            if items is None:
+                res.update(super()._lookup_locations(chunk))
+                continue
+            self.lookup_cache.lookups += len(chunk)
+            item_map = {item['ip']: item for item in items}
+            for ip in chunk:
+                item = item_map.get(ip)
+                if item is None:
+                    res[ip] = (None, None)
+                    continue
+                res[ip] = ({
+                    'country': item['country'],
+                    'city': item['city'],
+                    'latitude': item['latitude'],
+                    'longitude': item['longitude'],
+                    'accuracy_radius': None,
+                    'timezone': item['timezone'],
+                    'asn': item['asn'],
+                    'isp': item['isp']
+                }, None)
+        return res
 
     def get_coordinates(self, ip_address: str) -> Optional[Tuple[float, float]]:
-        data = self._query_api(ip_address)
-        if not data:
+        location = self.get_location(ip_address)
+        if not location:
             return None
         
-        lat = data.get('latitude')
-        lon = data.get('longitude')
+        lat = location['latitude']
+        lon = location['longitude']
         if lat is not None and lon is not None:
             return (lat, lon)
         return None
 
     def get_country(self, ip_address: str) -> Optional[str]:
-        data = self._query_api(ip_address)
-        if not data:
+        location = self.get_location(ip_address)
+        if not location:
             return None
         
-        return data.get('country_name')
+        return location['country']
 
     def bulk_lookup(self, ip_addresses: list[str]) -> Optional[list[Dict]]:
         """Perform bulk IP lookup (up to 50 IPs per request).
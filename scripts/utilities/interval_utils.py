@@ -0,0 +1,55 @@
+from typing import List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+def to_utc_timestamps(values: Union[pd.Series, List]) -> np.ndarray:
+    """
+    Convert datetimes (or ISO 8601 strings) to float UTC timestamps in seconds, the vectorized x.timestamp()
+    """
+    dt_series = pd.to_datetime(pd.Series(values), format='ISO8601', utc=True)
+    # divide integer microseconds once, which rounds exactly like datetime.timestamp()
+    utc_dt = dt_series.dt.tz_convert(None).to_numpy().astype('datetime64[us]')
+    utc_ts = utc_dt.astype(np.int64) / 1e6
+    utc_ts[np.isnat(utc_dt)] = np.nan
+    return utc_ts
+
+
+def match_points_to_intervals(
+        points: Union[np.ndarray, List[float]],
+        starts: Union[np.ndarray, List[float]],
+        ends: Union[np.ndarray, List[float]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Interval join of points against closed intervals [start, end], using one sort and searchsorted ranges.
+    Overlapping intervals match the same point more than once; NaN points never match.
+
+    Args:
+        points: point values, e.g. UTC timestamps of metric rows
+        starts: start of each interval
+        ends: end of each interval
+
+    Returns:
+        Tuple of numpy arrays (point_positions, interval_ids), one entry per matched (point, interval) pair,
+        grouped by interval in the given order and ordered by point position within each interval
+    """
+    points = np.asarray(points, dtype=float)
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+
+    valid_positions = np.flatnonzero(~np.isnan(points))
+    order = valid_positions[np.argsort(points[valid_positions], kind='stable')]
+    sorted_points = points[order]
+
+    lo = np.searchsorted(sorted_points, starts, side='left')
+    hi = np.searchsorted(sorted_points, ends, side='right')
+    counts = np.maximum(hi - lo, 0)
+
+    interval_ids = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    point_positions = order[np.repeat(lo, counts) + offsets]
+
+    # points were visited in sorted order, restore their original order within each interval
+    reorder = np.lexsort((point_positions, interval_ids))
+    return point_positions[reorder], interval_ids[reorder]
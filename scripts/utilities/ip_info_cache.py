@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List
+
+from scripts.utilities.IpQuery import IpQuery
+from scripts.utilities.geo_ip_utils import IGeoIPQuery
+
+# A batch fetcher maps a list of IPs to {ip: info}, IPs missing from the result are not cached
+BatchFetcher = Callable[[List[str]], Dict[str, Dict]]
+
+DEFAULT_TTL_S = 30 * 24 * 3600
+
+
+class IpInfoCache:
+    """
+    On-disk IP info store backed by SQLite, entries older than ttl_s are treated as missing.
+    """
+
+    def __init__(self, db_path: str, ttl_s: float = DEFAULT_TTL_S):
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.ttl_s = ttl_s
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS ip_info (ip TEXT PRIMARY KEY, info TEXT NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self.conn.commit()
+
+    def get_many(self, ips: List[str], now: float | None = None) -> Dict[str, Dict]:
+        """
+        :return: {ip: info} of the IPs cached within the TTL
+        """
+        now = time.time() if now is None else now
+        min_updated_at = now - self.ttl_s
+        res = {}
+        # keep well below SQLite's limit of host parameters per statement
+        chunk_size = 500
+        for i in range(0, len(ips), chunk_size):
+            chunk = ips[i: i + chunk_size]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f'SELECT ip, info FROM ip_info WHERE updated_at >= ? AND ip IN ({placeholders})',
+                [min_updated_at, *chunk],
+            )
+            for ip, info in rows:
+                res[ip] = json.loads(info)
+        return res
+
+    def put_many(self, ip_info_map: Dict[str, Dict], now: float | None = None):
+        now = time.time() if now is None else now
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO ip_info (ip, info, updated_at) VALUES (?, ?, ?)',
+            [(ip, json.dumps(info), now) for ip, info in ip_info_map.items()],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that allows at most max_calls in any sliding window of period_s seconds.
+    """
+
+    def __init__(self, max_calls: int, period_s: float):
+        if max_calls <= 0:
+            raise ValueError('max_calls should be positive')
+        self.max_calls = max_calls
+        self.period_s = period_s
+        self.call_times = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.call_times = [t for t in self.call_times if now - t < self.period_s]
+                if len(self.call_times) < self.max_calls:
+                    self.call_times.append(now)
+                    return
+                wait_s = self.period_s - (now - self.call_times[0])
+            time.sleep(wait_s)
+
+
+def ip_api_batch_fetcher(url: str = IpQuery.BATCH_URL) -> BatchFetcher:
+    def fetch(ips: List[str]) -> Dict[str, Dict]:
+        return {item['query']: item for item in IpQuery.batch_ip_lookup(ips, url=url)}
+
+    return fetch
+
+
+def geo_ip_query_fetcher(geo_ip_query: IGeoIPQuery) -> BatchFetcher:
+    def fetch(ips: List[str]) -> Dict[str, Dict]:
+        res = {}
+        for ip in ips:
+            location = geo_ip_query.get_location(ip)
+            if location is not None:
+                res[ip] = location
+        return res
+
+    return fetch
+
+
+def chunk_list(items: List, chunk_size: int) -> List[List]:
+    return [items[i: i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+class IpInfoService:
+    """
+    Look up IP info through a cache, only cache misses are fetched from the backend.
+    Missed IPs are split into batches that are fetched concurrently under a rate limit.
+    """
+
+    def __init__(
+            self,
+            fetch_batch: BatchFetcher,
+            cache: IpInfoCache | None = None,
+            batch_size: int = IpQuery.MAX_IP_PER_REQUEST,
+            max_workers: int = 4,
+            rate_limiter: RateLimiter | None = None,
+    ):
+        if batch_size <= 0:
+            raise ValueError('batch_size should be positive')
+        self.fetch_batch = fetch_batch
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+
+    def _fetch_with_limit(self, ips: List[str]) -> Dict[str, Dict]:
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        return self.fetch_batch(ips)
+
+    def fetch(self, ips: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch IPs from the backend without the cache, failed batches are reported and skipped
+        """
+        batches = chunk_list(ips, self.batch_size)
+        res = {}
+        if not batches:
+            return res
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            future_to_index = {executor.submit(self._fetch_with_limit, batch): i for i, batch in enumerate(batches)}
+            for future in as_completed(future_to_index):
+                try:
+                    res.update(future.result())
+                except Exception as e:
+                    print(f"Error querying IP info: {e} at batch {future_to_index[future]}/{len(batches)}")
+        return res
+
+    def lookup(self, ips: Iterable[str]) -> Dict[str, Dict]:
+        """
+        :param ips: IP addresses, duplicates are queried once
+        :return: {ip: info} for every IP found in the cache or by the backend
+        """
+        unique_ips = list(dict.fromkeys(ip for ip in ips if isinstance(ip, str)))
+        cached = self.cache.get_many(unique_ips) if self.cache else {}
+        misses = [ip for ip in unique_ips if ip not in cached]
+        fetched = self.fetch(misses)
+        if self.cache and fetched:
+            self.cache.put_many(fetched)
+        return {ip: cached[ip] if ip in cached else fetched[ip] for ip in unique_ips if ip in cached or ip in fetched}
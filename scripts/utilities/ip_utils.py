@@ -0,0 +1,123 @@
+import ipaddress
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+class IpClass:
+    PRIVATE = 'private'
+    CGNAT = 'cgnat'
+    LINK_LOCAL = 'link_local'
+    LOOPBACK = 'loopback'
+    RESERVED = 'reserved'
+    PUBLIC = 'public'
+    INVALID = 'invalid'
+
+
+# Special-purpose IPv4 ranges, first match wins. RESERVED covers the remaining ranges that
+# ipaddress reports as private or reserved (documentation, benchmarking, 0/8, 240/4, broadcast).
+IPV4_CLASS_NETWORKS: List[Tuple[str, str]] = [
+    ('10.0.0.0/8', IpClass.PRIVATE),
+    ('172.16.0.0/12', IpClass.PRIVATE),
+    ('192.168.0.0/16', IpClass.PRIVATE),
+    ('100.64.0.0/10', IpClass.CGNAT),
+    ('169.254.0.0/16', IpClass.LINK_LOCAL),
+    ('127.0.0.0/8', IpClass.LOOPBACK),
+    ('0.0.0.0/8', IpClass.RESERVED),
+    ('192.0.0.0/29', IpClass.RESERVED),
+    ('192.0.0.170/31', IpClass.RESERVED),
+    ('192.0.2.0/24', IpClass.RESERVED),
+    ('198.18.0.0/15', IpClass.RESERVED),
+    ('198.51.100.0/24', IpClass.RESERVED),
+    ('203.0.113.0/24', IpClass.RESERVED),
+    ('240.0.0.0/4', IpClass.RESERVED),
+    ('255.255.255.255/32', IpClass.RESERVED),
+]
+
+# Classes of hops inside the user or carrier network, skipped when mapping hops
+PRIVATE_IP_CLASSES = [IpClass.PRIVATE, IpClass.CGNAT, IpClass.LINK_LOCAL]
+
+# Starlink assigns CGNAT addresses behind the dish, 206.224.64.0/18 is announced by Starlink (AS14593)
+STARLINK_IP_PREFIXES: Dict[str, List[str]] = {
+    'starlink_cgnat': ['100.64.0.0/10'],
+    'starlink_pop': ['206.224.64.0/18'],
+}
+
+_OCTET = r'(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+_IPV4_PATTERN = r'^' + r'\.'.join([_OCTET] * 4) + r'$'
+
+
+def to_ipv4_int_array(ips: Union[pd.Series, Iterable]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert IPv4 strings to integers in one pass over the column
+    :param ips: IP strings, anything that is not a dotted IPv4 address is invalid
+    :return: (int64 array, valid mask), invalid entries are 0
+    """
+    ip_series = pd.Series(ips, dtype=object)
+    # non-string values (NaN, None, numbers) never match
+    str_series = ip_series.where(ip_series.map(type) == str)
+    octets = str_series.str.extract(_IPV4_PATTERN)
+    valid = octets[0].notna().to_numpy()
+    octet_values = octets.fillna(0).astype(np.int64).to_numpy()
+    ints = (octet_values[:, 0] << 24) | (octet_values[:, 1] << 16) | (octet_values[:, 2] << 8) | octet_values[:, 3]
+    return ints, valid
+
+
+def get_network_range(network: str) -> Tuple[int, int]:
+    network_obj = ipaddress.ip_network(network, strict=False)
+    return int(network_obj.network_address), int(network_obj.broadcast_address)
+
+
+def label_ip_ranges(
+        ints: np.ndarray,
+        valid: np.ndarray,
+        network_labels: List[Tuple[str, str]],
+        default: str | None,
+) -> np.ndarray:
+    """
+    Label each valid IPv4 integer with the first network that contains it
+    :return: object array of labels, default for valid IPs without a match and None for invalid ones
+    """
+    labels = np.full(len(ints), None, dtype=object)
+    labels[valid] = default
+    unmatched = valid.copy()
+    for network, label in network_labels:
+        start, end = get_network_range(network)
+        mask = unmatched & (ints >= start) & (ints <= end)
+        labels[mask] = label
+        unmatched &= ~mask
+    return labels
+
+
+def classify_ips(ips: Union[pd.Series, Iterable]) -> np.ndarray:
+    """
+    Classify IPv4 addresses as private, cgnat, link_local, loopback, reserved, public or invalid
+    """
+    ints, valid = to_ipv4_int_array(ips)
+    labels = label_ip_ranges(ints, valid, IPV4_CLASS_NETWORKS, default=IpClass.PUBLIC)
+    labels[~valid] = IpClass.INVALID
+    return labels
+
+
+def get_private_ip_mask(ips: Union[pd.Series, Iterable]) -> np.ndarray:
+    """
+    Mask of private, CGNAT and link-local IPv4 addresses
+    """
+    return np.isin(classify_ips(ips), PRIVATE_IP_CLASSES)
+
+
+def label_ip_prefixes(
+        ips: Union[pd.Series, Iterable],
+        prefix_map: Dict[str, List[str]] = None,
+) -> np.ndarray:
+    """
+    Label IPv4 addresses by operator-specific prefixes
+    :param prefix_map: label -> CIDR prefixes, default is STARLINK_IP_PREFIXES
+    :return: object array of labels, None for IPs outside of every prefix
+    """
+    if prefix_map is None:
+        prefix_map = STARLINK_IP_PREFIXES
+    ints, valid = to_ipv4_int_array(ips)
+    network_labels = [(network, label) for label, networks in prefix_map.items() for network in networks]
+    return label_ip_ranges(ints, valid, network_labels, default=None)
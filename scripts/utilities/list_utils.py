@@ -1,5 +1,6 @@
 from typing import Callable, List, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 
@@ -53,4 +54,33 @@ def find_consecutive_with_condition(items: Union[pd.DataFrame, List], condition:
         length = len(items) - start_idx
         consecutive_periods.append((start_idx, length))
     
-    return consecutive_periods
\ No newline at end of file
+    return consecutive_periods
+
+def find_consecutive_runs(mask: Union[np.ndarray, pd.Series, List], group_ids: Union[np.ndarray, pd.Series, List] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized version of find_consecutive_with_condition for boolean masks
+
+    Args:
+        mask: boolean array, True where the condition holds
+        group_ids: optional array of group labels, runs never cross a change of group label
+
+    Returns:
+        Tuple of numpy arrays (starts, ends)
+            starts: Index where each run of True values starts
+            ends: Index where each run of True values ends (inclusive)
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if len(mask) == 0:
+        return np.array([], dtype=int), np.array([], dtype=int)
+
+    prev_mask = np.concatenate(([False], mask[:-1]))
+    next_mask = np.concatenate((mask[1:], [False]))
+    if group_ids is not None:
+        group_ids = np.asarray(group_ids)
+        group_changed = np.concatenate(([True], group_ids[1:] != group_ids[:-1]))
+        prev_mask &= ~group_changed
+        next_mask &= ~np.concatenate((group_changed[1:], [True]))
+
+    starts = np.flatnonzero(mask & ~prev_mask)
+    ends = np.flatnonzero(mask & ~next_mask)
+    return starts, ends
@@ -0,0 +1,106 @@
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+class MultipathScheduler:
+    MAX = 'max'
+    SUM = 'sum'
+    MIN = 'min'
+    WEIGHTED = 'weighted'
+
+
+def combine_max(values_a: np.ndarray, values_b: np.ndarray) -> np.ndarray:
+    return np.maximum(values_a, values_b)
+
+
+def combine_sum(values_a: np.ndarray, values_b: np.ndarray) -> np.ndarray:
+    return values_a + values_b
+
+
+def combine_min(values_a: np.ndarray, values_b: np.ndarray) -> np.ndarray:
+    return np.minimum(values_a, values_b)
+
+
+def combine_weighted(values_a: np.ndarray, values_b: np.ndarray, weight_a: float = 0.5) -> np.ndarray:
+    """
+    Weighted scheduler that puts `weight_a` of the traffic on path A and the rest on path B
+    """
+    if not 0 <= weight_a <= 1:
+        raise ValueError(f'weight_a should be within [0, 1], got {weight_a}')
+    return weight_a * values_a + (1 - weight_a) * values_b
+
+
+scheduler_func_map: Dict[str, Callable] = {
+    MultipathScheduler.MAX: combine_max,
+    MultipathScheduler.SUM: combine_sum,
+    MultipathScheduler.MIN: combine_min,
+    MultipathScheduler.WEIGHTED: combine_weighted,
+}
+
+
+def get_path_columns(df: pd.DataFrame, data_field: str):
+    """
+    Return the A and B columns of a fused trace as float numpy arrays
+    """
+    values_a = df[f'A_{data_field}'].to_numpy(dtype=float)
+    values_b = df[f'B_{data_field}'].to_numpy(dtype=float)
+    return values_a, values_b
+
+
+def combine_two_paths(
+        df: pd.DataFrame,
+        data_field: str,
+        scheduler: str,
+        **kwargs,
+) -> np.ndarray:
+    """
+    Combine the A and B columns of a fused trace with the given scheduler over whole columns
+
+    Args:
+        df: fused trace with `A_{data_field}` and `B_{data_field}` columns
+        data_field: the metric to combine, e.g. CommonField.TPUT_MBPS
+        scheduler: one of MultipathScheduler
+        kwargs: extra arguments of the scheduler, e.g. weight_a for the weighted scheduler
+
+    Returns:
+        numpy array with one combined value per row
+    """
+    if scheduler not in scheduler_func_map:
+        raise ValueError(f'Unsupported multipath scheduler: {scheduler}')
+    values_a, values_b = get_path_columns(df, data_field)
+    return scheduler_func_map[scheduler](values_a, values_b, **kwargs)
+
+
+def attach_multipath_columns(
+        df: pd.DataFrame,
+        data_field: str,
+        column_scheduler_map: Dict[str, str],
+        **kwargs,
+) -> pd.DataFrame:
+    """
+    Attach one combined column per scheduler, e.g. {'max_tput': 'max', 'sum_tput': 'sum'}
+    """
+    values_a, values_b = get_path_columns(df, data_field)
+    for column, scheduler in column_scheduler_map.items():
+        if scheduler not in scheduler_func_map:
+            raise ValueError(f'Unsupported multipath scheduler: {scheduler}')
+        if scheduler == MultipathScheduler.WEIGHTED:
+            df[column] = scheduler_func_map[scheduler](values_a, values_b, **kwargs)
+        else:
+            df[column] = scheduler_func_map[scheduler](values_a, values_b)
+    return df
+
+
+def collect_multipath_series(
+        mptcp_dfs: Dict[str, pd.DataFrame],
+        column: str,
+        keys: List[str] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Collect one combined column from every operator pair as numpy arrays, ready for boxplots or CDFs
+    """
+    if keys is None:
+        keys = list(mptcp_dfs.keys())
+    return {key: mptcp_dfs[key][column].to_numpy() for key in keys}
@@ -0,0 +1,343 @@
+import glob
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from scripts.utilities.interval_utils import match_points_to_intervals, to_utc_timestamps
+from scripts.utilities.xcal_processing_utils import extract_start_end_ms, get_ping_label_of_file, \
+    get_tput_label_of_file
+
+TPUT_PROTOCOL_DIRECTIONS = [('tcp', 'downlink'), ('tcp', 'uplink'), ('udp', 'downlink'), ('udp', 'uplink')]
+TPUT_FILE_PATTERNS = [f'**/{protocol}_{direction}*.out' for protocol, direction in TPUT_PROTOCOL_DIRECTIONS]
+TPUT_TRACE_TYPES = [f'{protocol}_{direction}' for protocol, direction in TPUT_PROTOCOL_DIRECTIONS]
+PING_FILE_PATTERNS = ['**/ping_*.out']
+
+
+class PeriodStatus:
+    OK = 'ok'
+    # the log has no start or end time line, e.g. the measurement was interrupted
+    NO_PERIOD = 'no_period'
+    # the trace type can not be derived from the log name
+    INVALID_NAME = 'invalid_name'
+
+
+class PeriodIndex:
+    """
+    Persistent, per-trip table of the measurement periods of raw logs, one row per log with
+    run_dir, rel_path, operator, trace_type (e.g. tcp_downlink, icmp_uplink), start_utc, end_utc and status.
+    The table is built incrementally: a log is only read again when its mtime or size changed, and a run directory is
+    only listed again when the mtime of the directory or of one of its subdirectories changed, i.e. a log may have
+    been added, removed or renamed. Run directories are checked in parallel. Interval queries answer which measurement was active at a time without
+    touching the raw logs.
+    """
+    COLUMNS = ['run_dir', 'rel_path', 'operator', 'trace_type', 'start_utc', 'end_utc', 'status', 'mtime_ns', 'size']
+
+    def __init__(self, index_path: str | None = None, max_workers: int = 8):
+        """
+        :param index_path: pickle file of the table, None keeps the table in memory only
+        :param max_workers: threads used to scan run directories
+        """
+        self.index_path = index_path
+        self.max_workers = max_workers
+        # run_dir -> {'dir_mtimes': relative path of the run directory and its subdirectories -> mtime when listed,
+        #             'rel_paths': file patterns -> matched logs in pattern and glob order}
+        self.runs: Dict[str, dict] = {}
+        self.df = self._load()
+
+    def _load(self) -> pd.DataFrame:
+        if self.index_path is not None and os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'rb') as f:
+                    payload = pickle.load(f)
+                # indexes saved before the scanned runs were recorded hold the table only
+                df, runs = (payload, {}) if isinstance(payload, pd.DataFrame) else (payload['df'], payload['runs'])
+                if isinstance(df, pd.DataFrame) and list(df.columns) == self.COLUMNS:
+                    self.runs = runs
+                    return df
+            except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+                pass
+        return self._to_df([])
+
+    def _to_df(self, records: List[tuple]) -> pd.DataFrame:
+        """
+        :param records: tuples in the order of COLUMNS, with start and end in epoch milliseconds
+        """
+        df = pd.DataFrame(records, columns=self.COLUMNS)
+        for field in ['start_utc', 'end_utc']:
+            df[field] = pd.to_datetime(df[field], unit='ms', utc=True)
+        return df.astype({'mtime_ns': np.int64, 'size': np.int64})
+
+    def _to_records(self, df: pd.DataFrame) -> List[tuple]:
+        start_ms = self._to_epoch_ms(df['start_utc'])
+        end_ms = self._to_epoch_ms(df['end_utc'])
+        return [
+            row[:4] + (start, end) + row[6:]
+            for row, start, end in zip(df.itertuples(index=False, name=None), start_ms, end_ms)
+        ]
+
+    @staticmethod
+    def _to_epoch_ms(dt_series: pd.Series) -> List[int | None]:
+        ms = dt_series.dt.tz_convert(None).to_numpy().astype('datetime64[ms]')
+        return [None if np.isnat(value) else int(value.astype(np.int64)) for value in ms]
+
+    def save(self):
+        if self.index_path is None:
+            return
+        index_dir = os.path.dirname(self.index_path)
+        if index_dir and not os.path.exists(index_dir):
+            os.makedirs(index_dir)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'df': self.df, 'runs': self.runs}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.index_path)
+
+    def update(self, records: List[tuple]):
+        """
+        Insert or replace the records of logs, keyed by (run_dir, rel_path), and persist the table
+        """
+        if records:
+            new_df = self._to_df(records)
+            keys = pd.MultiIndex.from_frame(self.df[['run_dir', 'rel_path']])
+            new_keys = pd.MultiIndex.from_frame(new_df[['run_dir', 'rel_path']])
+            kept_df = self.df[~keys.isin(new_keys)]
+            self.df = new_df if kept_df.empty else pd.concat([kept_df, new_df], ignore_index=True)
+        self.save()
+
+    @staticmethod
+    def get_dir_mtimes(run_dir: str) -> Dict[str, int]:
+        """
+        mtime of the run directory and of each of its subdirectories, keyed by relative path
+        """
+        dir_mtimes = {}
+        for dir_path, _, _ in os.walk(run_dir):
+            try:
+                dir_mtimes[os.path.relpath(dir_path, run_dir)] = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                continue
+        return dir_mtimes
+
+    def get_listed_rel_paths(self, run_dir: str, patterns_key: tuple) -> List[str] | None:
+        """
+        Logs of a run directory matched by the patterns when it was listed, None if it has to be listed again
+        """
+        run = self.runs.get(run_dir)
+        if run is None or 'dir_mtimes' not in run or patterns_key not in run['rel_paths']:
+            return None
+        # a log added, removed or renamed anywhere in the run changes the mtime of its directory
+        for rel_dir, mtime_ns in run['dir_mtimes'].items():
+            try:
+                if os.stat(os.path.join(run_dir, rel_dir)).st_mtime_ns != mtime_ns:
+                    return None
+            except OSError:
+                return None
+        return run['rel_paths'][patterns_key]
+
+    @staticmethod
+    def index_log(
+            run_dir: str,
+            rel_path: str,
+            get_label: Callable[[str], str],
+            operator: str | None,
+            cached_record: tuple | None,
+    ) -> tuple:
+        """
+        Record of a log, the cached one if the mtime and size of the log are unchanged
+        """
+        file = os.path.join(run_dir, rel_path)
+        stat = os.stat(file)
+        if cached_record is not None and cached_record[-2:] == (stat.st_mtime_ns, stat.st_size):
+            return cached_record if operator is None else cached_record[:2] + (operator,) + cached_record[3:]
+
+        start_ms, end_ms = None, None
+        try:
+            trace_type = get_label(file)
+        except ValueError:
+            trace_type = None
+        if trace_type is None:
+            status = PeriodStatus.INVALID_NAME
+        else:
+            try:
+                start_ms, end_ms = extract_start_end_ms(file)
+                status = PeriodStatus.OK
+            except ValueError:
+                status = PeriodStatus.NO_PERIOD
+        return (run_dir, rel_path, operator, trace_type, start_ms, end_ms, status, stat.st_mtime_ns, stat.st_size)
+
+    def scan_run(
+            self,
+            run_dir: str,
+            file_patterns: List[str],
+            get_label: Callable[[str], str],
+            operator: str | None,
+            cached_records: Dict[str, tuple],
+    ) -> Tuple[List[str], Dict[str, tuple], Dict[str, int] | None]:
+        """
+        :param cached_records: rel_path -> indexed record of the logs of run_dir
+        :return: (relative paths of matched logs in pattern and glob order, records of the matched logs,
+            directory mtimes if the run was listed again else None)
+        """
+        patterns_key = tuple(file_patterns)
+        rel_paths = self.get_listed_rel_paths(run_dir, patterns_key)
+        if rel_paths is not None:
+            try:
+                records = {
+                    rel_path: self.index_log(run_dir, rel_path, get_label, operator, cached_records.get(rel_path))
+                    for rel_path in dict.fromkeys(rel_paths)
+                }
+                return rel_paths, records, None
+            except OSError:
+                # a listed log is gone, list the run again
+                pass
+
+        # taken before listing, so that a log added during the listing marks the run as changed
+        dir_mtimes = self.get_dir_mtimes(run_dir)
+        rel_paths = []
+        records = {}
+        for file_pattern in file_patterns:
+            for file in glob.glob(os.path.join(run_dir, file_pattern), recursive=True):
+                rel_path = os.path.relpath(file, run_dir)
+                rel_paths.append(rel_path)
+                if rel_path not in records:
+                    records[rel_path] = self.index_log(run_dir, rel_path, get_label, operator,
+                                                       cached_records.get(rel_path))
+        return rel_paths, records, dir_mtimes
+
+    def collect_periods(
+            self,
+            run_dirs: List[str],
+            file_patterns: List[str],
+            get_label: Callable[[str], str],
+            operator: str | None = None,
+    ) -> List[Tuple[datetime, datetime, str]]:
+        """
+        Index the logs matching file_patterns in each run directory and return their periods, in the order of
+        collect_periods_of_tput_measurements or collect_periods_of_ping_measurements
+        :param get_label: maps a log path to its trace type, e.g. tcp_downlink
+        :param operator: recorded with the indexed logs, e.g. starlink or att
+        """
+        run_dirs = [os.path.abspath(run_dir) for run_dir in run_dirs]
+        cached_records: Dict[str, Dict[str, tuple]] = {run_dir: {} for run_dir in run_dirs}
+        for record in self._to_records(self.df[self.df['run_dir'].isin(cached_records)]):
+            cached_records[record[0]][record[1]] = record
+
+        patterns_key = tuple(file_patterns)
+        scan_results: Dict[str, Tuple[List[str], Dict[str, tuple]]] = {}
+        relisted = False
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            scanned = executor.map(
+                lambda run_dir: self.scan_run(run_dir, file_patterns, get_label, operator, cached_records[run_dir]),
+                cached_records,
+            )
+            for run_dir, (rel_paths, records, dir_mtimes) in zip(cached_records, scanned):
+                scan_results[run_dir] = (rel_paths, records)
+                if dir_mtimes is None:
+                    continue
+                relisted = True
+                run = self.runs.get(run_dir)
+                if run is None or run.get('dir_mtimes') != dir_mtimes:
+                    run = self.runs[run_dir] = {'dir_mtimes': dir_mtimes, 'rel_paths': {}}
+                run['rel_paths'][patterns_key] = rel_paths
+
+        periods = []
+        new_records = []
+        for run_dir in run_dirs:
+            rel_paths, records = scan_results[run_dir]
+            for rel_path, record in records.items():
+                if cached_records[run_dir].get(rel_path) != record:
+                    new_records.append(record)
+                    # a run listed twice is only updated once
+                    cached_records[run_dir][rel_path] = record
+            for rel_path in rel_paths:
+                _, _, _, trace_type, start_ms, end_ms, status, _, _ = records[rel_path]
+                if status == PeriodStatus.INVALID_NAME:
+                    print(f'Warning: Failed to get the trace type of {os.path.join(run_dir, rel_path)}')
+                    continue
+                if status == PeriodStatus.NO_PERIOD:
+                    print(f'Warning: Failed to extract start and end time from {os.path.join(run_dir, rel_path)}')
+                    continue
+                start_time = pd.Timestamp(start_ms, unit='ms', tz='UTC')
+                end_time = pd.Timestamp(end_ms, unit='ms', tz='UTC')
+                periods.append((start_time, end_time, trace_type))
+
+        if new_records or relisted:
+            self.update(new_records)
+        return periods
+
+    def get_tput_periods(self, run_dirs: List[str], operator: str | None = None) -> List[Tuple[datetime, datetime, str]]:
+        """
+        Periods of tcp/udp downlink/uplink logs, labeled as {protocol}_{direction}
+        """
+        return self.collect_periods(run_dirs, TPUT_FILE_PATTERNS, get_label=get_tput_label_of_file, operator=operator)
+
+    def get_ping_periods(self, run_dirs: List[str], operator: str | None = None) -> List[Tuple[datetime, datetime, str]]:
+        """
+        Periods of ping logs, labeled as icmp_uplink
+        """
+        return self.collect_periods(run_dirs, PING_FILE_PATTERNS, get_label=get_ping_label_of_file, operator=operator)
+
+    def get_period_df(
+            self,
+            operator: str | None = None,
+            trace_types: List[str] | None = None,
+            run_dirs: List[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Indexed periods with status ok, sorted by start time
+        :param trace_types: e.g. ['tcp_downlink', 'tcp_uplink'], None keeps all trace types
+        :param run_dirs: run directories to keep, e.g. the ones of a dataset label, None keeps all indexed runs
+        """
+        mask = self.df['status'] == PeriodStatus.OK
+        if operator is not None:
+            mask &= self.df['operator'] == operator
+        if trace_types is not None:
+            mask &= self.df['trace_type'].isin(trace_types)
+        if run_dirs is not None:
+            mask &= self.df['run_dir'].isin([os.path.abspath(run_dir) for run_dir in run_dirs])
+        return self.df[mask].sort_values(by=['start_utc', 'run_dir', 'rel_path'], kind='stable').reset_index(drop=True)
+
+    def query_intervals(
+            self,
+            times: Union[pd.Series, List],
+            operator: str | None = None,
+            trace_types: List[str] | None = None,
+            run_dirs: List[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Interval join of times against the indexed periods [start_utc, end_utc]
+        :param times: datetimes or ISO 8601 strings, naive values are taken as UTC
+        :return: one row per (time, period) match, the position of the time in point_pos and the position of the
+            period in get_period_df in period_pos, followed by the period columns, ordered by period start and
+            then by time position
+        """
+        period_df = self.get_period_df(operator=operator, trace_types=trace_types, run_dirs=run_dirs)
+        point_positions, period_ids = match_points_to_intervals(
+            to_utc_timestamps(times),
+            to_utc_timestamps(period_df['start_utc']),
+            to_utc_timestamps(period_df['end_utc']),
+        )
+        matched_df = period_df.iloc[period_ids].reset_index(drop=True)
+        matched_df.insert(0, 'point_pos', point_positions)
+        matched_df.insert(1, 'period_pos', period_ids)
+        return matched_df
+
+    def get_active_trace_types(
+            self,
+            times: Union[pd.Series, List],
+            operator: str | None = None,
+            trace_types: List[str] | None = None,
+            run_dirs: List[str] | None = None,
+    ) -> np.ndarray:
+        """
+        Trace type of the measurement active at each time, the latest started one if periods overlap
+        :return: object array aligned with times, None where no measurement was active
+        """
+        matched_df = self.query_intervals(times, operator=operator, trace_types=trace_types, run_dirs=run_dirs)
+        active_trace_types = np.full(len(times), None, dtype=object)
+        # matches are ordered by period start, so later periods overwrite earlier ones
+        active_trace_types[matched_df['point_pos'].to_numpy()] = matched_df['trace_type'].to_numpy()
+        return active_trace_types
@@ -0,0 +1,368 @@
+import fnmatch
+import glob
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Dict, List, Set
+
+
+class NodeStatus:
+    DONE = 'done'
+    # inputs and code are unchanged since the last successful run and all outputs exist
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+    # not run because a node it depends on failed
+    UPSTREAM_FAILED = 'upstream_failed'
+
+
+class PipelineNode:
+    def __init__(
+            self,
+            name: str,
+            func: Callable[[], None],
+            inputs: List[str] | None = None,
+            outputs: List[str] | None = None,
+            after: List[str] | None = None,
+    ):
+        """
+        :param name: unique name of the stage, e.g. parse_nuttcp
+        :param func: stage entry without arguments, e.g. the main() of a parsing script
+        :param inputs: files, directories or glob patterns (** is recursive) read by the stage
+        :param outputs: files, directories or glob patterns written by the stage, an output may also be
+            an input when the stage updates a dataset in place
+        :param after: names of nodes to run before this one in addition to the ones derived from paths
+        """
+        self.name = name
+        self.func = func
+        self.inputs = [os.path.normpath(path) for path in inputs or []]
+        self.outputs = [os.path.normpath(path) for path in outputs or []]
+        self.after = list(after or [])
+
+    def __repr__(self):
+        return f'PipelineNode({self.name})'
+
+
+def _split_static_prefix(path: str) -> str:
+    """
+    Leading part of a path without glob characters, e.g. /data/raw for /data/raw/*/ping_*.out
+    """
+    parts = path.split(os.sep)
+    static_parts = []
+    for part in parts:
+        if glob.has_magic(part):
+            break
+        static_parts.append(part)
+    return os.sep.join(static_parts)
+
+
+def _is_same_or_ancestor(path: str, other: str) -> bool:
+    return path == other or other.startswith(path.rstrip(os.sep) + os.sep)
+
+
+def paths_overlap(path: str, other: str) -> bool:
+    """
+    Whether two declared paths may refer to the same file, i.e. they are equal, one directory contains
+    the other, or a glob pattern matches the other path
+    """
+    if not glob.has_magic(path) and not glob.has_magic(other):
+        return _is_same_or_ancestor(path, other) or _is_same_or_ancestor(other, path)
+    if fnmatch.fnmatch(path, other) or fnmatch.fnmatch(other, path):
+        return True
+    if not glob.has_magic(path):
+        return _is_same_or_ancestor(path, _split_static_prefix(other))
+    if not glob.has_magic(other):
+        return _is_same_or_ancestor(other, _split_static_prefix(path))
+    return False
+
+
+def expand_path(path: str) -> List[str]:
+    """
+    Existing files and directories of a declared path, sorted
+    """
+    if glob.has_magic(path):
+        return sorted(glob.glob(path, recursive=True))
+    return [path] if os.path.exists(path) else []
+
+
+def _list_files(path: str) -> List[str]:
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, dirs, filenames in os.walk(path):
+        dirs.sort()
+        files.extend(os.path.join(root, filename) for filename in sorted(filenames))
+    return files
+
+
+def _hash_file(file: str, block_size: int = 1 << 20) -> str:
+    hasher = hashlib.sha1()
+    with open(file, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def get_paths_signature(paths: List[str], hash_contents: bool = False) -> str:
+    """
+    Digest of the files under the declared paths, keyed by (mtime_ns, size) of each file or by its content
+    :param hash_contents: hash file contents instead, so that touching a file without changing it
+        does not invalidate the stages reading it
+    """
+    entries = []
+    for path in paths:
+        matches = expand_path(path)
+        if not matches:
+            entries.append([path, None])
+            continue
+        for match in matches:
+            for file in _list_files(match):
+                if hash_contents:
+                    entries.append([file, _hash_file(file)])
+                else:
+                    stat = os.stat(file)
+                    entries.append([file, stat.st_mtime_ns, stat.st_size])
+    return hashlib.sha1(json.dumps(entries).encode()).hexdigest()
+
+
+def _run_node(func: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+class PipelineRunner:
+    """
+    Incremental runner of a DAG of pipeline stages. The edges are derived from the declared paths: a node depends
+    on every node whose outputs overlap its inputs, or on the earlier declared one when two nodes update the same
+    files in place. A node is run only when it has never succeeded, one of its outputs is missing, or the signature
+    of its inputs and of the source file of its function changed since its last successful run, which is recorded
+    in a JSON state file. The signatures of nodes updated in place by later nodes of the same chain are recorded again
+    once the run is over. Nodes whose dependencies are finished run concurrently in worker processes, except nodes
+    writing overlapping outputs.
+    """
+
+    def __init__(
+            self,
+            nodes: List[PipelineNode],
+            state_path: str | None = None,
+            max_workers: int = 1,
+            hash_contents: bool = False,
+            logger: logging.Logger | None = None,
+    ):
+        """
+        :param state_path: JSON file of the signatures of succeeded nodes, None keeps them in memory only
+        :param max_workers: processes running nodes concurrently, 1 runs the nodes one by one in this process
+        :param hash_contents: see get_paths_signature
+        """
+        self.nodes: Dict[str, PipelineNode] = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f'Duplicate pipeline node: {node.name}')
+            self.nodes[node.name] = node
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self.hash_contents = hash_contents
+        self.logger = logger or logging.getLogger(__name__)
+        self.dependencies = self._derive_dependencies()
+        self.order = self._sort_topologically()
+        self.state = self._load_state()
+
+    def _derive_dependencies(self) -> Dict[str, Set[str]]:
+        dependencies = {}
+        names = list(self.nodes)
+        for name, node in self.nodes.items():
+            unknown = [dep for dep in node.after if dep not in self.nodes]
+            if unknown:
+                raise ValueError(f'Unknown nodes {unknown} in after of {name}')
+            deps = set(node.after)
+            for other_name, other in self.nodes.items():
+                if other_name == name or not self._reads_outputs_of(node, other):
+                    continue
+                # stages updating the same files in place read each other's outputs, they run in declaration order
+                if self._reads_outputs_of(other, node) and names.index(other_name) > names.index(name):
+                    continue
+                deps.add(other_name)
+            dependencies[name] = deps
+        return dependencies
+
+    @staticmethod
+    def _reads_outputs_of(node: PipelineNode, other: PipelineNode) -> bool:
+        return any(paths_overlap(input_path, output_path)
+                   for input_path in node.inputs for output_path in other.outputs)
+
+    def _sort_topologically(self) -> List[str]:
+        """
+        Node names with every node after its dependencies, keeping the declaration order otherwise
+        """
+        order = []
+        visited = set()
+        visiting = set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f'Pipeline has a cycle through {name}')
+            visiting.add(name)
+            for dep in sorted(self.dependencies[name], key=list(self.nodes).index):
+                visit(dep)
+            visiting.remove(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name)
+        return order
+
+    def _load_state(self) -> Dict[str, dict]:
+        if self.state_path is not None and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path) as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def _save_state(self):
+        if self.state_path is None:
+            return
+        state_dir = os.path.dirname(self.state_path)
+        if state_dir and not os.path.exists(state_dir):
+            os.makedirs(state_dir)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def get_signature(self, node: PipelineNode) -> str:
+        paths = list(node.inputs)
+        source_file = inspect.getsourcefile(node.func)
+        if source_file is not None:
+            paths.append(source_file)
+        return get_paths_signature(paths, hash_contents=self.hash_contents)
+
+    def get_stale_reason(self, node: PipelineNode) -> str | None:
+        """
+        :return: why the node has to run, None if it is up to date
+        """
+        record = self.state.get(node.name)
+        if record is None:
+            return 'never run'
+        missing_outputs = [path for path in node.outputs if not expand_path(path)]
+        if missing_outputs:
+            return f'missing outputs {missing_outputs}'
+        if record['signature'] != self.get_signature(node):
+            return 'inputs or code changed'
+        return None
+
+    def get_upstream(self, names: List[str]) -> Set[str]:
+        """
+        The given nodes and all nodes they depend on transitively
+        """
+        upstream = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name not in self.nodes:
+                raise ValueError(f'Unknown pipeline node: {name}')
+            if name in upstream:
+                continue
+            upstream.add(name)
+            stack.extend(self.dependencies[name])
+        return upstream
+
+    def _conflicts(self, node: PipelineNode, running: List[PipelineNode]) -> bool:
+        return any(paths_overlap(output_path, other_output_path)
+                   for other in running for output_path in node.outputs for other_output_path in other.outputs)
+
+    def run(self, targets: List[str] | None = None, force: List[str] | None = None) -> Dict[str, str]:
+        """
+        Run the stale nodes among the targets and their upstream nodes, in dependency order
+        :param targets: node names to bring up to date, None means all nodes
+        :param force: node names to run even if they are up to date, nodes depending on them rerun
+            when their outputs changed
+        :return: node name -> NodeStatus of the selected nodes
+        """
+        selected = self.get_upstream(targets) if targets is not None else set(self.nodes)
+        forced = set(force or [])
+        pending = [name for name in self.order if name in selected]
+        statuses: Dict[str, str] = {}
+        running: Dict[Future, PipelineNode] = {}
+        executor = ProcessPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else None
+
+        try:
+            while pending or running:
+                for name in list(pending):
+                    node = self.nodes[name]
+                    deps = self.dependencies[name] & selected
+                    if any(statuses.get(dep) in (NodeStatus.FAILED, NodeStatus.UPSTREAM_FAILED) for dep in deps):
+                        self.logger.warning(f'[{name}] not run as an upstream node failed')
+                        statuses[name] = NodeStatus.UPSTREAM_FAILED
+                        pending.remove(name)
+                        continue
+                    if any(dep not in statuses for dep in deps) or self._conflicts(node, list(running.values())):
+                        continue
+                    if executor is not None and len(running) >= self.max_workers:
+                        break
+
+                    reason = 'forced' if name in forced else self.get_stale_reason(node)
+                    pending.remove(name)
+                    if reason is None:
+                        self.logger.info(f'[{name}] up to date, skipped')
+                        statuses[name] = NodeStatus.SKIPPED
+                        continue
+                    self.logger.info(f'[{name}] running: {reason}')
+                    if executor is None:
+                        statuses[name] = self._finish(node, lambda: _run_node(node.func))
+                    else:
+                        running[executor.submit(_run_node, node.func)] = node
+
+                if running:
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        node = running.pop(future)
+                        statuses[node.name] = self._finish(node, future.result)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self._refresh_in_place_signatures(statuses)
+        return statuses
+
+    def _refresh_in_place_signatures(self, statuses: Dict[str, str]):
+        """
+        Record again the signature of the up to date nodes whose inputs were then updated in place by a later node
+        of the same chain, e.g. append_tech before append_weather_area on the same ping CSVs, otherwise the earlier
+        node would see its own chain as a changed input and rerun on every invocation
+        """
+        refreshed = False
+        for name in self.order:
+            if statuses.get(name) not in (NodeStatus.DONE, NodeStatus.SKIPPED) or name not in self.state:
+                continue
+            node = self.nodes[name]
+            if any(statuses.get(other) == NodeStatus.DONE and other != name
+                   and name in self.get_upstream([other]) and self._reads_outputs_of(node, self.nodes[other])
+                   for other in self.nodes):
+                self.state[name]['signature'] = self.get_signature(node)
+                refreshed = True
+        if refreshed:
+            self._save_state()
+
+    def _finish(self, node: PipelineNode, get_elapsed: Callable[[], float]) -> str:
+        try:
+            elapsed = get_elapsed()
+        except Exception:
+            self.logger.exception(f'[{node.name}] failed')
+            return NodeStatus.FAILED
+        self.logger.info(f'[{node.name}] done in {elapsed:.1f}s')
+        # recorded after the run so that nodes updating their inputs in place do not trigger themselves
+        self.state[node.name] = {
+            'signature': self.get_signature(node),
+            'finished_at': datetime.now().isoformat(),
+        }
+        self._save_state()
+        return NodeStatus.DONE
@@ -0,0 +1,133 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List
+
+
+class PlotJob:
+    def __init__(self, name: str, func: Callable, /, *args, **kwargs):
+        """
+        :param name: unique name of the figure, e.g. tcp_downlink_by_area
+        :param func: function rendering and saving the figure, called as func(*args, **kwargs)
+        """
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return f'PlotJob({self.name})'
+
+
+# jobs of the running scheduler, inherited by forked workers so that jobs and their data are never pickled
+_jobs: List[PlotJob] = []
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+def _render(job: PlotJob) -> float:
+    from matplotlib import pyplot as plt
+    start = time.perf_counter()
+    try:
+        job.func(*job.args, **job.kwargs)
+    finally:
+        plt.close('all')
+    return time.perf_counter() - start
+
+
+def _render_inherited_job(index: int) -> float:
+    return _render(_jobs[index])
+
+
+class PlotScheduler:
+    """
+    Render independent figures in a pool of worker processes with the headless Agg backend.
+    Where fork is available, workers inherit the jobs and everything loaded before run (job arguments, module level
+    frames, the FrameCache memo) copy-on-write, so preloaded data is shared instead of pickled for every figure.
+    Otherwise jobs are pickled to spawned workers, which requires picklable functions and arguments.
+    A failing figure does not stop the others, the failures are raised together once every figure is done.
+    """
+
+    def __init__(self, max_workers: int | None = None, logger: logging.Logger | None = None):
+        """
+        :param max_workers: processes rendering figures concurrently, None uses all cores,
+            1 renders the figures one by one in this process
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.logger = logger or logging.getLogger(__name__)
+        self.jobs: Dict[str, PlotJob] = {}
+
+    def add(self, name: str, func: Callable, /, *args, **kwargs) -> 'PlotScheduler':
+        if name in self.jobs:
+            raise ValueError(f'Duplicate plot job: {name}')
+        self.jobs[name] = PlotJob(name, func, *args, **kwargs)
+        return self
+
+    def get_names(self) -> List[str]:
+        return list(self.jobs)
+
+    def run(self, names: List[str] | None = None) -> Dict[str, float]:
+        """
+        :param names: figures to render in the given order, None renders all of them in the order they were added
+        :return: figure name -> rendering time in seconds
+        """
+        unknown = [name for name in names or [] if name not in self.jobs]
+        if unknown:
+            raise ValueError(f'Unknown plot jobs: {unknown}')
+        jobs = [self.jobs[name] for name in names] if names is not None else list(self.jobs.values())
+
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        failures: Dict[str, Exception] = {}
+        if self.max_workers == 1 or len(jobs) <= 1:
+            for job in jobs:
+                self._finish(job, lambda: _render(job), timings, failures)
+        else:
+            self._run_in_pool(jobs, timings, failures)
+
+        self.logger.info(f'Rendered {len(timings)}/{len(jobs)} figures in {time.perf_counter() - start:.1f}s '
+                         f'with {min(self.max_workers, len(jobs))} workers')
+        if failures:
+            raise RuntimeError(f'Failed to render figures: {list(failures)}')
+        return timings
+
+    def _run_in_pool(self, jobs: List[PlotJob], timings: Dict[str, float], failures: Dict[str, Exception]):
+        global _jobs
+        use_fork = 'fork' in multiprocessing.get_all_start_methods()
+        mp_context = multiprocessing.get_context('fork' if use_fork else 'spawn')
+        _jobs = jobs
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=min(self.max_workers, len(jobs)),
+                    mp_context=mp_context,
+                    initializer=_init_worker,
+            ) as executor:
+                if use_fork:
+                    futures = {executor.submit(_render_inherited_job, index): job for index, job in enumerate(jobs)}
+                else:
+                    futures = {executor.submit(_render, job): job for job in jobs}
+                for future in as_completed(futures):
+                    self._finish(futures[future], future.result, timings, failures)
+        finally:
+            _jobs = []
+
+    def _finish(
+            self,
+            job: PlotJob,
+            get_elapsed: Callable[[], float],
+            timings: Dict[str, float],
+            failures: Dict[str, Exception],
+    ):
+        try:
+            elapsed = get_elapsed()
+        except Exception as e:
+            self.logger.exception(f'[{job.name}] failed')
+            failures[job.name] = e
+            return
+        self.logger.info(f'[{job.name}] rendered in {elapsed:.1f}s')
+        timings[job.name] = elapsed
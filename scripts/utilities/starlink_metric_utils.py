@@ -3,6 +3,7 @@ from datetime import datetime
 import logging
 import os
 from typing import List, Tuple
+import numpy as np
 import pandas as pd
 
 from scripts.utilities.AppTputPeriodExtractor import AppTputPeriodExtractor
@@ -20,24 +21,21 @@ class StarlinkMetricProcessor:
         self.logger = logger
 
     def process(self):
-        all_periods = self.app_tput_extractor.extract_app_tput_periods(timezone=self.timezone)
         starlink_metric_csv = os.path.join(self.starlink_metric_dir, 'starlink_metric.csv')
         metric_df = pd.read_csv(starlink_metric_csv)
 
         self.logger.info(f'Before filtering, data len: {len(metric_df)}')
-        filtered_df = self.filter_metric_data_by_periods(metric_df=metric_df, periods=all_periods)
+        filtered_df = self.filter_metric_data_by_periods(metric_df=metric_df)
         self.logger.info(f'After filtering, data len: {len(filtered_df)}')
 
         weather_csv_path = os.path.join(self.others_dir, 'weather.csv')
         area_csv_path = os.path.join(self.others_dir, 'area.csv')
         
         weather_df = pd.read_csv(weather_csv_path)
-        weather_df[CommonField.LOCAL_DT] = pd.to_datetime(weather_df[CommonField.LOCAL_DT], format="ISO8601")
-        weather_query_util = TypeIntervalQueryUtil(weather_df[[CommonField.LOCAL_DT, 'value']].values.tolist())
+        weather_query_util = TypeIntervalQueryUtil.from_df(weather_df, time_field=CommonField.LOCAL_DT)
 
         area_df = pd.read_csv(area_csv_path)
-        area_df[CommonField.LOCAL_DT] = pd.to_datetime(area_df[CommonField.LOCAL_DT], format="ISO8601")
-        area_query_util = TypeIntervalQueryUtil(area_df[[CommonField.LOCAL_DT, 'value']].values.tolist())
+        area_query_util = TypeIntervalQueryUtil.from_df(area_df, time_field=CommonField.LOCAL_DT)
 
         filtered_df = self.append_weather_area_to_df(
             df=filtered_df, 
@@ -57,30 +55,32 @@ class StarlinkMetricProcessor:
             output_file_path=app_tput_periods_csv
         )
     
-    def filter_metric_data_by_periods(self, metric_df: pd.DataFrame, periods: List[Tuple[datetime, datetime, str, str]]):
+    def filter_metric_data_by_periods(self, metric_df: pd.DataFrame):
+        """
+        Keep the metric rows whose res_time falls in any app tput period [start, end], labeled with the period.
+        Rows are matched with the interval join of the period index, so the whole metric frame is scanned once
+        instead of once per period.
+        """
         metric_df['res_time'] = pd.to_datetime(metric_df['res_time'], format='ISO8601')
-        res_utc_ts_series = metric_df['res_time'].apply(lambda x: x.timestamp())
-        
-        filtered_rows = []
-        for period in periods:
-            start_time, end_time, protocol, direction = period
-            start_ts = start_time.timestamp()
-            end_ts = end_time.timestamp()
-            period_row_df = metric_df[res_utc_ts_series.between(start_ts, end_ts)].copy()
+        matched_df = self.app_tput_extractor.query_app_tput_intervals(metric_df['res_time'])
+        if len(matched_df) == 0:
+            return pd.DataFrame()
 
-            if len(period_row_df) == 0:
-                continue
+        positions = matched_df['point_pos'].to_numpy()
+        period_ids = matched_df['period_pos'].to_numpy()
+        src_idx = metric_df.index.to_numpy()[positions]
+        # rows of one period are contiguous, label each period with its first and last source index
+        period_starts = np.flatnonzero(np.concatenate(([True], period_ids[1:] != period_ids[:-1])))
+        period_ends = np.concatenate((period_starts[1:], [len(period_ids)])) - 1
+        segment_ids = [f'{src_idx[start]}:{src_idx[end]}' for start, end in zip(period_starts, period_ends)]
+        counts = period_ends - period_starts + 1
+        protocol_directions = matched_df['trace_type'].str.split('_', n=1, expand=True)
 
-            segment_id = f'{period_row_df.index[0]}:{period_row_df.index[-1]}'
-            period_row_df[CommonField.SEGMENT_ID] = segment_id
-            period_row_df[CommonField.SRC_IDX] = period_row_df.index
-            period_row_df[CommonField.APP_TPUT_PROTOCOL] = protocol
-            period_row_df[CommonField.APP_TPUT_DIRECTION] = direction
-            filtered_rows.append(period_row_df)
-        if len(filtered_rows) > 0:
-            filtered_df = pd.concat(filtered_rows, ignore_index=True)
-        else:
-            filtered_df = pd.DataFrame()
+        filtered_df = metric_df.iloc[positions].reset_index(drop=True)
+        filtered_df[CommonField.SEGMENT_ID] = np.repeat(segment_ids, counts)
+        filtered_df[CommonField.SRC_IDX] = src_idx
+        filtered_df[CommonField.APP_TPUT_PROTOCOL] = protocol_directions[0].to_numpy()
+        filtered_df[CommonField.APP_TPUT_DIRECTION] = protocol_directions[1].to_numpy()
         return filtered_df
 
     def drop_cols_before_appending(self, df: pd.DataFrame):
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.utilities.DatasetHelper import DatasetHelper
+from scripts.utilities.frame_cache import FrameCache
+
+
+class TestDatasetHelper(unittest.TestCase):
+    def setUp(self):
+        FrameCache.clear_memo()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = self.tmp_dir.name
+        for protocol in ['tcp', 'udp']:
+            for direction in ['downlink', 'uplink']:
+                pd.DataFrame({
+                    'time': ['2024-06-21 10:00:00', '2024-06-21 10:00:01'],
+                    'throughput_mbps': [10.0, 20.0] if protocol == 'tcp' else [30.0, 40.0],
+                }).to_csv(os.path.join(self.base_dir, f'starlink_{protocol}_{direction}.csv'), index=False)
+        pd.DataFrame({'rtt_ms': [40.0, 50.0]}).to_csv(os.path.join(self.base_dir, 'starlink_ping.csv'), index=False)
+        self.helper = DatasetHelper(self.base_dir)
+
+    def tearDown(self):
+        FrameCache.clear_memo()
+        self.tmp_dir.cleanup()
+
+    def test_get_tput_data(self):
+        df = self.helper.get_tput_data(operator='starlink', direction='uplink')
+        self.assertEqual(['time', 'throughput_mbps', 'operator', 'protocol', 'direction'], df.columns.tolist())
+        self.assertEqual([10.0, 20.0, 30.0, 40.0], df['throughput_mbps'].tolist())
+        self.assertEqual(['tcp', 'tcp', 'udp', 'udp'], df['protocol'].tolist())
+        self.assertEqual({'uplink'}, set(df['direction']))
+        self.assertEqual(8, len(self.helper.get_tput_data(operator='starlink')))
+        with self.assertRaises(ValueError):
+            self.helper.get_tput_data(operator='starlink', protocol='quic')
+
+    def test_repeated_queries_read_csv_once_and_return_copies(self):
+        df = self.helper.get_tput_data(operator='starlink', protocol='tcp', direction='downlink')
+        df['throughput_mbps'] = 0.0
+        self.helper.get_ping_data(operator='starlink')
+        with patch('pandas.read_csv') as mock_read_csv:
+            cached_df = self.helper.get_tput_data(operator='starlink', protocol='tcp', direction='downlink')
+            DatasetHelper(self.base_dir).get_ping_data(operator='starlink')
+            mock_read_csv.assert_not_called()
+        self.assertEqual([10.0, 20.0], cached_df['throughput_mbps'].tolist())
+
+    def test_usecols_and_categorical_labels(self):
+        df = self.helper.get_tput_data(operator='starlink', direction='downlink',
+                                       usecols=['throughput_mbps', 'operator'], categorical_labels=True)
+        self.assertEqual(['throughput_mbps', 'operator', 'protocol', 'direction'], df.columns.tolist())
+        for field in ['operator', 'protocol', 'direction']:
+            self.assertIsInstance(df[field].dtype, pd.CategoricalDtype)
+        self.assertEqual(['tcp', 'tcp', 'udp', 'udp'], df['protocol'].tolist())
+        self.assertEqual(['downlink', 'uplink'], df['direction'].cat.categories.tolist())
+
+        ping_df = self.helper.get_ping_data(operator='starlink', categorical_labels=True)
+        self.assertIsInstance(ping_df['operator'].dtype, pd.CategoricalDtype)
+
+    def test_categorical_operators_stay_categorical_when_concatenated(self):
+        for operator in ['att', 'verizon', 'unknown']:
+            pd.DataFrame({'rtt_ms': [60.0]}).to_csv(os.path.join(self.base_dir, f'{operator}_ping.csv'), index=False)
+        df = pd.concat([self.helper.get_ping_data(operator=operator, categorical_labels=True)
+                        for operator in ['att', 'verizon']])
+        self.assertIsInstance(df['operator'].dtype, pd.CategoricalDtype)
+        self.assertEqual(['att', 'verizon'], df['operator'].tolist())
+        with self.assertRaises(ValueError):
+            self.helper.get_ping_data(operator='unknown', categorical_labels=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
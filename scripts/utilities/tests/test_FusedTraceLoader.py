@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.utilities.FusedTraceLoader import FusedTraceLoader
+from scripts.utilities.frame_cache import FrameCache
+
+
+class TestFusedTraceLoader(unittest.TestCase):
+    def setUp(self):
+        FrameCache.clear_memo()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = self.tmp_dir.name
+        self.csv_path = os.path.join(self.base_dir, 'fused_trace.tcp_downlink.starlink_att.csv')
+        pd.DataFrame({
+            'A': ['starlink', 'starlink'],
+            'A_time': ['2024-06-01 00:00:00+00:00', '2024-06-01 00:00:01.500000+00:00'],
+            'A_throughput_mbps': [100.0, 120.0],
+            'B': ['att', 'att'],
+            'B_time': ['2024-06-01 00:00:00.200000+00:00', '2024-06-01 00:00:01.700000+00:00'],
+            'B_throughput_mbps': [20.0, 30.0],
+        }).to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        FrameCache.clear_memo()
+        self.tmp_dir.cleanup()
+
+    def test_read_fused_trace_parses_time_fields(self):
+        loader = FusedTraceLoader(self.base_dir)
+        df = loader.read_fused_trace('starlink', 'att', 'tcp_downlink')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['A_time']))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['B_time']))
+        self.assertEqual(df['A_throughput_mbps'].tolist(), [100.0, 120.0])
+
+    def test_read_fused_trace_uses_disk_cache(self):
+        FusedTraceLoader(self.base_dir).read_fused_trace('starlink', 'att', 'tcp_downlink')
+        FrameCache.clear_memo()
+
+        loader = FusedTraceLoader(self.base_dir)
+        loader.parse_trace = lambda csv_path: self.fail('trace should be loaded from the disk cache')
+        df = loader.read_fused_trace('starlink', 'att', 'tcp_downlink')
+        self.assertEqual(len(df), 2)
+        self.assertTrue(os.path.exists(os.path.join(self.base_dir, '.cache', 'fused_trace.tcp_downlink.starlink_att.pkl')))
+
+    def test_read_fused_trace_returns_copy(self):
+        loader = FusedTraceLoader(self.base_dir)
+        df = loader.read_fused_trace('starlink', 'att', 'tcp_downlink')
+        df['max_tput'] = 0
+        df = loader.read_fused_trace('starlink', 'att', 'tcp_downlink')
+        self.assertNotIn('max_tput', df.columns)
+
+    def test_read_fused_trace_reloads_changed_source(self):
+        loader = FusedTraceLoader(self.base_dir)
+        loader.read_fused_trace('starlink', 'att', 'tcp_downlink')
+
+        df = pd.read_csv(self.csv_path)
+        df = pd.concat([df, df.iloc[[0]]], ignore_index=True)
+        df.to_csv(self.csv_path, index=False)
+
+        df = loader.read_fused_trace('starlink', 'att', 'tcp_downlink')
+        self.assertEqual(len(df), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
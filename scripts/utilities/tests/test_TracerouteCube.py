@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.utilities.TracerouteCube import TracerouteCube
+
+
+class TestTracerouteCube(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'start_time': ['t1'] * 5 + ['t2'] * 4,
+            'hop_number': [1, 1, 2, 3, 4, 1, 2, 2, 3],
+            'ip': ['192.168.1.1', '192.168.1.1', '100.64.0.1', '206.224.64.190', '8.8.8.8',
+                   '192.168.1.1', np.nan, '100.64.0.1', '206.224.64.185'],
+            'rtt_ms': [3.0, 5.0, 30.0, 40.0, 60.0, 2.0, np.nan, 25.0, 45.0],
+            'exception': [None, None, None, None, None, None, None, None, '!H'],
+        })
+        self.cube = TracerouteCube(self.df)
+
+    def test_get_rtt_diff_series_between_hops(self):
+        self.assertEqual([27.0, 23.0], self.cube.get_rtt_diff_series_between_hops(hop1=1, hop2=2).tolist())
+        self.assertEqual([10.0], self.cube.get_rtt_diff_series_between_hops(hop1=2, hop2=3).tolist())
+
+    def test_get_rtt_diff_with_last_hop_of_each_run(self):
+        # the last valid hop is 4 for t1 and 2 for t2, as hop 3 of t2 has an exception
+        self.assertEqual([57.0, 23.0], self.cube.get_rtt_diff_series_between_hops(hop1=1, hop2=-1).tolist())
+
+    def test_get_rtt_diff_with_invalid_hops(self):
+        with self.assertRaises(ValueError):
+            self.cube.get_rtt_diff_series_between_hops(hop1=0, hop2=2)
+        with self.assertRaises(ValueError):
+            self.cube.get_rtt_diff_series_between_hops(hop1=3, hop2=2)
+
+    def test_get_last_hop_rtt_series(self):
+        self.assertEqual([60.0, 25.0], self.cube.get_last_hop_rtt_series().tolist())
+
+    def test_get_largest_hop_number_of_ip_prefix(self):
+        self.assertEqual(3, self.cube.get_largest_hop_number_of_ip_prefix('206.224'))
+        self.assertEqual(-1, self.cube.get_largest_hop_number_of_ip_prefix('10.'))
+
+    def test_get_hop_ip_summary(self):
+        summary_df = self.cube.get_hop_ip_summary(2)
+        self.assertEqual(['100.64.0.1', 'nan'], summary_df['ip'].astype(str).tolist())
+        self.assertEqual([2, 1], summary_df['probe_count'].tolist())
+        self.assertEqual(27.5, summary_df['rtt_mean'].iloc[0])
+        self.assertTrue(np.isnan(summary_df['rtt_mean'].iloc[1]))
+
+        self.assertEqual(0, len(self.cube.get_hop_ip_summary(3).query('ip == "206.224.64.185"')))
+        self.assertEqual(1, len(self.cube.get_hop_ip_summary(3, exclude_exceptions=False)
+                                .query('ip == "206.224.64.185"')))
+
+    def test_get_runs_with_max_hop_below(self):
+        self.assertEqual(['t2'], self.cube.get_runs_with_max_hop_below(4))
+        self.assertEqual([], self.cube.get_runs_with_max_hop_below(3))
+
+    def test_ip_prefix_column(self):
+        cube_df = self.cube.cube_df
+        self.assertEqual('100.64', cube_df.loc[cube_df['ip'] == '100.64.0.1', 'ip_prefix'].iloc[0])
+        self.assertTrue(cube_df.loc[cube_df['ip'].isna(), 'ip_prefix'].isna().all())
+
+    def test_ip_class_columns(self):
+        cube_df = self.cube.cube_df.drop_duplicates(subset=['ip']).set_index('ip')
+        self.assertEqual('private', cube_df.loc['192.168.1.1', 'ip_class'])
+        self.assertEqual('cgnat', cube_df.loc['100.64.0.1', 'ip_class'])
+        self.assertEqual('public', cube_df.loc['8.8.8.8', 'ip_class'])
+        self.assertEqual('starlink_pop', cube_df.loc['206.224.64.190', 'ip_operator_prefix'])
+        self.assertIsNone(cube_df.loc['8.8.8.8', 'ip_operator_prefix'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.constants import CommonField, XcalField
+from scripts.utilities.analytics_store import AnalyticsStore, Partition, TraceType
+from scripts.utilities.frame_cache import FrameCache
+
+
+class TestAnalyticsStore(unittest.TestCase):
+    def setUp(self):
+        FrameCache.clear_memo()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.location_conf = {}
+        for location, operators in [('alaska', ['starlink', 'att']), ('hawaii', ['starlink'])]:
+            root_dir = os.path.join(self.tmp_dir.name, location)
+            os.makedirs(os.path.join(root_dir, 'throughput'))
+            os.makedirs(os.path.join(root_dir, 'xcal', 'sizhe_new_data'))
+            for operator in operators:
+                for protocol in ['tcp', 'udp']:
+                    for direction in ['downlink', 'uplink']:
+                        pd.DataFrame({
+                            CommonField.TPUT_MBPS: [1.0, 2.0, 3.0],
+                            CommonField.AREA_TYPE: ['urban', 'rural', 'suburban'],
+                        }).to_csv(os.path.join(root_dir, 'throughput', f'{operator}_{protocol}_{direction}.csv'),
+                                  index=False)
+                pd.DataFrame({
+                    XcalField.ACTUAL_TECH: ['LTE', '5G-low', 'LTE'],
+                    XcalField.APP_TPUT_PROTOCOL: ['tcp', 'tcp', 'udp'],
+                    XcalField.APP_TPUT_DIRECTION: ['downlink', 'downlink', 'uplink'],
+                }).to_csv(os.path.join(root_dir, 'xcal', 'sizhe_new_data', f'{operator}_xcal_smart_tput.csv'),
+                          index=False)
+            self.location_conf[location] = {'root_dir': root_dir, 'operators': operators}
+        self.store_dir = os.path.join(self.tmp_dir.name, 'store')
+        self.store = AnalyticsStore(self.location_conf, store_dir=self.store_dir)
+
+    def tearDown(self):
+        FrameCache.clear_memo()
+        self.tmp_dir.cleanup()
+
+    def test_get_partitions(self):
+        self.assertEqual([
+            Partition('alaska', 'starlink', TraceType.TPUT, 'tcp', 'downlink'),
+            Partition('alaska', 'starlink', TraceType.TPUT, 'tcp', 'uplink'),
+        ], self.store.get_partitions(TraceType.TPUT, locations=['alaska'], operators=['starlink'], protocol='tcp'))
+        self.assertEqual(3, len(self.store.get_partitions(TraceType.XCAL_TPUT)))
+        with self.assertRaises(ValueError):
+            self.store.get_partitions('unknown')
+
+    def test_query_with_filters_and_columns(self):
+        df = self.store.query(
+            TraceType.TPUT,
+            protocol='tcp',
+            direction='downlink',
+            filters={CommonField.AREA_TYPE: ['urban', 'suburban']},
+            columns=[CommonField.TPUT_MBPS],
+        )
+        self.assertEqual([CommonField.TPUT_MBPS, CommonField.APP_TPUT_PROTOCOL, CommonField.APP_TPUT_DIRECTION,
+                          CommonField.OPERATOR, CommonField.LOCATION], df.columns.tolist())
+        self.assertEqual([1.0, 3.0] * 3, df[CommonField.TPUT_MBPS].tolist())
+        self.assertEqual(['alaska'] * 4 + ['hawaii'] * 2, df[CommonField.LOCATION].tolist())
+        self.assertEqual(list(range(6)), df.index.tolist())
+
+        xcal_df = self.store.query(TraceType.XCAL_TPUT, locations=['hawaii'], protocol='tcp',
+                                   filters={XcalField.ACTUAL_TECH: 'LTE'})
+        self.assertEqual(1, len(xcal_df))
+        self.assertEqual(3, len(self.store.query(TraceType.XCAL_TPUT, locations=['hawaii'])))
+
+        with self.assertRaises(ValueError):
+            self.store.query(TraceType.TPUT, filters={'unknown': 1})
+
+    def test_partitions_are_stored_and_reused(self):
+        df = self.store.query(TraceType.TPUT, locations=['hawaii'])
+        df[CommonField.TPUT_MBPS] = 0.0
+        self.assertEqual(4, len(os.listdir(self.store_dir)))
+
+        FrameCache.clear_memo()
+        with patch('pandas.read_csv') as mock_read_csv:
+            df = AnalyticsStore(self.location_conf, store_dir=self.store_dir).query(TraceType.TPUT, locations=['hawaii'])
+            mock_read_csv.assert_not_called()
+        self.assertEqual([1.0, 2.0, 3.0] * 4, df[CommonField.TPUT_MBPS].tolist())
+
+    def test_preload(self):
+        self.assertEqual(4, self.store.preload(TraceType.TPUT, locations=['hawaii']))
+        # one xcal file per operator, the ping files do not exist
+        self.assertEqual(3, self.store.preload(TraceType.XCAL_TPUT))
+        self.assertEqual(0, self.store.preload(TraceType.PING))
+        with patch('pandas.read_csv') as mock_read_csv:
+            self.store.query(TraceType.TPUT, locations=['hawaii'])
+            mock_read_csv.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.utilities.dataset_manifest import DatasetManifest
+
+
+class TestDatasetManifest(unittest.TestCase):
+    def setUp(self):
+        self.datasets = {
+            'normal': ['/raw/att_merged/20240621/153752852', '/raw/att_merged/20240622/090000000'],
+            'bbr_testing_data': ['/raw/att_merged/20240621/123500000', '/raw/att_merged/20240621/130000000'],
+            'small_memory_and_cubic': ['/raw/att_merged/20240621/094108769', '/raw/att_merged/20240621/123500000'],
+        }
+        self.manifest = DatasetManifest(self.datasets)
+
+    def test_get_run_dirs(self):
+        self.assertEqual(self.datasets['normal'], self.manifest.get_run_dirs('normal'))
+        self.assertEqual(self.datasets['normal'] + self.datasets['bbr_testing_data'],
+                         self.manifest.get_run_dirs(['normal', 'bbr_testing_data']))
+        self.assertEqual(['/raw/att_merged/20240621/123500000', '/raw/att_merged/20240621/130000000',
+                          '/raw/att_merged/20240621/094108769'],
+                         self.manifest.get_run_dirs(['bbr_testing_data', 'small_memory_and_cubic']))
+        with self.assertRaises(KeyError):
+            self.manifest.get_run_dirs('unknown')
+
+        run_dirs = self.manifest.get_run_dirs('normal')
+        run_dirs.append('/raw/other')
+        self.assertEqual(2, len(self.manifest.get_run_dirs('normal')))
+
+    def test_query_run_dirs_by_time_window(self):
+        self.assertEqual(['/raw/att_merged/20240621/094108769', '/raw/att_merged/20240621/123500000'],
+                         self.manifest.query_run_dirs(start='2024-06-21 09:00', end=datetime(2024, 6, 21, 13)))
+        self.assertEqual(['/raw/att_merged/20240621/153752852'],
+                         self.manifest.query_run_dirs(labels='normal', end='2024-06-22'))
+        self.assertEqual(['20240621', '20240622'], self.manifest.get_dates())
+        self.assertEqual(datetime(2024, 6, 21, 9, 41, 8, 769000), self.manifest.get_run_df()['start_time'].iloc[0])
+
+    def test_load_is_memoized_until_the_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'att_merged_datasets.json')
+            with open(path, 'w') as f:
+                json.dump(self.datasets, f)
+            manifest = DatasetManifest.load(path)
+            with patch('builtins.open') as mock_open:
+                self.assertIs(manifest, DatasetManifest.load(path))
+                mock_open.assert_not_called()
+
+            with open(path, 'w') as f:
+                json.dump({'normal': []}, f, indent=4)
+            self.assertEqual([], DatasetManifest.load(path).get_run_dirs('normal'))
+
+
+if __name__ == '__main__':
+    unittest.main()
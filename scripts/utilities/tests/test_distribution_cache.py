@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.math_utils import get_cdf
+from scripts.utilities.distribution_cache import Distribution, DistributionCache
+
+
+class TestDistribution(unittest.TestCase):
+    def setUp(self):
+        self.values = np.random.default_rng(0).gamma(2, 50, 5001)
+        self.distribution = Distribution.from_values(self.values)
+
+    def test_stats_match_numpy(self):
+        stats = self.distribution.get_stats()
+        self.assertEqual(float(np.min(self.values)), stats['min'])
+        self.assertEqual(float(np.max(self.values)), stats['max'])
+        self.assertEqual(float(np.median(self.values)), stats['median'])
+        self.assertEqual(float(np.mean(self.values)), stats['mean'])
+        self.assertEqual(float(np.percentile(self.values, 95)), stats['percentile_95'])
+        self.assertEqual(5001, stats['sample_count'])
+
+        with_nan = Distribution.from_values([1.0, np.nan, 0.0])
+        self.assertTrue(np.isnan(with_nan.min()))
+        self.assertTrue(np.isnan(with_nan.percentile(50)))
+        self.assertEqual(0, len(with_nan.truncate(95)))
+
+    def test_truncate_and_cdf(self):
+        truncated = self.values[self.values <= np.percentile(self.values, 95)]
+        np.testing.assert_array_equal(np.sort(truncated), self.distribution.truncate(95).values)
+
+        xvals, yvals = self.distribution.get_cdf(max_points=None)
+        expected_xvals, expected_yvals = get_cdf(self.values)
+        np.testing.assert_array_equal(expected_xvals, xvals)
+        np.testing.assert_array_equal(expected_yvals, yvals)
+
+        xvals, yvals = self.distribution.get_cdf(max_points=100)
+        self.assertEqual(100, len(xvals))
+        self.assertEqual((expected_xvals[0], expected_xvals[-1]), (xvals[0], xvals[-1]))
+        self.assertEqual(1.0, yvals[-1])
+        self.assertTrue(np.isin(xvals, expected_xvals).all())
+
+    def test_merge(self):
+        merged = Distribution.merge([Distribution.from_values(self.values[:2000]),
+                                     Distribution.from_values(self.values[2000:])])
+        np.testing.assert_array_equal(self.distribution.values, merged.values)
+        self.assertAlmostEqual(self.distribution.mean, merged.mean)
+        self.assertEqual(0, len(Distribution.merge([])))
+
+
+class TestDistributionCache(unittest.TestCase):
+    def setUp(self):
+        DistributionCache.clear_memo()
+        self.df = pd.DataFrame({
+            'location': ['alaska', 'hawaii', 'alaska', None],
+            'throughput_mbps': [3.0, 2.0, 1.0, 4.0],
+        })
+
+    def tearDown(self):
+        DistributionCache.clear_memo()
+
+    def test_get_distributions(self):
+        distributions = DistributionCache().get_distributions(self.df, ['location'], 'throughput_mbps')
+        self.assertEqual([('alaska',), ('hawaii',)], list(distributions))
+        self.assertEqual([1.0, 3.0], distributions[('alaska',)].values.tolist())
+
+        with patch.object(DistributionCache, 'build_distributions') as mock_build:
+            self.assertIs(distributions,
+                          DistributionCache().get_distributions(self.df.copy(), ['location'], 'throughput_mbps'))
+            mock_build.assert_not_called()
+
+    def test_disk_cache_is_invalidated_by_data_changes(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = DistributionCache(cache_dir=cache_dir)
+            cache.get_distributions(self.df, ['location'], 'throughput_mbps', key='tput')
+            DistributionCache.clear_memo()
+            with patch.object(DistributionCache, 'build_distributions') as mock_build:
+                cache.get_distributions(self.df, ['location'], 'throughput_mbps', key='tput')
+                mock_build.assert_not_called()
+
+            self.df.loc[0, 'throughput_mbps'] = 5.0
+            distributions = cache.get_distributions(self.df, ['location'], 'throughput_mbps', key='tput')
+            self.assertEqual([1.0, 5.0], distributions[('alaska',)].values.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
 import unittest
 from unittest.mock import Mock, patch
 import os
-from scripts.utilities.geo_ip_utils import GeoIpUtils
+import json
+import tempfile
+from scripts.utilities.geo_ip_utils import GeoIpUtils, GeoIPLookupCache, IPAPIQuery, JsonGeoIPQuery, \
+    MaxMindGeoIPQuery
 
 # Set this path to your actual GeoLite2-City.mmdb file location for real database testing
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -122,5 +125,84 @@ class TestGeoIpUtils(unittest.TestCase):
                         self.assertEqual(country, "United States")
 
 
+class TestGeoIPBulkLookup(unittest.TestCase):
+    def create_maxmind_query(self, network='8.8.8.0/24'):
+        # bypass __init__ so that the test does not need geoip2 or a database file
+        geo_ip = MaxMindGeoIPQuery.__new__(MaxMindGeoIPQuery)
+        record = Mock()
+        record.country.name = "United States"
+        record.city.name = "Mountain View"
+        record.location.latitude = 37.4056
+        record.location.longitude = -122.0775
+        record.location.accuracy_radius = 1000
+        record.location.time_zone = "America/Los_Angeles"
+        record.traits.network = network
+        isp = Mock(isp='Google LLC', network='8.8.0.0/16')
+        asn = Mock(autonomous_system_number=15169, network='8.0.0.0/9')
+        geo_ip.reader = Mock()
+        geo_ip.reader.city.return_value = record
+        geo_ip.reader.isp.return_value = isp
+        geo_ip.reader.asn.return_value = asn
+        return geo_ip
+
+    def test_maxmind_get_locations_reuses_ips_and_prefixes(self):
+        geo_ip = self.create_maxmind_query()
+        locations = geo_ip.get_locations(['8.8.8.8', '8.8.8.8', '8.8.8.4', '8.8.4.4'])
+        self.assertEqual(['8.8.8.8', '8.8.8.4', '8.8.4.4'], list(locations.keys()))
+        self.assertEqual('Google LLC', locations['8.8.8.4']['isp'])
+        # 8.8.8.4 is served by the /24 of 8.8.8.8, 8.8.4.4 is outside of it
+        self.assertEqual(2, geo_ip.reader.city.call_count)
+
+        self.assertEqual((37.4056, -122.0775), geo_ip.get_coordinates('8.8.8.8'))
+        self.assertEqual("United States", geo_ip.get_country('8.8.8.8'))
+        self.assertEqual(2, geo_ip.reader.city.call_count)
+        self.assertEqual({'hits': 2, 'prefix_hits': 1, 'lookups': 2, 'size': 3, 'networks': 1},
+                         geo_ip.get_cache_stats())
+
+    def test_maxmind_failed_lookup_is_memoized(self):
+        geo_ip = self.create_maxmind_query()
+        geo_ip.reader.city.side_effect = Exception("IP not found")
+        self.assertIsNone(geo_ip.get_location('invalid.ip'))
+        self.assertIsNone(geo_ip.get_location('invalid.ip'))
+        self.assertEqual(1, geo_ip.reader.city.call_count)
+
+    def test_json_get_locations(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = os.path.join(tmp_dir, 'ip_info_map.json')
+            with open(json_path, 'w') as f:
+                json.dump({'8.8.8.8': {'status': 'success', 'country': 'United States', 'lat': 1.0, 'lon': 2.0}}, f)
+            with JsonGeoIPQuery(json_path) as geo_ip:
+                locations = geo_ip.get_locations(['8.8.8.8', '1.1.1.1', '8.8.8.8'])
+                self.assertEqual(locations, geo_ip.get_locations(['8.8.8.8', '1.1.1.1']))
+        self.assertEqual('United States', locations['8.8.8.8']['country'])
+        self.assertIsNone(locations['1.1.1.1'])
+        self.assertEqual(2, geo_ip.get_cache_stats()['hits'])
+        self.assertEqual(2, geo_ip.get_cache_stats()['lookups'])
+
+    @patch('scripts.utilities.geo_ip_utils.requests.get')
+    def test_ip_api_queries_each_ip_once(self, mock_get):
+        mock_get.return_value.json.return_value = {'status': 'success', 'country': 'Canada', 'lat': 1.0, 'lon': 2.0}
+        geo_ip = IPAPIQuery()
+        self.assertEqual('Canada', geo_ip.get_country('24.48.0.1'))
+        self.assertEqual((1.0, 2.0), geo_ip.get_coordinates('24.48.0.1'))
+        geo_ip.get_locations(['24.48.0.1', '24.48.0.1'])
+        self.assertEqual(1, mock_get.call_count)
+
+    def test_lookup_cache_ignores_other_ip_versions(self):
+        cache = GeoIPLookupCache()
+        cache.put('8.8.8.8', {'country': 'United States'}, network='8.8.8.0/24')
+        self.assertEqual((False, None), cache.get('2001:4860:4860::8888'))
+        self.assertEqual((False, None), cache.get('not an ip'))
+        self.assertEqual((True, {'country': 'United States'}), cache.get('8.8.8.1'))
+
+    def test_lookup_cache_clear(self):
+        cache = GeoIPLookupCache()
+        cache.put('8.8.8.8', {'country': 'United States'}, network='8.8.8.0/24')
+        cache.get('8.8.8.8')
+        cache.clear()
+        self.assertEqual((False, None), cache.get('8.8.8.1'))
+        self.assertEqual({'hits': 0, 'prefix_hits': 0, 'lookups': 0, 'size': 0, 'networks': 0}, cache.get_stats())
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.utilities.interval_utils import match_points_to_intervals, to_utc_timestamps
+
+
+class TestIntervalUtils(unittest.TestCase):
+    def test_match_points_to_intervals(self):
+        points = [0, 1, 2, 3, 4, 5]
+        positions, interval_ids = match_points_to_intervals(points, starts=[1, 10, 4], ends=[2, 12, 5])
+        self.assertEqual(positions.tolist(), [1, 2, 4, 5])
+        self.assertEqual(interval_ids.tolist(), [0, 0, 2, 2])
+
+    def test_match_points_to_overlapping_intervals(self):
+        points = [0, 1, 2, 3]
+        positions, interval_ids = match_points_to_intervals(points, starts=[0, 1], ends=[2, 3])
+        self.assertEqual(positions.tolist(), [0, 1, 2, 1, 2, 3])
+        self.assertEqual(interval_ids.tolist(), [0, 0, 0, 1, 1, 1])
+
+    def test_match_unsorted_points_keeps_point_order(self):
+        points = [3, np.nan, 1, 2, 0]
+        positions, interval_ids = match_points_to_intervals(points, starts=[1], ends=[3])
+        self.assertEqual(positions.tolist(), [0, 2, 3])
+        self.assertEqual(interval_ids.tolist(), [0, 0, 0])
+
+    def test_match_without_intervals(self):
+        positions, interval_ids = match_points_to_intervals([1, 2, 3], starts=[], ends=[])
+        self.assertEqual(len(positions), 0)
+        self.assertEqual(len(interval_ids), 0)
+
+    def test_to_utc_timestamps(self):
+        dt = datetime(2024, 6, 1, 10, 0, 0, 123456, tzinfo=timezone(timedelta(hours=-8)))
+        series = pd.Series([dt.isoformat(), None])
+        timestamps = to_utc_timestamps(series)
+        self.assertEqual(timestamps[0], dt.timestamp())
+        self.assertTrue(np.isnan(timestamps[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
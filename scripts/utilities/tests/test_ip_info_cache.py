@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.utilities.ip_info_cache import IpInfoCache, IpInfoService, RateLimiter, chunk_list, \
+    geo_ip_query_fetcher, ip_api_batch_fetcher
+from scripts.utilities.geo_ip_utils import JsonGeoIPQuery
+
+
+class FakeIpApiHandler(BaseHTTPRequestHandler):
+    requested_batches = []
+
+    def do_POST(self):
+        ips = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        FakeIpApiHandler.requested_batches.append(ips)
+        if 'fail' in self.path:
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps([{'status': 'success', 'query': ip, 'country': 'United States'} for ip in ips])
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestIpInfoCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeIpApiHandler)
+        cls.url = f'http://127.0.0.1:{cls.server.server_address[1]}/batch'
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FakeIpApiHandler.requested_batches = []
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, 'ip_info_cache.sqlite')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_lookup_fetches_cache_misses_only(self):
+        ips = [f'8.8.8.{i}' for i in range(5)]
+        with IpInfoCache(self.cache_path) as cache:
+            service = IpInfoService(ip_api_batch_fetcher(self.url), cache=cache, batch_size=2)
+            res = service.lookup(ips[:3] + ips[:3])
+            self.assertEqual(ips[:3], list(res.keys()))
+            self.assertEqual(2, len(FakeIpApiHandler.requested_batches))
+
+        with IpInfoCache(self.cache_path) as cache:
+            service = IpInfoService(ip_api_batch_fetcher(self.url), cache=cache, batch_size=2)
+            res = service.lookup(ips)
+            self.assertEqual(ips, list(res.keys()))
+            self.assertEqual('United States', res['8.8.8.4']['country'])
+            self.assertEqual(ips[3:], FakeIpApiHandler.requested_batches[-1])
+            self.assertEqual(3, len(FakeIpApiHandler.requested_batches))
+
+    def test_lookup_without_misses_sends_no_request(self):
+        with IpInfoCache(self.cache_path) as cache:
+            cache.put_many({'1.1.1.1': {'query': '1.1.1.1'}})
+            service = IpInfoService(ip_api_batch_fetcher(self.url), cache=cache)
+            self.assertEqual({'1.1.1.1': {'query': '1.1.1.1'}}, service.lookup(['1.1.1.1']))
+            self.assertEqual([], FakeIpApiHandler.requested_batches)
+
+    def test_exact_multiple_of_batch_size_has_no_empty_batch(self):
+        service = IpInfoService(ip_api_batch_fetcher(self.url), batch_size=2)
+        service.lookup([f'8.8.8.{i}' for i in range(4)])
+        self.assertEqual([2, 2], sorted(len(batch) for batch in FakeIpApiHandler.requested_batches))
+        self.assertEqual([], chunk_list([], 2))
+
+    def test_expired_entries_are_fetched_again(self):
+        with IpInfoCache(self.cache_path, ttl_s=60) as cache:
+            cache.put_many({'8.8.8.8': {'query': '8.8.8.8', 'country': 'Old'}}, now=time.time() - 120)
+            service = IpInfoService(ip_api_batch_fetcher(self.url), cache=cache)
+            self.assertEqual('United States', service.lookup(['8.8.8.8'])['8.8.8.8']['country'])
+            self.assertEqual([['8.8.8.8']], FakeIpApiHandler.requested_batches)
+
+    def test_failed_batch_is_skipped_and_not_cached(self):
+        with IpInfoCache(self.cache_path) as cache:
+            service = IpInfoService(ip_api_batch_fetcher(self.url + '?fail'), cache=cache)
+            self.assertEqual({}, service.lookup(['8.8.8.8']))
+            self.assertEqual({}, cache.get_many(['8.8.8.8']))
+
+    def test_geo_ip_query_backend(self):
+        json_path = os.path.join(self.tmp_dir.name, 'ip_info_map.json')
+        with open(json_path, 'w') as f:
+            json.dump({'8.8.8.8': {'status': 'success', 'country': 'United States', 'lat': 1.0, 'lon': 2.0}}, f)
+        service = IpInfoService(geo_ip_query_fetcher(JsonGeoIPQuery(json_path)))
+        res = service.lookup(['8.8.8.8', '9.9.9.9'])
+        self.assertEqual(['8.8.8.8'], list(res.keys()))
+        self.assertEqual((1.0, 2.0), (res['8.8.8.8']['latitude'], res['8.8.8.8']['longitude']))
+
+    def test_rate_limiter(self):
+        rate_limiter = RateLimiter(max_calls=2, period_s=0.2)
+        start = time.monotonic()
+        for _ in range(3):
+            rate_limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.utilities.ip_utils import IpClass, classify_ips, get_private_ip_mask, label_ip_prefixes, \
+    to_ipv4_int_array
+
+
+class TestIpUtils(unittest.TestCase):
+    def test_to_ipv4_int_array(self):
+        ints, valid = to_ipv4_int_array(['0.0.0.1', '1.2.3.4', '255.255.255.255', '256.1.1.1', '01.2.3.4', None])
+        self.assertEqual([True, True, True, False, False, False], valid.tolist())
+        self.assertEqual([1, 0x01020304, 0xFFFFFFFF], ints[valid].tolist())
+
+    def test_classify_ips(self):
+        ips = pd.Series([
+            '192.168.1.1', '10.188.60.105', '172.31.0.1', '172.32.0.1',
+            '100.64.0.1', '100.127.255.255', '100.128.0.1',
+            '169.254.1.1', '127.0.0.1', '198.18.0.1', '240.0.0.1',
+            '8.8.8.8', np.nan, '2001:4860:4860::8888',
+        ])
+        expected = [
+            IpClass.PRIVATE, IpClass.PRIVATE, IpClass.PRIVATE, IpClass.PUBLIC,
+            IpClass.CGNAT, IpClass.CGNAT, IpClass.PUBLIC,
+            IpClass.LINK_LOCAL, IpClass.LOOPBACK, IpClass.RESERVED, IpClass.RESERVED,
+            IpClass.PUBLIC, IpClass.INVALID, IpClass.INVALID,
+        ]
+        self.assertEqual(expected, classify_ips(ips).tolist())
+
+    def test_get_private_ip_mask(self):
+        ips = np.array(['192.168.1.1', '100.64.0.1', '169.254.0.2', '127.0.0.1', '99.83.118.220'], dtype=object)
+        self.assertEqual([True, True, True, False, False], get_private_ip_mask(ips).tolist())
+
+    def test_label_ip_prefixes(self):
+        labels = label_ip_prefixes(['100.64.0.1', '206.224.65.146', '206.224.128.1', '8.8.8.8', None])
+        self.assertEqual(['starlink_cgnat', 'starlink_pop', None, None, None], labels.tolist())
+
+        labels = label_ip_prefixes(['12.1.2.3', '8.8.8.8'], prefix_map={'att': ['12.0.0.0/8']})
+        self.assertEqual(['att', None], labels.tolist())
+
+    def test_empty_input(self):
+        self.assertEqual([], classify_ips([]).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,7 @@ import pandas as pd
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scripts.utilities.list_utils import replace_with_elements, find_consecutive_with_condition
+from scripts.utilities.list_utils import replace_with_elements, find_consecutive_with_condition, find_consecutive_runs
 
 
 class ListUtilTest(unittest.TestCase):
@@ -70,6 +70,28 @@ class ListUtilTest(unittest.TestCase):
         result = find_consecutive_with_condition(df, condition)
         self.assertEqual(result, [(1, 2), (4, 1)])
 
+    def test_find_consecutive_runs(self):
+        starts, ends = find_consecutive_runs([False, True, True, True, False, True, True, False])
+        self.assertEqual(starts.tolist(), [1, 5])
+        self.assertEqual(ends.tolist(), [3, 6])
+
+    def test_find_consecutive_runs_edges(self):
+        starts, ends = find_consecutive_runs([True, True, False, True])
+        self.assertEqual(starts.tolist(), [0, 3])
+        self.assertEqual(ends.tolist(), [1, 3])
+
+        starts, ends = find_consecutive_runs([])
+        self.assertEqual(starts.tolist(), [])
+        self.assertEqual(ends.tolist(), [])
+
+    def test_find_consecutive_runs_split_by_group(self):
+        starts, ends = find_consecutive_runs(
+            [True, True, True, True, False, True],
+            group_ids=[1, 1, 2, 2, 2, 3],
+        )
+        self.assertEqual(starts.tolist(), [0, 2, 5])
+        self.assertEqual(ends.tolist(), [1, 3, 5])
+
 
 if __name__ == '__main__':
     unittest.main()
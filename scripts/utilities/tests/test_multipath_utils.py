@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.utilities.multipath_utils import (
+    MultipathScheduler,
+    attach_multipath_columns,
+    collect_multipath_series,
+    combine_two_paths,
+)
+
+
+class TestMultipathUtils(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'A_throughput_mbps': [10, 20, 0, 35.5],
+            'B_throughput_mbps': [15, 5, 0, 30],
+        })
+
+    def test_combine_max_sum_min(self):
+        np.testing.assert_array_equal(
+            combine_two_paths(self.df, 'throughput_mbps', MultipathScheduler.MAX), [15, 20, 0, 35.5]
+        )
+        np.testing.assert_array_equal(
+            combine_two_paths(self.df, 'throughput_mbps', MultipathScheduler.SUM), [25, 25, 0, 65.5]
+        )
+        np.testing.assert_array_equal(
+            combine_two_paths(self.df, 'throughput_mbps', MultipathScheduler.MIN), [10, 5, 0, 30]
+        )
+
+    def test_combine_weighted(self):
+        result = combine_two_paths(self.df, 'throughput_mbps', MultipathScheduler.WEIGHTED, weight_a=0.25)
+        np.testing.assert_allclose(result, [13.75, 8.75, 0, 31.375])
+
+    def test_combine_weighted_invalid_weight(self):
+        with self.assertRaises(ValueError):
+            combine_two_paths(self.df, 'throughput_mbps', MultipathScheduler.WEIGHTED, weight_a=1.5)
+
+    def test_unsupported_scheduler(self):
+        with self.assertRaises(ValueError):
+            combine_two_paths(self.df, 'throughput_mbps', 'round_robin')
+
+    def test_attach_multipath_columns(self):
+        df = attach_multipath_columns(
+            self.df,
+            data_field='throughput_mbps',
+            column_scheduler_map={'max_tput': MultipathScheduler.MAX, 'sum_tput': MultipathScheduler.SUM},
+        )
+        self.assertEqual(df['max_tput'].tolist(), [15, 20, 0, 35.5])
+        self.assertEqual(df['sum_tput'].tolist(), [25, 25, 0, 65.5])
+
+        series_map = collect_multipath_series({'starlink_att': df}, 'max_tput')
+        self.assertEqual(list(series_map.keys()), ['starlink_att'])
+        np.testing.assert_array_equal(series_map['starlink_att'], [15, 20, 0, 35.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
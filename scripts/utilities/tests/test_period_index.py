@@ -0,0 +1,155 @@
+import unittest
+import sys
+import os
+import tempfile
+import glob
+from unittest.mock import patch
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.constants import CommonField
+from scripts.utilities.AppTputPeriodExtractor import AppTputPeriodExtractor
+from scripts.utilities.period_index import PeriodIndex, PeriodStatus
+from scripts.utilities.starlink_metric_utils import StarlinkMetricProcessor
+from scripts.utilities.xcal_processing_utils import collect_periods_of_ping_measurements, \
+    collect_periods_of_tput_measurements, read_first_and_last_line
+
+
+class TestPeriodIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.run_dirs = []
+        for run, start_ms in [('142919618', 1719381600000), ('153752852', 1719388800123)]:
+            run_dir = os.path.join(self.tmp_dir.name, '20240626', run)
+            os.makedirs(run_dir)
+            self.write_log(os.path.join(run_dir, f'tcp_downlink_{run}.out'), start_ms, start_ms + 60000)
+            self.write_log(os.path.join(run_dir, f'udp_uplink_{run}.out'), start_ms + 120000, start_ms + 180000)
+            self.write_log(os.path.join(run_dir, f'ping_{run}.out'), start_ms, start_ms + 30000)
+            self.run_dirs.append(run_dir)
+        # a log interrupted before its end time line
+        with open(os.path.join(self.run_dirs[1], 'tcp_uplink_153752852.out'), 'w') as f:
+            f.write('Start time: 1719388800123\nsome content\n')
+        self.index_path = os.path.join(self.tmp_dir.name, 'tmp', 'period_index.pkl')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def write_log(file: str, start_ms: int, end_ms: int):
+        with open(file, 'w') as f:
+            f.write(f'Start time: {start_ms}\n')
+            f.write('[  5]   0.00-1.00   sec  12.5 MBytes   105 Mbits/sec\n' * 100)
+            f.write(f'End time: {end_ms}\n')
+
+    def collect_legacy_tput_periods(self):
+        periods = []
+        for run_dir in self.run_dirs:
+            for protocol, direction in [('tcp', 'downlink'), ('tcp', 'uplink'), ('udp', 'downlink'), ('udp', 'uplink')]:
+                periods.extend(collect_periods_of_tput_measurements(run_dir, protocol, direction))
+        return periods
+
+    def test_same_periods_as_full_read(self):
+        with patch('builtins.print'):
+            expected_tput_periods = self.collect_legacy_tput_periods()
+            tput_periods = PeriodIndex(self.index_path).get_tput_periods(self.run_dirs)
+        self.assertEqual(4, len(tput_periods))
+        self.assertEqual(expected_tput_periods, tput_periods)
+
+        expected_ping_periods = []
+        for run_dir in self.run_dirs:
+            expected_ping_periods.extend(collect_periods_of_ping_measurements(run_dir))
+        self.assertEqual(expected_ping_periods, PeriodIndex(self.index_path).get_ping_periods(self.run_dirs))
+
+    def test_index_is_reused_until_a_log_changes(self):
+        nested_dir = os.path.join(self.run_dirs[1], 'sub')
+        os.makedirs(nested_dir)
+        with patch('builtins.print'):
+            PeriodIndex(self.index_path).get_tput_periods(self.run_dirs, operator='starlink')
+        index_df = PeriodIndex(self.index_path).df
+        self.assertEqual(5, len(index_df))
+        self.assertEqual(['starlink'], index_df['operator'].unique().tolist())
+        self.assertEqual(1, (index_df['status'] == PeriodStatus.NO_PERIOD).sum())
+
+        # unchanged run directories are answered from the index without listing or reading their logs
+        with patch('scripts.utilities.period_index.extract_start_end_ms') as mock_extract, \
+                patch('scripts.utilities.period_index.glob.glob') as mock_glob, patch('builtins.print'):
+            periods = PeriodIndex(self.index_path).get_tput_periods(self.run_dirs)
+            mock_extract.assert_not_called()
+            mock_glob.assert_not_called()
+        self.assertEqual(4, len(periods))
+
+        # a log rewritten in place keeps the mtime of its directory, it is read again without listing the run
+        changed_log = os.path.join(self.run_dirs[0], 'tcp_downlink_142919618.out')
+        self.write_log(changed_log, 1719381600000, 1719381999999)
+        with patch('builtins.print'), \
+                patch('scripts.utilities.period_index.glob.glob', wraps=glob.glob) as mock_glob:
+            periods = PeriodIndex(self.index_path).get_tput_periods(self.run_dirs)
+            mock_glob.assert_not_called()
+        self.assertEqual(1719381999999, int(periods[0][1].timestamp() * 1000))
+        self.assertEqual(1719381999999, int(PeriodIndex(self.index_path).get_period_df(
+            trace_types=['tcp_downlink'])['end_utc'].iloc[0].timestamp() * 1000))
+
+        # a log added under a nested subdirectory only changes the mtime of that subdirectory
+        self.write_log(os.path.join(nested_dir, 'udp_uplink_2.out'), 1719392400000, 1719392460000)
+        with patch('builtins.print'), \
+                patch('scripts.utilities.period_index.glob.glob', wraps=glob.glob) as mock_glob:
+            periods = PeriodIndex(self.index_path).get_tput_periods(self.run_dirs)
+            self.assertEqual({self.run_dirs[1]}, {os.path.dirname(call.args[0].split('**')[0])
+                                                   for call in mock_glob.call_args_list})
+        self.assertEqual(5, len(periods))
+        self.assertIn(os.path.join('sub', 'udp_uplink_2.out'), PeriodIndex(self.index_path).df['rel_path'].tolist())
+
+    def test_query_intervals(self):
+        period_index = PeriodIndex()
+        with patch('builtins.print'):
+            period_index.get_tput_periods(self.run_dirs, operator='starlink')
+            period_index.get_ping_periods(self.run_dirs, operator='starlink')
+
+        times = pd.Series(['2024-06-26T06:00:10Z', '2024-06-26T06:02:30Z', '2024-06-26T05:00:00Z',
+                           '2024-06-26T08:00:20.123Z'])
+        self.assertEqual(['tcp_downlink', 'udp_uplink', None, 'tcp_downlink'],
+                         period_index.get_active_trace_types(times, trace_types=['tcp_downlink', 'udp_uplink']).tolist())
+        self.assertEqual(['icmp_uplink', None, None, 'icmp_uplink'],
+                         period_index.get_active_trace_types(times, trace_types=['icmp_uplink']).tolist())
+        self.assertEqual([None] * 4, period_index.get_active_trace_types(times, operator='att').tolist())
+        self.assertEqual(['tcp_downlink', None, None, None],
+                         period_index.get_active_trace_types(times, trace_types=['tcp_downlink'],
+                                                             run_dirs=self.run_dirs[:1]).tolist())
+
+        matched_df = period_index.query_intervals(times)
+        self.assertEqual([0, 0, 1, 3, 3], matched_df['point_pos'].tolist())
+        self.assertEqual([0, 1, 2, 3, 4], matched_df['period_pos'].tolist())
+        self.assertEqual(['icmp_uplink', 'tcp_downlink'], sorted(matched_df[matched_df['point_pos'] == 0]['trace_type']))
+
+    def test_filter_metric_data_by_periods(self):
+        run_dirs = self.run_dirs
+
+        class Extractor(AppTputPeriodExtractor):
+            def get_all_data_dirs(self):
+                return run_dirs
+
+        metric_df = pd.DataFrame({'res_time': ['2024-06-26T06:00:10Z', '2024-06-26T06:00:20Z', '2024-06-26T06:02:30Z',
+                                               '2024-06-26T05:00:00Z', '2024-06-26T08:00:20.123Z']})
+        processor = StarlinkMetricProcessor(self.tmp_dir.name, 'UTC', Extractor('starlink'), logger=None)
+        with patch('builtins.print'):
+            filtered_df = processor.filter_metric_data_by_periods(metric_df)
+        self.assertEqual([0, 1, 2, 4], filtered_df[CommonField.SRC_IDX].tolist())
+        self.assertEqual(['0:1', '0:1', '2:2', '4:4'], filtered_df[CommonField.SEGMENT_ID].tolist())
+        self.assertEqual(['tcp', 'tcp', 'udp', 'tcp'], filtered_df[CommonField.APP_TPUT_PROTOCOL].tolist())
+        self.assertEqual(['downlink', 'downlink', 'uplink', 'downlink'],
+                         filtered_df[CommonField.APP_TPUT_DIRECTION].tolist())
+
+    def test_read_first_and_last_line(self):
+        file = os.path.join(self.tmp_dir.name, 'log.out')
+        for content in ['', 'single line', 'first\nlast', 'first\nlast\n', 'first\nlast\n\n']:
+            with open(file, 'w') as f:
+                f.write(content)
+            with open(file) as f:
+                lines = f.readlines()
+            expected = (lines[0], lines[-1]) if lines else ('', '')
+            self.assertEqual(expected, read_first_and_last_line(file, block_size=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
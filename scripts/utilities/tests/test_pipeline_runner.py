@@ -0,0 +1,183 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.utilities.pipeline_runner import NodeStatus, PipelineNode, PipelineRunner, paths_overlap
+
+TMP_DIR = None
+
+
+def read(name: str) -> str:
+    with open(os.path.join(TMP_DIR, name)) as f:
+        return f.read()
+
+
+def write(name: str, content: str):
+    path = os.path.join(TMP_DIR, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def parse():
+    write('parsed/a.csv', read('raw/a.out').upper())
+
+
+def append_area():
+    write('parsed/a.csv', read('parsed/a.csv') + ',area')
+
+
+def plot():
+    write('plots/cdf_a.png', read('parsed/a.csv'))
+
+
+def parse_other():
+    write('others/b.csv', read('raw/b.out'))
+
+
+def fail():
+    raise RuntimeError('broken stage')
+
+
+def sleep_and_write_a():
+    time.sleep(0.5)
+    write('parallel/a.done', str(time.time()))
+
+
+def sleep_and_write_b():
+    time.sleep(0.5)
+    write('parallel/b.done', str(time.time()))
+
+
+class TestPipelineRunner(unittest.TestCase):
+    def setUp(self):
+        global TMP_DIR
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        TMP_DIR = self.tmp_dir.name
+        write('raw/a.out', 'a')
+        write('raw/b.out', 'b')
+        self.state_path = os.path.join(TMP_DIR, 'tmp', 'pipeline_state.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(TMP_DIR, name)
+
+    def create_runner(self, nodes=None, **kwargs) -> PipelineRunner:
+        if nodes is None:
+            nodes = [
+                PipelineNode('plot', plot, inputs=[self.path('parsed/*.csv')], outputs=[self.path('plots/cdf_*.png')]),
+                PipelineNode('append_area', append_area, inputs=[self.path('parsed')], outputs=[self.path('parsed')]),
+                PipelineNode('parse', parse, inputs=[self.path('raw/*.out')], outputs=[self.path('parsed/a.csv')]),
+                PipelineNode('parse_other', parse_other, inputs=[self.path('raw/b.out')],
+                             outputs=[self.path('others/b.csv')]),
+            ]
+        return PipelineRunner(nodes, state_path=self.state_path, **kwargs)
+
+    def test_paths_overlap(self):
+        self.assertTrue(paths_overlap('/d/raw', '/d/raw/a.out'))
+        self.assertTrue(paths_overlap('/d/raw/*.out', '/d/raw/a.out'))
+        self.assertTrue(paths_overlap('/d', '/d/raw/**/*.out'))
+        self.assertTrue(paths_overlap('/d/tmp/*_datasets.json', '/d/tmp/*_merged_datasets.json'))
+        self.assertFalse(paths_overlap('/d/raw_a', '/d/raw'))
+        self.assertFalse(paths_overlap('/d/plots/cdf_*.png', '/d/plots/rtt_*.png'))
+
+    def test_runs_in_dependency_order_and_skips_unchanged(self):
+        runner = self.create_runner()
+        self.assertEqual(['parse', 'append_area', 'plot', 'parse_other'], runner.order)
+        statuses = runner.run()
+        self.assertEqual({name: NodeStatus.DONE for name in runner.nodes}, statuses)
+        self.assertEqual('A,area', read('plots/cdf_a.png'))
+
+        statuses = self.create_runner().run()
+        self.assertEqual({name: NodeStatus.SKIPPED for name in runner.nodes}, statuses)
+
+    def test_reruns_only_downstream_of_changed_input(self):
+        self.create_runner().run()
+        time.sleep(0.01)
+        write('raw/a.out', 'c')
+        statuses = self.create_runner().run()
+        self.assertEqual(NodeStatus.SKIPPED, statuses['parse_other'])
+        self.assertEqual([NodeStatus.DONE] * 3, [statuses[name] for name in ['parse', 'append_area', 'plot']])
+        self.assertEqual('C,area', read('plots/cdf_a.png'))
+
+    def test_reruns_on_missing_output_and_targets(self):
+        self.create_runner().run()
+        os.remove(self.path('others/b.csv'))
+        os.remove(self.path('plots/cdf_a.png'))
+        statuses = self.create_runner().run(targets=['parse_other'])
+        self.assertEqual({'parse_other': NodeStatus.DONE}, statuses)
+        self.assertFalse(os.path.exists(self.path('plots/cdf_a.png')))
+
+    def test_hash_contents_ignores_touched_inputs(self):
+        self.create_runner(hash_contents=True).run()
+        write('raw/b.out', 'b')
+        statuses = self.create_runner(hash_contents=True).run()
+        self.assertEqual(NodeStatus.SKIPPED, statuses['parse_other'])
+
+    def test_in_place_stages_run_in_declaration_order(self):
+        nodes = [
+            PipelineNode('append_tech', parse, inputs=[self.path('ping/*_ping.csv')], outputs=[self.path('ping')]),
+            PipelineNode('append_weather', parse, inputs=[self.path('ping')], outputs=[self.path('ping/*_ping.csv')]),
+        ]
+        self.assertEqual({'append_tech'}, self.create_runner(nodes).dependencies['append_weather'])
+        self.assertEqual(set(), self.create_runner(nodes).dependencies['append_tech'])
+
+    def test_in_place_chain_is_skipped_when_unchanged(self):
+        nodes = [
+            PipelineNode('parse', parse, inputs=[self.path('raw/a.out')], outputs=[self.path('parsed/a.csv')]),
+            PipelineNode('append_tech', append_area, inputs=[self.path('parsed')], outputs=[self.path('parsed')]),
+            PipelineNode('append_weather', append_area, inputs=[self.path('parsed')], outputs=[self.path('parsed')]),
+        ]
+        self.create_runner(nodes).run()
+        self.assertEqual('A,area,area', read('parsed/a.csv'))
+        for _ in range(2):
+            statuses = self.create_runner(nodes).run()
+            self.assertEqual({name: NodeStatus.SKIPPED for name in statuses}, statuses)
+        self.assertEqual('A,area,area', read('parsed/a.csv'))
+
+        time.sleep(0.01)
+        write('raw/a.out', 'c')
+        statuses = self.create_runner(nodes).run()
+        self.assertEqual({name: NodeStatus.DONE for name in statuses}, statuses)
+        self.assertEqual({name: NodeStatus.SKIPPED for name in statuses}, self.create_runner(nodes).run())
+
+    def test_cycle(self):
+        nodes = [
+            PipelineNode('a', parse, inputs=[self.path('x')], outputs=[self.path('y')], after=['b']),
+            PipelineNode('b', parse, inputs=[self.path('y')], outputs=[self.path('z')]),
+        ]
+        with self.assertRaises(ValueError):
+            self.create_runner(nodes)
+
+    def test_failure_propagates_downstream(self):
+        nodes = [
+            PipelineNode('parse', fail, inputs=[self.path('raw/*.out')], outputs=[self.path('parsed/a.csv')]),
+            PipelineNode('plot', plot, inputs=[self.path('parsed/*.csv')], outputs=[self.path('plots/cdf_*.png')]),
+            PipelineNode('parse_other', parse_other, inputs=[self.path('raw/b.out')],
+                         outputs=[self.path('others/b.csv')]),
+        ]
+        with self.assertLogs('scripts.utilities.pipeline_runner', level='INFO'):
+            statuses = self.create_runner(nodes).run()
+        self.assertEqual({'parse': NodeStatus.FAILED, 'plot': NodeStatus.UPSTREAM_FAILED,
+                          'parse_other': NodeStatus.DONE}, statuses)
+        self.assertNotIn('parse', self.create_runner(nodes).state)
+
+    def test_independent_nodes_run_concurrently(self):
+        nodes = [
+            PipelineNode('a', sleep_and_write_a, inputs=[self.path('raw/a.out')], outputs=[self.path('parallel/a.done')]),
+            PipelineNode('b', sleep_and_write_b, inputs=[self.path('raw/b.out')], outputs=[self.path('parallel/b.done')]),
+        ]
+        start = time.time()
+        statuses = self.create_runner(nodes, max_workers=2).run()
+        self.assertEqual({'a': NodeStatus.DONE, 'b': NodeStatus.DONE}, statuses)
+        self.assertLess(time.time() - start, 0.95)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+import tempfile
+
+import pandas as pd
+from matplotlib import pyplot as plt
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from scripts.utilities.plot_scheduler import PlotScheduler
+
+
+def plot_cdf(df: pd.DataFrame, output_filepath: str):
+    fig, ax = plt.subplots()
+    ax.plot(df['value'].sort_values(), range(len(df)))
+    fig.savefig(output_filepath)
+
+
+def fail():
+    raise ValueError('no data')
+
+
+class TestPlotScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame({'value': [3.0, 1.0, 2.0]})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def get_output(self, name: str) -> str:
+        return os.path.join(self.tmp_dir.name, f'{name}.png')
+
+    def test_run_in_workers(self):
+        scheduler = PlotScheduler(max_workers=2)
+        for name in ['a', 'b', 'c']:
+            # lambdas and unpicklable arguments are fine as forked workers inherit the jobs
+            scheduler.add(name, lambda output_filepath: plot_cdf(self.df, output_filepath), self.get_output(name))
+
+        timings = scheduler.run()
+        self.assertEqual({'a', 'b', 'c'}, set(timings))
+        for name in ['a', 'b', 'c']:
+            self.assertTrue(os.path.exists(self.get_output(name)))
+
+    def test_run_selected_figures_inline(self):
+        scheduler = PlotScheduler(max_workers=1)
+        scheduler.add('a', plot_cdf, self.df, output_filepath=self.get_output('a'))
+        scheduler.add('b', plot_cdf, self.df, output_filepath=self.get_output('b'))
+
+        self.assertEqual(['b'], list(scheduler.run(['b'])))
+        self.assertFalse(os.path.exists(self.get_output('a')))
+        self.assertEqual([], plt.get_fignums())
+        with self.assertRaises(ValueError):
+            scheduler.run(['unknown'])
+        with self.assertRaises(ValueError):
+            scheduler.add('a', plot_cdf, self.df, self.get_output('a'))
+
+    def test_failure_does_not_stop_other_figures(self):
+        scheduler = PlotScheduler(max_workers=2)
+        scheduler.add('broken', fail)
+        scheduler.add('a', plot_cdf, self.df, self.get_output('a'))
+
+        with self.assertRaises(RuntimeError) as context:
+            scheduler.run()
+        self.assertIn('broken', str(context.exception))
+        self.assertTrue(os.path.exists(self.get_output('a')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 
 from scripts.utilities.weather_area_calibrator import TimedValueCalibrator, AreaCalibratorWithXcal, AreaCalibratedData
-from scripts.constants import CommonField
+from scripts.constants import CommonField, XcalField
 
 def ts(dt_str: str) -> float:
     return datetime.strptime(dt_str, '%Y-%m-%dT%H:%M:%S').timestamp()
@@ -83,5 +83,67 @@ class TestTimedValueCalibrator(unittest.TestCase):
             expected_df,
         )
 
+    def test_add_periods_same_as_add_period_in_order(self):
+        periods = [
+            (datetime(2024, 1, 1, 1, 0), datetime(2024, 1, 1, 1, 30), 'rainy'),
+            (datetime(2024, 1, 1, 1, 10), datetime(2024, 1, 1, 1, 20), 'snowy'),
+            (datetime(2024, 1, 1, 0, 0), datetime(2024, 1, 1, 0, 30), 'foggy'),
+            (datetime(2024, 1, 1, 3, 0), datetime(2024, 1, 1, 3, 30), 'rainy'),
+        ]
+        expected_calibrator = TimedValueCalibrator(self.test_df)
+        for from_dt, to_dt, value in periods:
+            expected_calibrator.add_period(from_dt, to_dt, value)
+        self.calibrator.add_periods(periods)
+        pd.testing.assert_frame_equal(expected_calibrator.df, self.calibrator.df)
+        self.assertEqual(['foggy', 'sunny', 'rainy', 'snowy', 'rainy', 'sunny', 'cloudy', 'rainy', 'cloudy'],
+                         self.calibrator.df['value'].tolist())
+
+    def test_add_periods_keeps_df_if_not_consecutive(self):
+        with self.assertRaises(ValueError):
+            self.calibrator.add_periods([
+                (datetime(2024, 1, 1, 3, 0), datetime(2024, 1, 1, 3, 30), 'rainy'),
+                (datetime(2024, 1, 1, 1, 0), datetime(2024, 1, 1, 2, 30), 'rainy'),
+            ])
+        self.assertEqual(['sunny', 'cloudy'], self.calibrator.df['value'].tolist())
+
+
+class TestAreaCalibratorWithXcal(unittest.TestCase):
+    def setUp(self):
+        self.area_df = pd.DataFrame({
+            CommonField.UTC_TS: [ts('2024-01-01T00:00:00'), ts('2024-01-01T02:00:00')],
+            CommonField.LOCAL_DT: ['2024-01-01T00:00:00', '2024-01-01T02:00:00'],
+            'value': ['rural', 'suburban'],
+        })
+        self.xcal_tput_df = pd.DataFrame({
+            XcalField.SEGMENT_ID: ['10:12', '10:12', '10:12', '20:21', '20:21'],
+            XcalField.SRC_IDX: [10, 11, 12, 20, 21],
+            XcalField.LOCAL_TIME: ['2024-01-01T00:10:00', '2024-01-01T00:11:00', '2024-01-01T00:12:00',
+                                   '2024-01-01T00:20:00', '2024-01-01T00:21:00'],
+        })
+        self.calibrator = AreaCalibratorWithXcal(self.area_df, self.xcal_tput_df)
+
+    def test_get_dt_ranges(self):
+        dt_ranges = self.calibrator.get_dt_ranges([
+            AreaCalibratedData(start_seg_id='10:12', end_seg_id='20:21', value='urban'),
+            AreaCalibratedData(start_seg_id='10:12', start_idx=11, end_seg_id='10:12', end_idx=11, value='urban'),
+        ])
+        self.assertEqual([(datetime(2024, 1, 1, 0, 10), datetime(2024, 1, 1, 0, 21)),
+                          (datetime(2024, 1, 1, 0, 11), datetime(2024, 1, 1, 0, 11))], dt_ranges)
+
+        with self.assertRaises(ValueError):
+            self.calibrator.get_dt_ranges([AreaCalibratedData(start_seg_id='1:2', end_seg_id='10:12', value='urban')])
+        with self.assertRaises(ValueError):
+            self.calibrator.get_dt_ranges([
+                AreaCalibratedData(start_seg_id='10:12', start_idx=13, end_seg_id='10:12', value='urban')])
+
+    def test_calibrate(self):
+        self.calibrator.calibrate([
+            AreaCalibratedData(start_seg_id='10:12', end_seg_id='10:12', value='urban'),
+            AreaCalibratedData(start_seg_id='20:21', start_idx=20, end_seg_id='20:21', end_idx=21, value='urban'),
+        ])
+        self.assertEqual(['rural', 'urban', 'rural', 'urban', 'rural', 'suburban'],
+                         self.calibrator.df['value'].tolist())
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -1,4 +1,6 @@
+from bisect import bisect_left
 from datetime import datetime
+from typing import List, Tuple
 import pandas as pd
 import sys
 import os
@@ -47,6 +49,49 @@ class TimedValueCalibrator:
         if from_idx + 1 != to_idx:
             raise ValueError(f"from_idx {from_idx} and to_idx {to_idx} are not consecutive, which will greatly change the interpretation of the weather area data")
 
+    def add_periods(self, periods: List[Tuple[datetime, datetime, str]]):
+        """
+        Add periods as (from_dt, to_dt, value), with the same result as calling add_period for each of them in order.
+        The insertions are resolved on plain timestamp and value lists and applied to df with a single merge.
+        If a period fails the consecutive insertion check, df is left unchanged.
+        """
+        ts_list = self.df[CommonField.UTC_TS].tolist()
+        values = self.df['value'].tolist()
+        # each row refers to its position in df if >= 0, otherwise to new_rows[-ref - 1]
+        row_refs = list(range(len(ts_list)))
+        new_rows = []
+
+        def add_point(dt: datetime, value: str) -> int:
+            ts = dt.timestamp()
+            idx = bisect_left(ts_list, ts)
+            new_rows.append({CommonField.LOCAL_DT: format_datetime_as_iso_8601(dt), CommonField.UTC_TS: ts, 'value': value})
+            row_ref = -len(new_rows)
+            if idx < len(ts_list) and ts_list[idx] == ts:
+                values[idx] = value
+                row_refs[idx] = row_ref
+            else:
+                ts_list.insert(idx, ts)
+                values.insert(idx, value)
+                row_refs.insert(idx, row_ref)
+            return idx
+
+        for from_dt, to_dt, value in periods:
+            from_ts = from_dt.timestamp()
+            from_idx = bisect_left(ts_list, from_ts)
+            if from_idx < len(ts_list) and ts_list[from_idx] == from_ts:
+                prev_value = values[from_idx]
+            else:
+                prev_value = values[max(from_idx - 1, 0)]
+            from_idx = add_point(from_dt, value)
+            to_idx = add_point(to_dt, prev_value)
+            self.check_if_insertion_idx_consecutive(from_idx, to_idx)
+
+        if not new_rows:
+            return
+        merged_df = pd.concat([self.df, pd.DataFrame(new_rows)], ignore_index=True)
+        positions = [ref if ref >= 0 else len(self.df) - ref - 1 for ref in row_refs]
+        self.df = merged_df.iloc[positions].reset_index(drop=True)
+
     def get_insertion_idx(self, dt: datetime):
         ts = dt.timestamp()
         idx = self.df[CommonField.UTC_TS].searchsorted(ts)
@@ -91,39 +136,68 @@ class AreaCalibratorWithXcal(TimedValueCalibrator):
     def __init__(self, df: pd.DataFrame, xcal_tput_df: pd.DataFrame):
         super().__init__(df)
         self.xcal_tput_df = xcal_tput_df
-    
+        # built on first use by build_index
+        self.segment_idx_range_df = None
+        self.local_time_by_idx = None
+
+    def build_index(self):
+        """
+        Index the xcal throughput rows once: the first and last src_idx of each segment,
+        and the local time of the first row of each (segment_id, src_idx)
+        """
+        grouped = self.xcal_tput_df.groupby(XcalField.SEGMENT_ID, sort=False)[XcalField.SRC_IDX]
+        self.segment_idx_range_df = pd.DataFrame({'first': grouped.first(), 'last': grouped.last()})
+        self.local_time_by_idx = self.xcal_tput_df \
+            .drop_duplicates(subset=[XcalField.SEGMENT_ID, XcalField.SRC_IDX]) \
+            .set_index([XcalField.SEGMENT_ID, XcalField.SRC_IDX])[XcalField.LOCAL_TIME]
+
     def calibrate(self, data_list: list[AreaCalibratedData]):
-        for data in data_list:
-            from_dt, to_dt = self.get_dt_range_from_df(data)
-            self.add_period(from_dt, to_dt, data.value)
+        dt_ranges = self.get_dt_ranges(data_list)
+        self.add_periods([(from_dt, to_dt, data.value) for data, (from_dt, to_dt) in zip(data_list, dt_ranges)])
 
     def index_overflow(self, seg_df: pd.DataFrame, idx: int):
         return idx < seg_df[XcalField.SRC_IDX].iloc[0] or idx > seg_df[XcalField.SRC_IDX].iloc[-1]
 
+    def get_dt_ranges(self, data_list: list[AreaCalibratedData]) -> List[Tuple[datetime, datetime]]:
+        """
+        Start and end time of each calibration entry, resolved by indexed lookups on segment_id and src_idx
+        """
+        if self.local_time_by_idx is None:
+            self.build_index()
+        dt_ranges = []
+        for data in data_list:
+            if data.start_seg_id not in self.segment_idx_range_df.index \
+                    or data.end_seg_id not in self.segment_idx_range_df.index:
+                raise ValueError(f"start_seg_id {data.start_seg_id} or end_seg_id {data.end_seg_id} not found in xcal_tput_df")
+            start_first, start_last = self.segment_idx_range_df.loc[data.start_seg_id]
+            end_first, end_last = self.segment_idx_range_df.loc[data.end_seg_id]
+
+            # If start_idx not provided, use first row's src_idx for this segment
+            if data.start_idx is None:
+                start_idx = start_first
+            else:
+                if data.start_idx < start_first or data.start_idx > start_last:
+                    raise ValueError(f"start_idx {data.start_idx} is out of range")
+                start_idx = data.start_idx
+
+            # If end_idx not provided, use last row's src_idx for this segment
+            if data.end_idx is None:
+                end_idx = end_last
+            else:
+                if data.end_idx < end_first or data.end_idx > end_last:
+                    raise ValueError(f"end_idx {data.end_idx} is out of range")
+                end_idx = data.end_idx
+
+            start_time = self.get_local_time(data.start_seg_id, start_idx)
+            end_time = self.get_local_time(data.end_seg_id, end_idx)
+            dt_ranges.append((datetime.fromisoformat(start_time), datetime.fromisoformat(end_time)))
+        return dt_ranges
+
+    def get_local_time(self, seg_id: str, src_idx: int) -> str:
+        try:
+            return self.local_time_by_idx.loc[(seg_id, src_idx)]
+        except KeyError:
+            raise ValueError(f"src_idx {src_idx} not found in segment {seg_id}")
+
     def get_dt_range_from_df(self, data: AreaCalibratedData):
-        start_seg_df = self.xcal_tput_df[self.xcal_tput_df[XcalField.SEGMENT_ID] == data.start_seg_id]
-        end_seg_df = self.xcal_tput_df[self.xcal_tput_df[XcalField.SEGMENT_ID] == data.end_seg_id]
-        if len(start_seg_df) == 0 or len(end_seg_df) == 0:
-            raise ValueError(f"start_seg_id {data.start_seg_id} or end_seg_id {data.end_seg_id} not found in xcal_tput_df")
-
-        # If start_idx not provided, use first row's src_idx for this segment
-        if data.start_idx is None:
-            start_idx = start_seg_df.iloc[0][XcalField.SRC_IDX]
-        else:
-            if self.index_overflow(start_seg_df, data.start_idx):
-                raise ValueError(f"start_idx {data.start_idx} is out of range")
-            start_idx = data.start_idx
-        
-        # If end_idx not provided, use last row's src_idx for this segment
-        if data.end_idx is None:
-            end_idx = end_seg_df.iloc[-1][XcalField.SRC_IDX]
-        else:
-            if self.index_overflow(end_seg_df, data.end_idx):
-                raise ValueError(f"end_idx {data.end_idx} is out of range")
-            end_idx = data.end_idx
-        
-        # Get the timestamps from the rows matching the src_idx
-        start_time = start_seg_df[start_seg_df[XcalField.SRC_IDX] == start_idx][XcalField.LOCAL_TIME].iloc[0]
-        end_time = end_seg_df[end_seg_df[XcalField.SRC_IDX] == end_idx][XcalField.LOCAL_TIME].iloc[0]
-        
-        return datetime.fromisoformat(start_time), datetime.fromisoformat(end_time)
\ No newline at end of file
+        return self.get_dt_ranges([data])[0]
@@ -1,8 +1,10 @@
 from datetime import datetime
 import glob
+import os
 from os import path
 import re
 import unittest
+from typing import TYPE_CHECKING, List
 from unittest.mock import patch, mock_open
 
 import pandas as pd
@@ -10,6 +12,10 @@ import pandas as pd
 from scripts.celllular_analysis.TechBreakdown import TechBreakdown
 from scripts.constants import XcalField
 
+if TYPE_CHECKING:
+    # period_index reads logs with the helpers of this module
+    from scripts.utilities.period_index import PeriodIndex
+
 def extract_period_from_file(file: str) -> tuple[datetime, datetime, str]:
     with open(file, 'r') as f:
         # file name is like tcp_downlink_142919618.out
@@ -47,6 +53,52 @@ def extract_start_end_timestamps(lines):
     return start_match,end_match
 
 
+START_TIME_PATTERN = re.compile(r'Start time: (\d+)')
+END_TIME_PATTERN = re.compile(r'End time: (\d+)')
+
+
+def read_first_and_last_line(file: str, block_size: int = 4096) -> tuple[str, str]:
+    """
+    Read the first line and seek to the last line of a file without reading the lines in between,
+    same as lines[0] and lines[-1] of readlines(), ('', '') for an empty file
+    """
+    with open(file, 'rb') as f:
+        first_line = f.readline()
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b''
+        while pos > 0:
+            read_size = min(block_size, pos)
+            pos -= read_size
+            f.seek(pos)
+            tail = f.read(read_size) + tail
+            # the trailing newline belongs to the last line
+            if b'\n' in tail[:-1]:
+                break
+    last_line = tail[:-1].rsplit(b'\n', 1)[-1] + tail[-1:]
+    return first_line.decode('utf-8', errors='replace'), last_line.decode('utf-8', errors='replace')
+
+
+def extract_start_end_ms(file: str) -> tuple[int, int]:
+    first_line, last_line = read_first_and_last_line(file)
+    start_match = START_TIME_PATTERN.search(first_line.strip())
+    end_match = END_TIME_PATTERN.search(last_line.strip())
+    if not (start_match and end_match):
+        raise ValueError(f'Failed to extract start and end time from {file}')
+    return int(start_match.group(1)), int(end_match.group(1))
+
+
+def get_tput_label_of_file(file: str) -> str:
+    # file name is like tcp_downlink_142919618.out
+    protocol, direction, _ = path.basename(file).split('_')
+    return f'{protocol}_{direction}'
+
+
+def get_ping_label_of_file(file: str) -> str:
+    # file name is like ping_142919618.out
+    return 'icmp_uplink'
+
+
 def collect_periods_of_tput_measurements(base_dir: str, protocol: str, direction: str) -> list[tuple[datetime, datetime, str]]:
     # find all the files starting with {protocol}_{direction}*.out
     pattern = path.join(base_dir, f'**/{protocol}_{direction}*.out')
@@ -99,17 +151,21 @@ def read_daily_xcal_data(base_dir: str, date: str, operator: str, location: str)
 
 def filter_xcal_logs(
         df_xcal_logs: pd.DataFrame, 
-        periods: list[tuple[datetime, datetime, str]],
+        period_index: 'PeriodIndex',
+        run_dirs: List[str] | None = None,
+        operator: str | None = None,
+        trace_types: List[str] | None = None,
         xcal_timezone: str = 'US/Eastern',
         label: str = None,
     ) -> pd.DataFrame:
     """
-    Filter the xcal logs to only include the specified periods.
+    Filter the xcal logs to only include the measurement periods of the period index.
 
-    - Add a column 'app_layer_label' to the filtered rows to indicate the protocol and direction
+    - Add the app tput protocol and direction of the period to the filtered rows
 
     :df_xcal_logs: pd.DataFrame, the xcal logs, with a column 'TIME_STAMP' as the timestamp in Eastern time
-    :periods: list of tuples, each tuple contains a start and end timestamp (UTC aware datetime objects)
+    :period_index: PeriodIndex of the trip, up to date for run_dirs (e.g. after get_tput_periods)
+    :run_dirs, operator, trace_types: periods to keep, see PeriodIndex.get_period_df
     """
     # Create a temporary datetime column (from Eastern time) for filtering, and convert to UTC
 
@@ -133,21 +189,24 @@ def filter_xcal_logs(
     # Initialize an empty list to store filtered rows
     filtered_rows = []
 
-    for period in periods:
-        utc_start_dt, utc_end_dt, protocol_direction = period
-
+    # one interval join of all rows against all periods, rows of each period in their original order
+    period_df = period_index.get_period_df(operator=operator, trace_types=trace_types, run_dirs=run_dirs)
+    matched_df = period_index.query_intervals(
+        df_xcal_logs[XcalField.CUSTOM_UTC_TIME],
+        operator=operator,
+        trace_types=trace_types,
+        run_dirs=run_dirs,
+    )
+    positions_by_period = matched_df.groupby('period_pos', sort=False)['point_pos'].agg(list).to_dict()
+
+    for period_pos, (utc_start_dt, utc_end_dt, protocol_direction) in enumerate(
+            period_df[['start_utc', 'end_utc', 'trace_type']].itertuples(index=False, name=None)):
         # Skip periods less than 1 seconds
         if (utc_end_dt - utc_start_dt).total_seconds() < 3:
             continue
 
-        # Ensure start and end datetimes are timezone-aware
-        utc_start_dt = pd.to_datetime(utc_start_dt, utc=True)
-        utc_end_dt = pd.to_datetime(utc_end_dt, utc=True)
-        # Filter rows within the current period
-        period_rows_df = df_xcal_logs[
-            (df_xcal_logs[XcalField.CUSTOM_UTC_TIME] >= utc_start_dt) & 
-            (df_xcal_logs[XcalField.CUSTOM_UTC_TIME] <= utc_end_dt)
-        ].copy()
+        # Rows within the current period
+        period_rows_df = df_xcal_logs.iloc[positions_by_period.get(period_pos, [])].copy()
         protocol, direction = protocol_direction.split('_')
         period_rows_df[XcalField.APP_TPUT_PROTOCOL] = protocol
         period_rows_df[XcalField.APP_TPUT_DIRECTION] = direction
@@ -268,6 +327,17 @@ class TestCollectPeriodsOfTputMeasurements(unittest.TestCase):
 
 
 class TestFilterXcalLogs(unittest.TestCase):
+    @staticmethod
+    def create_period_index(periods: list[tuple[datetime, datetime, str]]) -> 'PeriodIndex':
+        from scripts.utilities.period_index import PeriodIndex, PeriodStatus
+        period_index = PeriodIndex()
+        period_index.update([
+            ('/run', f'{trace_type}_{i}.out', None, trace_type, int(start.timestamp() * 1000),
+             int(end.timestamp() * 1000), PeriodStatus.OK, 0, 0)
+            for i, (start, end, trace_type) in enumerate(periods)
+        ])
+        return period_index
+
     def test_filter_xcal_logs(self):
         # Create a sample DataFrame
         # US/Eastern is UTC-4, so 00:00:00 Eastern is 04:00:00 UTC
@@ -283,7 +353,7 @@ class TestFilterXcalLogs(unittest.TestCase):
         })
         
         # Call the function
-        result = filter_xcal_logs(df, periods)
+        result = filter_xcal_logs(df, self.create_period_index(periods))
         
         # Assert the result
         expected = pd.DataFrame({
@@ -306,7 +376,7 @@ class TestFilterXcalLogs(unittest.TestCase):
         )]
         
         # Call the function
-        result = filter_xcal_logs(df, periods)
+        result = filter_xcal_logs(df, self.create_period_index(periods))
         
         # Assert the result is an empty DataFrame
         expected = pd.DataFrame(columns=['TIME_STAMP'])
@@ -331,7 +401,7 @@ class TestFilterXcalLogs(unittest.TestCase):
         ]
         
         # Call the function
-        result = filter_xcal_logs(df, periods)
+        result = filter_xcal_logs(df, self.create_period_index(periods))
         
         # Assert the result (should include 11:00, 12:00, and 13:00, removing duplicates)
         expected = pd.DataFrame({
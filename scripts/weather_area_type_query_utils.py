@@ -1,9 +1,21 @@
+import os
 import re
+import tempfile
 import unittest
 from datetime import datetime
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Iterable
 
+import numpy as np
+import pandas as pd
+
+from scripts.constants import CommonField
 from scripts.time_utils import TimeIntervalQuery, ensure_timezone, format_datetime_as_iso_8601
+from scripts.utilities.interval_utils import to_utc_timestamps
+
+WEATHER_AREA_TYPE_LOG_PATTERN = re.compile(r"^\[(.*)?\] (.*)?: (.*)", re.MULTILINE)
+# ISO 8601 wall time followed by an optional UTC offset, e.g. 2024-06-21T10:00:00.123456-08:00
+ISO_8601_OFFSET_PATTERN = r"^(?P<wall>.*?)(?P<offset>Z|[+-]\d{2}:?\d{2})?$"
+WEATHER_AREA_TYPE_FIELDS = [CommonField.LOCAL_DT, CommonField.UTC_TS, 'value']
 
 
 def parse_weather_area_type_log_line(line: str) -> Dict | None:
@@ -18,34 +30,119 @@ def parse_weather_area_type_log_line(line: str) -> Dict | None:
     }
 
 
+def format_wall_time_series(wall_series: pd.Series) -> pd.Series:
+    """
+    Vectorized datetime.isoformat() of naive datetimes, microseconds are omitted when zero
+    """
+    # NaT makes the microsecond column float
+    micro = wall_series.dt.microsecond.fillna(0).astype(int)
+    fraction = ('.' + micro.astype(str).str.zfill(6)).where(micro != 0, '')
+    return wall_series.dt.strftime('%Y-%m-%dT%H:%M:%S') + fraction
+
+
+def localize_iso_8601_series(
+        ts_series: pd.Series,
+        timezone: str | None = None,
+        is_dst: bool = True
+) -> Tuple[pd.Series, np.ndarray]:
+    """
+    Vectorized version of datetime.fromisoformat + ensure_timezone + isoformat/timestamp over a column
+    :param ts_series: ISO 8601 strings, with or without UTC offset
+    :param timezone: naive times are localized to it and times with offset are converted to it
+    :param is_dst: resolves ambiguous and non-existent local times at DST transitions like pytz localize
+    :return: (ISO 8601 strings, float UTC timestamps)
+    """
+    ts_series = pd.Series(ts_series, dtype=object).reset_index(drop=True)
+    parts = ts_series.str.extract(ISO_8601_OFFSET_PATTERN)
+    wall = pd.to_datetime(parts['wall'], format='ISO8601')
+    has_offset = parts['offset'].notna()
+
+    offset_str = parts['offset'].str.replace('Z', '+00:00').str.replace(r'^([+-]\d{2})(\d{2})$', r'\1:\2', regex=True)
+    offset_sign = np.where(offset_str.str[0] == '-', -1, 1)
+    offset_minutes = offset_sign * (offset_str.str[1:3].astype(float) * 60 + offset_str.str[4:6].astype(float))
+    # NaT for naive times
+    utc_wall = wall - pd.to_timedelta(offset_minutes, unit='min')
+
+    if timezone:
+        naive_local = wall[~has_offset].dt.tz_localize(
+            timezone,
+            ambiguous=np.full((~has_offset).sum(), is_dst),
+            nonexistent='NaT',
+        )
+        utc_wall[~has_offset] = naive_local.dt.tz_convert('UTC').dt.tz_localize(None)
+        local = utc_wall.dt.tz_localize('UTC').dt.tz_convert(timezone)
+        local_offset = local.dt.strftime('%z').str.replace(r'^([+-]\d{2})(\d{2})$', r'\1:\2', regex=True)
+        formatted = format_wall_time_series(local.dt.tz_localize(None)) + local_offset
+        utc_ts = to_utc_timestamps(local)
+        nonexistent = (~has_offset & local.isna()).to_numpy()
+        if nonexistent.any():
+            # local times skipped by a DST transition keep their wall time in pytz, only a few per year
+            dt_list = [ensure_timezone(datetime.fromisoformat(ts), timezone, is_dst=is_dst)
+                       for ts in ts_series[nonexistent]]
+            formatted[nonexistent] = [format_datetime_as_iso_8601(dt) for dt in dt_list]
+            utc_ts[nonexistent] = [dt.timestamp() for dt in dt_list]
+        return formatted, utc_ts
+
+    formatted = format_wall_time_series(wall) + offset_str.fillna('')
+    utc_ts = to_utc_timestamps(utc_wall.dt.tz_localize('UTC'))
+    if not has_offset.all():
+        # naive datetime.timestamp() assumes the local time of this machine
+        utc_ts[~has_offset.to_numpy()] = [datetime.fromisoformat(ts).timestamp() for ts in ts_series[~has_offset]]
+    return formatted, utc_ts
+
+
+def parse_weather_area_type_log_to_df(content: str, timezone: str | None = None, is_dst: bool = True) -> pd.DataFrame:
+    """
+    Extract all records of a weather & area type log in one pass
+    :param content: log content
+    :return: DataFrame with local_dt, utc_ts, type and value columns, in log order
+    """
+    records = WEATHER_AREA_TYPE_LOG_PATTERN.findall(content)
+    if not records:
+        return pd.DataFrame(columns=WEATHER_AREA_TYPE_FIELDS + ['type'])
+    ts_series, type_series, value_series = (pd.Series(col, dtype=object) for col in zip(*records))
+    formatted_dt, utc_ts = localize_iso_8601_series(ts_series, timezone, is_dst=is_dst)
+    return pd.DataFrame({
+        CommonField.LOCAL_DT: formatted_dt,
+        CommonField.UTC_TS: utc_ts,
+        'type': type_series,
+        'value': value_series,
+    })
+
+
+def parse_weather_area_type_logs(
+        log_paths: Iterable[str],
+        timezone: str | None = None,
+        is_dst: bool = True
+) -> Dict[str, pd.DataFrame]:
+    """
+    Parse weather & area type logs with a single timestamp conversion over all records
+    :param log_paths:
+    :return: {'weather': df, 'area': df}, each with local_dt, utc_ts and value columns in log order
+    """
+    contents = []
+    for log_path in log_paths:
+        with open(log_path, 'r') as f:
+            content = f.read()
+        # keep records of consecutive files on separate lines
+        contents.append(content if content.endswith('\n') else content + '\n')
+    df = parse_weather_area_type_log_to_df(''.join(contents), timezone, is_dst=is_dst)
+    return {
+        record_type: df[df['type'] == record_type][WEATHER_AREA_TYPE_FIELDS].reset_index(drop=True)
+        for record_type in ['weather', 'area']
+    }
+
+
 def parse_weather_area_type_log(log_path: str, timezone: str | None = None, is_dst: bool = True) -> Dict[str, List[Tuple[datetime, str]]]:
     """
     Parse weather & area type logs
     :param log_path:
     :return:
     """
-    weather_data = []
-    area_data = []
-    with open(log_path, 'r') as f:
-        for line in f:
-            result = parse_weather_area_type_log_line(line)
-            if not result:
-                continue
-                
-            # Parse timestamp and localize it
-            dt = datetime.fromisoformat(result['ts'])
-            if timezone:
-                dt = ensure_timezone(dt, timezone, is_dst=is_dst)
-            formatted_dt = format_datetime_as_iso_8601(dt)
-            utc_ts = dt.timestamp()
-            if result['type'] == 'weather':
-                weather_data.append((formatted_dt, utc_ts, result['value']))
-            elif result['type'] == 'area':
-                area_data.append((formatted_dt, utc_ts, result['value']))
-                
+    result = parse_weather_area_type_logs([log_path], timezone, is_dst=is_dst)
     return {
-        'weather': weather_data,
-        'area': area_data
+        record_type: list(df.itertuples(index=False, name=None))
+        for record_type, df in result.items()
     }
 
 
@@ -56,10 +153,31 @@ class TypeIntervalQueryUtil:
         """
         self.data = data
         self.ts_traces: List[float] = []
+        self.values: List[str] = []
         self.interval_query: TimeIntervalQuery | None = None
 
+    @classmethod
+    def from_arrays(cls, ts_traces: np.ndarray | List[float], values: np.ndarray | List[str]) -> 'TypeIntervalQueryUtil':
+        """
+        Build the query directly from UTC timestamps and values, sorted by timestamp
+        """
+        util = cls(data=[])
+        order = np.argsort(np.asarray(ts_traces, dtype=float), kind='stable')
+        util.ts_traces = np.asarray(ts_traces, dtype=float)[order].tolist()
+        util.values = np.asarray(values, dtype=object)[order].tolist()
+        util.interval_query = TimeIntervalQuery(util.ts_traces)
+        return util
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame, time_field: str = CommonField.LOCAL_DT, value_field: str = 'value') -> 'TypeIntervalQueryUtil':
+        """
+        :param df: e.g. weather.csv or area.csv, the time field holds ISO 8601 strings or datetimes
+        """
+        return cls.from_arrays(to_utc_timestamps(df[time_field]), df[value_field].to_numpy())
+
     def build_interval_query(self):
         self.ts_traces = self.convert_datetime_list_to_timestamp_traces()
+        self.values = [value for _, value in self.data]
         self.interval_query = TimeIntervalQuery(self.ts_traces)
 
     def query(self, ts: datetime | float) -> str:
@@ -75,7 +193,7 @@ class TypeIntervalQueryUtil:
         if start_i is None:
             return 'unknown'
         # Use the value of the left closest record
-        return self.data[start_i][1]
+        return self.values[start_i]
 
     def convert_datetime_list_to_timestamp_traces(self):
         """
@@ -98,3 +216,45 @@ class Unittest(unittest.TestCase):
         self.assertEqual(result['ts'], datetime(2021, 6, 21, 0, 0, 1))
         self.assertEqual(result['type'], 'area')
         self.assertEqual(result['value'], 'urban')
+
+    def test_parse_weather_area_type_logs(self):
+        content = "[2024-06-21T10:00:00-07:00] weather: sunny\n" \
+                  "not a record\n" \
+                  "[2024-06-21T10:00:01.500000-07:00] area: urban\n" \
+                  "[2024-06-21T10:00:02] weather: cloudy"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, 'weather_area_record.out')
+            with open(log_path, 'w') as f:
+                f.write(content)
+            result = parse_weather_area_type_logs([log_path, log_path], timezone='US/Alaska')
+
+        weather_df = result['weather']
+        self.assertEqual(4, len(weather_df))
+        self.assertEqual(['2024-06-21T09:00:00-08:00', '2024-06-21T10:00:02-08:00'],
+                         weather_df[CommonField.LOCAL_DT].tolist()[:2])
+        self.assertEqual(['sunny', 'cloudy'], weather_df['value'].tolist()[:2])
+        self.assertEqual(datetime.fromisoformat('2024-06-21T10:00:02-08:00').timestamp(),
+                         weather_df[CommonField.UTC_TS].iloc[1])
+        self.assertEqual(['2024-06-21T09:00:01.500000-08:00'], result['area'][CommonField.LOCAL_DT].tolist()[:1])
+
+    def test_localize_iso_8601_series_matches_datetime(self):
+        ts_list = ['2024-11-03T01:30:00', '2024-03-10T12:00:00.000001', '2024-06-21T10:00:00Z',
+                   '2024-06-21T10:00:00+05:30']
+        formatted, utc_ts = localize_iso_8601_series(pd.Series(ts_list), 'US/Pacific', is_dst=True)
+        for i, ts in enumerate(ts_list):
+            dt = ensure_timezone(datetime.fromisoformat(ts), 'US/Pacific', is_dst=True)
+            self.assertEqual(format_datetime_as_iso_8601(dt), formatted[i])
+            self.assertEqual(dt.timestamp(), utc_ts[i])
+
+        formatted, utc_ts = localize_iso_8601_series(pd.Series(ts_list[2:]))
+        self.assertEqual(['2024-06-21T10:00:00+00:00', '2024-06-21T10:00:00+05:30'], formatted.tolist())
+
+    def test_type_interval_query_util_from_arrays(self):
+        util = TypeIntervalQueryUtil.from_arrays(np.array([20.0, 10.0, 30.0]), np.array(['b', 'a', 'c']))
+        self.assertEqual('unknown', util.query(5.0))
+        self.assertEqual('a', util.query(15.0))
+        self.assertEqual('b', util.query(20.0))
+        self.assertEqual('c', util.query(datetime.fromtimestamp(40.0)))
+
+        legacy_util = TypeIntervalQueryUtil([(datetime.fromtimestamp(10.0), 'a'), (datetime.fromtimestamp(20.0), 'b')])
+        self.assertEqual('a', legacy_util.query(15.0))